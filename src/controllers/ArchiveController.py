@@ -0,0 +1,105 @@
+from .BaseController import BaseController
+from helpers.document_loaders import get_loader
+import hashlib
+import mimetypes
+import os
+import tarfile
+import zipfile
+
+class ArchiveController(BaseController):
+    """
+    Reads the members of zip/tar uploads. Everything here is blocking,
+    callers run it with asyncio.to_thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.block_size = 1048576
+
+    def get_archive_type(self, file_name: str):
+        file_name = file_name.lower()
+        if file_name.endswith(".zip"):
+            return "zip"
+        if file_name.endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")):
+            return "tar"
+        return None
+
+    def get_member_content_type(self, member_name: str):
+        # members are only named, a format with a loader goes by its registered type
+        loader = get_loader(file_path=member_name)
+        if loader is not None:
+            return loader.content_types[0]
+
+        content_type, _ = mimetypes.guess_type(member_name)
+        return content_type
+
+    def is_ignored_member(self, member_name: str):
+        # folders zipped on macOS carry resource forks and dotfiles
+        return member_name.startswith("__MACOSX/") or os.path.basename(member_name).startswith(".")
+
+    def list_members(self, archive_path: str, archive_type: str):
+        """
+        Returns [(member_name, declared_size)] of the regular files in the archive.
+        """
+        if archive_type == "zip":
+            with zipfile.ZipFile(archive_path) as archive:
+                members = [
+                    (info.filename, info.file_size)
+                    for info in archive.infolist()
+                    if not info.is_dir()
+                ]
+        else:
+            with tarfile.open(archive_path, "r:*") as archive:
+                members = [
+                    (info.name, info.size)
+                    for info in archive.getmembers()
+                    if info.isfile()
+                ]
+
+        return [member for member in members if not self.is_ignored_member(member[0])]
+
+    def copy_member(self, source, temp_path: str, max_size: int):
+        """
+        Copies an opened member to temp_path, returns (sha256, size). Sizes in
+        archive headers can lie, so the copy stops as soon as max_size, the
+        member's declared size, is passed.
+        """
+        file_hash = hashlib.sha256()
+        file_size = 0
+        with open(temp_path, "wb") as f:
+            while block := source.read(self.block_size):
+                file_size += len(block)
+                if file_size > max_size:
+                    raise ValueError("archive member larger than its declared size")
+                file_hash.update(block)
+                f.write(block)
+
+        return file_hash.hexdigest(), file_size
+
+    def extract_zip_member(self, archive_path: str, member_name: str, temp_path: str, max_size: int):
+        # own ZipFile handle, members of one zip are extracted from several threads
+        with zipfile.ZipFile(archive_path) as archive:
+            with archive.open(member_name) as source:
+                return self.copy_member(source=source, temp_path=temp_path, max_size=max_size)
+
+    def extract_tar_members(self, archive_path: str, temp_paths: dict, max_sizes: dict):
+        """
+        Extracts the members named in temp_paths in one pass, a compressed tar has
+        no random access. Returns {member_name: (sha256, size) or the error}.
+        """
+        results = {}
+        with tarfile.open(archive_path, "r:*") as archive:
+            for info in archive:
+                if info.name not in temp_paths or not info.isfile():
+                    continue
+                try:
+                    source = archive.extractfile(info)
+                    results[info.name] = self.copy_member(
+                        source=source,
+                        temp_path=temp_paths[info.name],
+                        max_size=max_sizes[info.name]
+                    )
+                except Exception as e:
+                    results[info.name] = e
+
+        return results
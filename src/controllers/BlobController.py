@@ -0,0 +1,90 @@
+from .BaseController import BaseController
+import hashlib
+import os
+
+class BlobController(BaseController):
+    """
+    Content-addressed file storage: every distinct upload is stored once under
+    assets/blobs/<hash[:2]>/<hash[2:4]>/<hash><ext>, whatever project it belongs to.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.blob_dir = os.path.join(
+            self.base_dir,
+            "assets/blobs"
+        )
+
+    def get_blob_name(self, content_hash: str, file_extention: str):
+        # stored on the asset, so always "/" separated
+        return "/".join([content_hash[:2], content_hash[2:4], content_hash + file_extention])
+
+    def get_blob_path(self, blob_name: str):
+        return os.path.join(self.blob_dir, *blob_name.split("/"))
+
+    def get_page_cache_path(self, content_hash: str, page_cache_version: str):
+        # parsed pages of a blob, shared by every asset with the same content
+        return os.path.join(
+            self.blob_dir, content_hash[:2], content_hash[2:4],
+            f"{content_hash}.pages-{page_cache_version}"
+        )
+
+    def get_temp_name(self):
+        return self.generate_random_string() + ".part"
+
+    def get_temp_path(self, temp_name: str = None):
+        # uploads are written here first, their hash is only known at the end
+        temp_dir = os.path.join(self.blob_dir, "tmp")
+        if not os.path.exists(temp_dir):
+            os.makedirs(temp_dir, exist_ok=True)
+
+        return os.path.join(temp_dir, temp_name if temp_name else self.get_temp_name())
+
+    def get_stale_temp_names(self, older_than: float):
+        # temp files last written before older_than (a unix timestamp)
+        temp_dir = os.path.join(self.blob_dir, "tmp")
+        if not os.path.isdir(temp_dir):
+            return []
+
+        stale_temp_names = []
+        with os.scandir(temp_dir) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < older_than:
+                        stale_temp_names.append(entry.name)
+                except FileNotFoundError:
+                    continue
+
+        return stale_temp_names
+
+    def get_file_hash(self, file_path: str, block_size: int = 1048576):
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while block := f.read(block_size):
+                file_hash.update(block)
+
+        return file_hash.hexdigest()
+
+    def commit_blob(self, temp_path: str, content_hash: str, file_extention: str):
+        """
+        Moves a finished upload to its blob path, or drops it when the same
+        content is already stored. Returns the blob name and whether it was new.
+        Checking the blob first makes a retry after the move a no-op, even
+        though the temp file is gone by then.
+        """
+        blob_name = self.get_blob_name(content_hash=content_hash, file_extention=file_extention)
+        blob_path = self.get_blob_path(blob_name=blob_name)
+
+        if os.path.exists(blob_path):
+            self.discard_temp(temp_path)
+            return blob_name, False
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        # atomic on the same filesystem, a concurrent upload of the same
+        # content just replaces identical bytes
+        os.replace(temp_path, blob_path)
+        return blob_name, True
+
+    def discard_temp(self, temp_path: str):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -2,27 +2,49 @@ from .BaseController import BaseController
 from fastapi import  UploadFile
 from models import ResponseSignal
 from .ProjectController import ProjectController
+from helpers.document_loaders import get_loader
 import re
 import os 
 
 class DataController(BaseController):
-    def __init__(self):
+    def __init__(self, project_controller: ProjectController = None):
         super().__init__()
         self.size_scale = 1048576 #convert MB to bytes
+        self.project_controller = project_controller if project_controller else ProjectController()
         
     def validate_uploaded_file(self, file: UploadFile):
+        return self.validate_file_properties(
+            content_type=file.content_type,
+            file_size=file.size,
+            max_size=self.app_settings.FILE_MAX_SIZE
+        )
 
-        if file.content_type not in self.app_settings.FILE_ALLOWED_TYPES:
+    def validate_file_properties(self, content_type: str, file_size: int, max_size: int):
+
+        # allowed by the deployment and readable by a registered loader
+        if content_type not in self.app_settings.FILE_ALLOWED_TYPES or \
+                get_loader(content_type=content_type) is None:
             return False , ResponseSignal.FILE_TYPE_NOT_SUPPORTED.value
 
-        if file.size > self.app_settings.FILE_MAX_SIZE * self.size_scale:
+        if file_size > max_size * self.size_scale:
             return False, ResponseSignal.FILE_SIZE_EXCEEDED.value
 
         return True, ResponseSignal.FILE_VALIDATED_SUCCESS.value
+
+    def validate_file_content(self, file_path: str, content_type: str, sniff_size: int = 8192):
+        # resumable uploads only declare their type, check the bytes look like it
+        with open(file_path, "rb") as f:
+            head = f.read(sniff_size)
+
+        loader = get_loader(content_type=content_type)
+        if loader is not None and not loader.is_valid_content(head):
+            return False, ResponseSignal.FILE_CONTENT_NOT_MATCHING_TYPE.value
+
+        return True, ResponseSignal.FILE_VALIDATED_SUCCESS.value
     
     def generate_unique_filepath(self, orig_file_name:str, project_id:str):
         random_key = self.generate_random_string()
-        project_path = ProjectController().get_project_path(project_id=project_id)
+        project_path = self.project_controller.get_project_path(project_id=project_id)
         cleaned_file_name = self.get_clean_file_name(orig_file_name)
         new_file_path = os.path.join(project_path,random_key+"_"+cleaned_file_name)
         
@@ -35,6 +57,10 @@ class DataController(BaseController):
 
         return new_file_path, random_key + "_" + cleaned_file_name
 
+    def generate_file_id(self, orig_file_name: str):
+        # asset name of a blob-backed upload, only has to be unique per project
+        return self.generate_random_string() + "_" + self.get_clean_file_name(orig_file_name)
+
     def get_clean_file_name(self, orig_file_name: str):
     
         # remove any special characters, except underscore and .
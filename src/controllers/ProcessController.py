@@ -1,56 +1,73 @@
 from .BaseController import BaseController
 from .ProjectController import ProjectController
+from .BlobController import BlobController
+from helpers.parsing_engine import ParsingEngine, get_file_loader, get_text_splitter, parse_file_window, \
+    is_page_cache_supported, get_page_count, extract_page_range
+from helpers.page_cache import get_page_cache_version, merge_page_cache_parts
+from helpers.document_loaders import get_loader
+from models import SplitterEnum
+import hashlib
+import asyncio
 import os
-from langchain_community.document_loaders import TextLoader
-from langchain_community.document_loaders import PyMuPDFLoader
-from models import ProcessingEnum
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 class ProcessController(BaseController):
-    def __init__(self, project_id: str):
+    def __init__(self, project_id: str, parsing_engine: ParsingEngine = None,
+                       pages_per_task: int = 20, text_segment_size: int = 65536,
+                       page_cache: bool = True, parallel_min_pages: int = 0,
+                       pages_per_range: int = 100):
         super().__init__()
 
         self.project_id = project_id
         self.project_path = ProjectController().get_project_path(project_id=project_id)
+        self.blob_controller = BlobController()
+        self.parsing_engine = parsing_engine
+        self.pages_per_task = pages_per_task
+        self.text_segment_size = text_segment_size
+        self.page_cache = page_cache
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_range = pages_per_range
 
     def get_file_extention(self, file_id: str):
         return os.path.splitext(file_id)[-1]
 
-    def get_file_loader(self, file_id: str):
-        file_ext = self.get_file_extention(file_id=file_id)
-        file_path = os.path.join(
+    def get_file_path(self, file_id: str, asset_blob: str = None):
+        if asset_blob is not None:
+            return self.blob_controller.get_blob_path(blob_name=asset_blob)
+
+        return os.path.join(
             self.project_path,
             file_id
         )
 
-        if not os.path.exists(file_path):
-            return None
+    def get_file_hash(self, file_id: str, asset_blob: str = None, block_size: int = 1048576):
+        file_hash = hashlib.sha256()
+        with open(self.get_file_path(file_id=file_id, asset_blob=asset_blob), "rb") as f:
+            while block := f.read(block_size):
+                file_hash.update(block)
 
-        if file_ext == ProcessingEnum.TXT.value:
-            return TextLoader(file_path=file_path, encoding="utf-8")
-        
-        if file_ext == ProcessingEnum.PDF.value:
-            return PyMuPDFLoader(file_path)
-        
-        return None
+        return file_hash.hexdigest()
+
+    def get_file_loader(self, file_id: str):
+        return get_file_loader(file_path=self.get_file_path(file_id=file_id))
 
     def get_file_content(self, file_id: str):
         #https://python.langchain.com/v0.1/docs/modules/data_connection/document_loaders/
-        loader = self.get_file_loader(file_id=file_id)
+        file_path = self.get_file_path(file_id=file_id)
+        loader = get_file_loader(file_path=file_path)
         if loader:
-            return loader.load()
+            from langchain_core.documents import Document
+            return [
+                Document(page_content=page_text, metadata=page_metadata)
+                for page_text, page_metadata in loader.load_pages(
+                    file_path=file_path, segment_size=self.text_segment_size
+                )
+            ]
         else: 
             return None
 
     def process_file_content(self, file_content: list, file_id:str,
                             chunk_size: int=100, overlap_size: int=20):
-        text_splitter = RecursiveCharacterTextSplitter(
-        # Set a really small chunk size, just to show.
-        chunk_size=chunk_size,
-        chunk_overlap=overlap_size,
-        length_function=len,
-        is_separator_regex=False,
-        )
+        text_splitter = get_text_splitter(chunk_size=chunk_size, overlap_size=overlap_size)
 
         file_content_texts = [rec.page_content for rec in file_content]
         file_content_metadata = [rec.metadata for rec in file_content]
@@ -62,3 +79,113 @@ class ProcessController(BaseController):
         )
         
         return chunks
+
+    def is_supported_file(self, file_id: str, asset_blob: str = None):
+        return os.path.exists(self.get_file_path(file_id=file_id, asset_blob=asset_blob)) and \
+            get_loader(file_path=file_id) is not None
+
+    async def extract_pages(self, file_path: str, page_count: int, page_cache_path: str):
+        """
+        Extracts a large paged document pages_per_range pages at a time, every range in its
+        own parsing worker, and joins the ranges in page order into the sidecar
+        at page_cache_path. Returns False when they could not be joined.
+        """
+        ranges = [
+            (first_page, min(first_page + self.pages_per_range, page_count))
+            for first_page in range(0, page_count, self.pages_per_range)
+        ]
+        part_paths = [self.blob_controller.get_temp_path() for _ in ranges]
+        tasks = [
+            asyncio.ensure_future(self.parsing_engine.run(
+                extract_page_range, file_path, first_page, last_page, part_path
+            ))
+            for (first_page, last_page), part_path in zip(ranges, part_paths)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+            return await asyncio.to_thread(merge_page_cache_parts, part_paths, page_cache_path)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for part_path in part_paths:
+                self.blob_controller.discard_temp(part_path)
+
+    async def iter_file_chunks(self, file_id: str, chunk_size: int=100, overlap_size: int=20,
+                               splitter: str=SplitterEnum.LANGCHAIN.value, asset_blob: str = None,
+                               content_hash: str = None):
+        file_path = self.get_file_path(file_id=file_id, asset_blob=asset_blob)
+        async for chunk in self.iter_path_chunks(file_path=file_path, chunk_size=chunk_size,
+                                                 overlap_size=overlap_size, splitter=splitter,
+                                                 content_hash=content_hash):
+            yield chunk
+
+    async def iter_path_chunks(self, file_path: str, chunk_size: int=100, overlap_size: int=20,
+                               splitter: str=SplitterEnum.LANGCHAIN.value, content_hash: str = None):
+        """
+        Async generator of (chunk_text, chunk_metadata, chunk_start).
+        The file is parsed pages_per_task pages at a time, in the parsing engine
+        when there is one, so only one window of the document is ever in memory
+        besides the next one, which is parsed while the caller writes this one.
+        With a content_hash, the parsed pages are kept in a sidecar next to the
+        blob and later runs over the same content only split.
+        A pdf of parallel_min_pages pages or more is first extracted by all the
+        parsing workers at once into a sidecar (a temporary one without a
+        content_hash), its windows then only split the extracted pages.
+        """
+        page_cache_path, page_cache_part = None, None
+        if self.page_cache and content_hash and is_page_cache_supported(file_path):
+            page_cache_path = self.blob_controller.get_page_cache_path(
+                content_hash=content_hash,
+                page_cache_version=get_page_cache_version()
+            )
+            if not os.path.exists(page_cache_path):
+                page_cache_part = self.blob_controller.get_temp_path()
+
+        temp_page_cache = None
+        if self.parsing_engine is not None and self.parallel_min_pages > 0 and \
+                is_page_cache_supported(file_path) and os.path.exists(file_path) and \
+                (page_cache_path is None or page_cache_part is not None):
+            page_count = await self.parsing_engine.run(get_page_count, file_path)
+            if page_count >= self.parallel_min_pages:
+                if page_cache_path is None:
+                    page_cache_path = temp_page_cache = self.blob_controller.get_temp_path()
+
+                if await self.extract_pages(file_path=file_path, page_count=page_count,
+                                            page_cache_path=page_cache_path):
+                    page_cache_part = None
+                elif temp_page_cache is not None:
+                    page_cache_path = None
+
+        def parse_window(cursor: int, carry: tuple):
+            window_args = (
+                file_path, cursor, carry, chunk_size, overlap_size,
+                self.pages_per_task, self.text_segment_size, splitter,
+                page_cache_path, page_cache_part
+            )
+            if self.parsing_engine is None:
+                return asyncio.ensure_future(asyncio.to_thread(parse_file_window, *window_args))
+            return asyncio.ensure_future(self.parsing_engine.run(parse_file_window, *window_args))
+
+        next_window = parse_window(cursor=0, carry=None)
+        try:
+            while next_window is not None:
+                window = await next_window
+                next_window = None
+
+                if window is None:
+                    return
+
+                chunks, cursor, carry = window
+                if cursor is not None:
+                    next_window = parse_window(cursor=cursor, carry=carry)
+
+                for chunk in chunks:
+                    yield chunk
+        finally:
+            if next_window is not None:
+                next_window.cancel()
+            if page_cache_part is not None:
+                # only left behind when parsing stopped before the last page
+                self.blob_controller.discard_temp(page_cache_part)
+            if temp_page_cache is not None:
+                self.blob_controller.discard_temp(temp_page_cache)
@@ -1,4 +1,6 @@
 from .DataController import DataController
 from .ProjectController import ProjectController
 from .ProcessController import ProcessController
-from .ErrorController import ErrorController
\ No newline at end of file
+from .ErrorController import ErrorController
+from .BlobController import BlobController
+from .ArchiveController import ArchiveController
\ No newline at end of file
@@ -0,0 +1,45 @@
+import zstandard
+
+class ChunkTextCodec:
+    """
+    zstd for chunk_text. A chunk is too short to compress well on its own,
+    so every project gets a dictionary trained on its first chunks and each
+    chunk is compressed against it (about 4x on English text vs ~2.5x without).
+    Compression dictionaries are read-only once built and shared between threads,
+    compressor/decompressor objects are not, callers make one per batch.
+    """
+
+    def __init__(self, level: int = 3, dictionary_size: int = 65536):
+        self.level = level
+        self.dictionary_size = dictionary_size
+
+    def train_dictionary(self, samples: list):
+        # None when there isn't enough text to train on, chunks are then compressed without one
+        try:
+            return zstandard.train_dictionary(
+                self.dictionary_size,
+                [sample.encode("utf-8") for sample in samples]
+            ).as_bytes()
+        except zstandard.ZstdError:
+            return None
+
+    def load_dictionary(self, dictionary_data: bytes):
+        if not dictionary_data:
+            return None
+
+        dictionary = zstandard.ZstdCompressionDict(dictionary_data)
+        dictionary.precompute_compress(level=self.level)
+        return dictionary
+
+    def get_compressor(self, dictionary: zstandard.ZstdCompressionDict = None):
+        # the dictionary is identified on the chunk document, not in the frame
+        return zstandard.ZstdCompressor(level=self.level, dict_data=dictionary, write_dict_id=False)
+
+    def get_decompressor(self, dictionary: zstandard.ZstdCompressionDict = None):
+        return zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    def compress(self, compressor: zstandard.ZstdCompressor, text: str):
+        return compressor.compress(text.encode("utf-8"))
+
+    def decompress(self, decompressor: zstandard.ZstdDecompressor, data: bytes):
+        return decompressor.decompress(data).decode("utf-8")
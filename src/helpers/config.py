@@ -1,4 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     APP_NAME: str
@@ -7,14 +9,78 @@ class Settings(BaseSettings):
 
     FILE_ALLOWED_TYPES: list
     FILE_MAX_SIZE: int
+    FILE_RESUMABLE_MAX_SIZE: int = 1024 # MB, uploads through /upload/{project_id}/sessions
+    FILE_RESUMABLE_SESSION_TTL: int = 86400 # seconds idle before a session and its temp file are deleted, 0 = never
+    FILE_RESUMABLE_SWEEP_INTERVAL: int = 3600 # seconds between sweeps
+    FILE_BATCH_MAX_SIZE: int = 1024 # MB per archive sent to /upload/{project_id}/batch
+    FILE_BATCH_MAX_FILES: int = 2000 # files + archive members per batch
+    FILE_BATCH_CONCURRENCY: int = 8 # files written / members extracted at the same time
 
     FILE_DEFAULT_CHUNK_SIZE: int
 
     MONGODB_URL: str # Correct usage of ClassVar for class-level variables
     MONGODB_DATABASE: str       # Correctly annotate this as a regular field
 
+    PROCESS_QUEUE_WORKERS: int = 2
+    PROCESS_QUEUE_MAX_SIZE: int = 100
+    PROCESS_INSERT_BATCH_SIZE: int = 1000
+    PROCESS_INSERT_MAX_IN_FLIGHT: int = 4 # concurrent insert_many batches per asset
+    PROCESS_ASSET_CONCURRENCY: int = 4 # assets of one job processed at the same time
+    PROCESS_EMBED_CHUNKS: bool = False # store an EMBEDDING_BACKEND vector on every chunk while processing
+    PROCESS_JOB_LEASE: int = 60 # seconds a job claim lives without a heartbeat before another instance takes the job
+    CHUNK_GC_BATCH_SIZE: int = 1000
+    CHUNK_GC_PAUSE: float = 0.1 # seconds between old-generation delete batches
+
+    PROJECT_CACHE_SIZE: int = 1024 # 0 disables the project lookup cache
+    PROJECT_CACHE_TTL: int = 300 # seconds
+
+    CHUNK_TEXT_CODEC: str = "plain" # ChunkCodecEnum value new chunks are written with
+    CHUNK_TEXT_CODEC_LEVEL: int = 3
+    CHUNK_TEXT_DICTIONARY_SIZE: int = 65536 # bytes, per project dictionary
+
+    PARSER_WORKERS: int = 0 # 0 = one worker per core
+    PARSER_MAX_TASKS_PER_CHILD: int = 50
+    PARSER_TASK_TIMEOUT: int = 300 # seconds
+    PARSER_PAGES_PER_TASK: int = 20
+    PARSER_TEXT_SEGMENT_SIZE: int = 65536 # bytes per text file "page"
+    PARSER_PAGE_CACHE: bool = True # keep parsed pdf pages next to the blob
+    PARSER_PARALLEL_MIN_PAGES: int = 200 # pdfs this long are extracted by every worker at once, 0 = never
+    PARSER_PAGES_PER_RANGE: int = 100 # pages per worker task of a parallel extraction
+
+    GENERATION_BACKEND: Optional[str] = None # LLMEnums value, None = no provider
+    EMBEDDING_BACKEND: Optional[str] = None
+
+    OPENAI_API_URL: Optional[str] = None
+    COHERE_API_KEY: Optional[str] = None
+    COHERE_API_URL: Optional[str] = None
+    LOCAL_GENERATION_RESPONSE: Optional[str] = None # canned LOCAL generation, None = extractive
+
+    GENERATION_MODEL_ID: Optional[str] = None
+    EMBEDDING_MODEL_ID: Optional[str] = None
+    EMBEDDING_MODEL_SIZE: Optional[int] = None
+    EMBEDDING_BATCH_SIZE: Optional[int] = None # texts per embedding call, None = the provider's limit
+    EMBEDDING_MAX_RETRIES: int = 3 # per batch, on rate limits/timeouts/5xx
+    EMBEDDING_CACHE_SIZE: int = 1024 # MB of vectors kept in assets/embedding_cache, 0 disables the cache
+    EMBEDDING_CACHE_MEMORY_SIZE: int = 64 # MB of them also kept in memory, per process
+
+    LLM_HTTP_MAX_CONNECTIONS: int = 100 # pool shared by the async providers
+    LLM_HTTP_MAX_KEEPALIVE: int = 20
+    LLM_HTTP_TIMEOUT: float = 60.0 # seconds
+    LLM_MAX_CONCURRENCY: int = 16 # async provider calls in flight, 0 disables the scheduler
+    LLM_REQUESTS_PER_MINUTE: int = 0 # per provider and model, 0 = unlimited
+    LLM_TOKENS_PER_MINUTE: int = 0 # per provider and model, estimated, 0 = unlimited
+    LLM_MAX_RETRIES: int = 3 # on rate limits/timeouts/5xx
+    LLM_RETRY_BACKOFF: float = 1.0 # seconds, doubled per retry and jittered
+    LLM_RETRY_MAX_BACKOFF: float = 60.0
+
+    INPUT_DAFAULT_MAX_CHARACTERS: int = 1000
+    GENERATION_DAFAULT_MAX_TOKENS: int = 1000
+    GENERATION_DAFAULT_TEMPERATURE: float = 0.1
+
     class Config:
         env_file = ".env"
 
+@lru_cache
 def get_settings():
+    # .env is read once per process, everything shares this instance
     return Settings()
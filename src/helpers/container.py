@@ -0,0 +1,157 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from helpers.config import Settings
+from helpers.parsing_engine import ParsingEngine
+from controllers import DataController, ProjectController, BlobController, ArchiveController
+from models.IndexManager import IndexManager
+from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
+from models.ProcessJobModel import ProcessJobModel
+from models.UploadSessionModel import UploadSessionModel
+from stores.llm.LLMProviderFactory import LLMProviderFactory
+from stores.llm.EmbeddingCache import EmbeddingCache
+from stores.llm.ProviderScheduler import ProviderScheduler
+from tasks import ProcessJobQueue, UploadSessionSweeper
+import logging
+import os
+
+class AppContainer:
+    """
+    Everything that lives as long as the app: settings, the Mongo client,
+    models, stateless controllers, the parsing engine, the job queue and
+    the LLM providers, async ones sharing one HTTP connection pool and
+    one request scheduler, and the embedding cache. Built once by the lifespan in main.py and handed to
+    routes through the dependencies in routes/dependencies.py, so requests
+    don't construct settings, controllers or models.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.logger = logging.getLogger('uvicorn.error')
+
+        self.mongo_conn = None
+        self.db_client = None
+
+        self.embedding_cache = None
+        self.llm_scheduler = None
+        self.generation_client = None
+        self.embedding_client = None
+
+    async def start(self):
+        settings = self.settings
+
+        self.mongo_conn = AsyncIOMotorClient(settings.MONGODB_URL)
+        self.db_client = self.mongo_conn[settings.MONGODB_DATABASE]
+
+        # indexes are checked once here, the models below are shared by all requests
+        await IndexManager(db_client=self.db_client).ensure_indexes()
+        self.project_model = ProjectModel(db_client=self.db_client)
+        self.asset_model = AssetModel(db_client=self.db_client)
+        self.chunk_model = ChunkModel(db_client=self.db_client)
+        self.process_job_model = ProcessJobModel(db_client=self.db_client)
+        self.upload_session_model = UploadSessionModel(db_client=self.db_client)
+
+        self.project_controller = ProjectController()
+        self.data_controller = DataController(project_controller=self.project_controller)
+        self.blob_controller = BlobController()
+        self.archive_controller = ArchiveController()
+
+        self.upload_session_sweeper = UploadSessionSweeper(
+            upload_session_model=self.upload_session_model,
+            blob_controller=self.blob_controller,
+            session_ttl=settings.FILE_RESUMABLE_SESSION_TTL,
+            sweep_interval=settings.FILE_RESUMABLE_SWEEP_INTERVAL
+        )
+        self.upload_session_sweeper.start()
+
+        if settings.EMBEDDING_CACHE_SIZE > 0:
+            self.embedding_cache = EmbeddingCache(
+                cache_path=os.path.join(
+                    os.path.dirname(os.path.dirname(__file__)),
+                    "assets/embedding_cache/embeddings.db"
+                ),
+                max_size=settings.EMBEDDING_CACHE_SIZE * 1024 * 1024,
+                memory_size=settings.EMBEDDING_CACHE_MEMORY_SIZE * 1024 * 1024
+            )
+
+        if settings.LLM_MAX_CONCURRENCY > 0:
+            self.llm_scheduler = ProviderScheduler(
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+                max_retries=settings.LLM_MAX_RETRIES,
+                retry_backoff=settings.LLM_RETRY_BACKOFF,
+                max_backoff=settings.LLM_RETRY_MAX_BACKOFF
+            )
+
+        self.llm_provider_factory = LLMProviderFactory(
+            config=settings,
+            embedding_cache=self.embedding_cache,
+            scheduler=self.llm_scheduler
+        )
+        self.generation_client = self.create_llm_client(
+            backend=settings.GENERATION_BACKEND
+        )
+        if self.generation_client:
+            self.generation_client.set_generation_model(model_id=settings.GENERATION_MODEL_ID)
+
+        self.embedding_client = self.create_llm_client(
+            backend=settings.EMBEDDING_BACKEND
+        )
+        if self.embedding_client:
+            self.embedding_client.set_embedding_model(
+                model_id=settings.EMBEDDING_MODEL_ID,
+                embedding_size=settings.EMBEDDING_MODEL_SIZE
+            )
+
+        self.parsing_engine = ParsingEngine(
+            workers=settings.PARSER_WORKERS,
+            max_tasks_per_child=settings.PARSER_MAX_TASKS_PER_CHILD,
+            task_timeout=settings.PARSER_TASK_TIMEOUT
+        )
+        self.parsing_engine.start()
+
+        self.process_queue = ProcessJobQueue(
+            db_client=self.db_client,
+            workers=settings.PROCESS_QUEUE_WORKERS,
+            max_size=settings.PROCESS_QUEUE_MAX_SIZE,
+            insert_batch_size=settings.PROCESS_INSERT_BATCH_SIZE,
+            insert_max_in_flight=settings.PROCESS_INSERT_MAX_IN_FLIGHT,
+            parsing_engine=self.parsing_engine,
+            pages_per_task=settings.PARSER_PAGES_PER_TASK,
+            text_segment_size=settings.PARSER_TEXT_SEGMENT_SIZE,
+            gc_batch_size=settings.CHUNK_GC_BATCH_SIZE,
+            gc_pause=settings.CHUNK_GC_PAUSE,
+            asset_concurrency=settings.PROCESS_ASSET_CONCURRENCY,
+            page_cache=settings.PARSER_PAGE_CACHE,
+            parallel_min_pages=settings.PARSER_PARALLEL_MIN_PAGES,
+            pages_per_range=settings.PARSER_PAGES_PER_RANGE,
+            embedding_client=self.embedding_client if settings.PROCESS_EMBED_CHUNKS else None,
+            job_lease=settings.PROCESS_JOB_LEASE
+        )
+        await self.process_queue.start(
+            job_model=self.process_job_model,
+            chunk_model=self.chunk_model,
+            asset_model=self.asset_model,
+            project_model=self.project_model
+        )
+
+    def create_llm_client(self, backend: str):
+        if not backend:
+            return None
+
+        # routes run on the event loop, a blocking SDK call would stall every request
+        client = self.llm_provider_factory.create_async(provider=backend)
+        if client is None:
+            self.logger.error(f"Unknown LLM backend: {backend}")
+
+        return client
+
+    async def stop(self):
+        await self.upload_session_sweeper.stop()
+        await self.process_queue.stop()
+        self.parsing_engine.shutdown()
+        await self.llm_provider_factory.aclose()
+        if self.embedding_cache:
+            self.embedding_cache.close()
+        self.mongo_conn.close()
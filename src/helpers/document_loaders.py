@@ -0,0 +1,162 @@
+from models import ProcessingEnum
+from abc import ABC, abstractmethod
+import io
+import mmap
+import os
+
+# Document loaders, one per format, looked up by file extension (parsing)
+# or content type (upload validation, archive members).
+#
+# Every loader streams a document the same way: open_pages() is a generator of
+# (next_cursor, page_text, page_metadata) starting at cursor, a cursor being
+# whatever the loader needs to resume and only ever handed back to it.
+# Loaders run in the parsing workers, which are spawned processes: a format is
+# added by registering its loader at the bottom of this module, registrations
+# made at runtime in the API process are not seen by the workers.
+
+class DocumentLoader(ABC):
+
+    # the document has real pages: worth a page sidecar and parallel page ranges
+    paged = False
+    # put between consecutive pages when they are split as one text: a page
+    # break for real pages, nothing for segments cut out of a continuous text
+    page_separator = ""
+
+    def __init__(self, extensions: list, content_types: list):
+        self.extensions = extensions
+        self.content_types = content_types
+
+    @abstractmethod
+    def open_pages(self, file_path: str, cursor: object = None, segment_size: int = 65536):
+        pass
+
+    def get_text_offset(self, cursor: object):
+        # position of the page starting at cursor in the document text,
+        # chunk offsets of paged formats count from the start of their page
+        return 0
+
+    def is_valid_content(self, head: bytes):
+        # head is the beginning of an upload that only declared its type
+        return True
+
+    def load_pages(self, file_path: str, segment_size: int = 65536):
+        # the whole document at once, for callers that don't stream it
+        pages = self.open_pages(file_path=file_path, segment_size=segment_size)
+        try:
+            return [(page_text, page_metadata) for _, page_text, page_metadata in pages]
+        finally:
+            pages.close()
+
+
+class PdfLoader(DocumentLoader):
+    """
+    Text straight from PyMuPDF, the same page_content/metadata as LangChain's
+    PyMuPDFLoader, one page at a time. Cursors are page numbers.
+    """
+
+    paged = True
+    page_separator = "\n\n"
+
+    def get_page_count(self, file_path: str):
+        import fitz
+        doc = fitz.open(file_path)
+        try:
+            return len(doc)
+        finally:
+            doc.close()
+
+    def open_pages(self, file_path: str, cursor: int = None, segment_size: int = 65536,
+                   stop: int = None):
+        import fitz
+        doc = fitz.open(file_path)
+        try:
+            doc_metadata = {
+                key: value for key, value in doc.metadata.items()
+                if type(value) in [str, int]
+            }
+            # doc.pages() rejects a cursor at the end, where the last window of
+            # a document with a multiple of pages_per_task pages stops
+            for page_no in range(cursor or 0, min(stop, len(doc)) if stop is not None else len(doc)):
+                page = doc.load_page(page_no)
+                yield page.number + 1, page.get_text(), {
+                    "source": file_path,
+                    "file_path": file_path,
+                    "page": page.number,
+                    "total_pages": len(doc),
+                    **doc_metadata
+                }
+        finally:
+            doc.close()
+
+    def is_valid_content(self, head: bytes):
+        return head.startswith(b"%PDF-")
+
+
+class TextFileLoader(DocumentLoader):
+    """
+    UTF-8 text read through mmap, segment_size bytes at a time. Segments are
+    decoded on their own: they end on a character boundary and never between
+    the \\r and \\n of a line break, so no decoder state crosses a cursor.
+    Line breaks are translated to \\n like a text-mode open() does.
+    Cursors are (byte position, characters read) of the previous segment end.
+    """
+
+    def get_segment_end(self, mm: mmap.mmap, end: int):
+        if end >= len(mm):
+            return len(mm)
+
+        # don't cut a multi-byte character, continuation bytes are 0b10xxxxxx
+        while end < len(mm) and mm[end] & 0xC0 == 0x80:
+            end += 1
+
+        if mm[end - 1] == 0x0D and end < len(mm) and mm[end] == 0x0A:
+            end += 1
+
+        return end
+
+    def open_pages(self, file_path: str, cursor: tuple = None, segment_size: int = 65536):
+        position, text_offset = cursor if cursor else (0, 0)
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                while position < len(mm):
+                    end = self.get_segment_end(mm, position + segment_size)
+                    segment = mm[position:end]
+                    text = segment.decode("utf-8")
+                    if b"\r" in segment:
+                        text = io.IncrementalNewlineDecoder(None, translate=True).decode(text, final=True)
+                    position = end
+                    text_offset += len(text)
+                    yield (position, text_offset), text, {"source": file_path}
+
+    def get_text_offset(self, cursor: tuple):
+        # text files have no pages, their chunk offsets count from the start of the file
+        return cursor[1] if cursor else 0
+
+    def is_valid_content(self, head: bytes):
+        return b"\x00" not in head
+
+
+LOADERS = {}
+
+def register_loader(loader: DocumentLoader):
+    for extension in loader.extensions:
+        LOADERS[extension.lower()] = loader
+
+    return loader
+
+def get_loader(file_path: str = None, content_type: str = None):
+    if file_path is not None:
+        return LOADERS.get(os.path.splitext(file_path)[-1].lower())
+
+    for loader in LOADERS.values():
+        if content_type in loader.content_types:
+            return loader
+
+    return None
+
+register_loader(PdfLoader(extensions=[ProcessingEnum.PDF.value], content_types=["application/pdf"]))
+register_loader(TextFileLoader(extensions=[ProcessingEnum.TXT.value], content_types=["text/plain"]))
+register_loader(TextFileLoader(extensions=[ProcessingEnum.MD.value], content_types=["text/markdown"]))
@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import struct
+import zlib
+
+# Parsed-page sidecars: the pages PyMuPDF extracted from a document, stored
+# next to its blob so re-chunking the same content never parses it again.
+#
+# A sidecar is a sequence of records, each a 4-byte big-endian length then a
+# zlib-compressed JSON object. The first record is the header, holding the
+# metadata of the first page without its PAGE_KEYS; every page record only
+# stores the metadata keys that differ from it (for PyMuPDF pages that is just
+# "page"). Cursors into a sidecar are byte offsets of the next page record.
+#
+# Headers don't depend on the page a sidecar starts at, so parts written for
+# consecutive page ranges of a document are joined by concatenating their records.
+
+PAGE_CACHE_FORMAT = 2
+
+# metadata that changes with every page, always stored on the page record
+PAGE_KEYS = ["page"]
+
+def get_page_cache_version():
+    # a PyMuPDF upgrade can change extracted text, it must not reuse old pages
+    import fitz
+    return f"{PAGE_CACHE_FORMAT}-{fitz.VersionBind}"
+
+def write_record(f, payload: dict):
+    data = zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    f.write(struct.pack(">I", len(data)))
+    f.write(data)
+
+def read_record(f):
+    head = f.read(4)
+    if len(head) < 4:
+        return None
+
+    size, = struct.unpack(">I", head)
+    return json.loads(zlib.decompress(f.read(size)).decode("utf-8"))
+
+def skip_records(f, count: int):
+    for _ in range(count):
+        head = f.read(4)
+        if len(head) < 4:
+            return False
+
+        size, = struct.unpack(">I", head)
+        f.seek(size, os.SEEK_CUR)
+
+    return True
+
+def iter_cached_pages(page_cache_path: str, cursor: int = 0, file_path: str = None):
+    """
+    Generator of (next_cursor, page_text, page_metadata), the same pages the
+    document parser produced. source/file_path point at file_path, the sidecar
+    is shared by every asset with the same content.
+    """
+    with open(page_cache_path, "rb") as f:
+        header = read_record(f)
+        if header is None:
+            return
+
+        common_metadata = header["metadata"]
+        if cursor:
+            f.seek(cursor)
+
+        while (record := read_record(f)) is not None:
+            page_metadata = {**common_metadata, **record["metadata"]}
+            for key in ["source", "file_path"]:
+                if file_path is not None and key in page_metadata:
+                    page_metadata[key] = file_path
+
+            yield f.tell(), record["text"], page_metadata
+
+class PageCacheWriter:
+    """
+    Appends the pages of one parsing window to a sidecar under construction.
+    Windows of a document run one after the other, possibly in different
+    worker processes, so each one reopens the part file at its first page.
+    """
+
+    def __init__(self, part_path: str, first_page: int = 0):
+        self.part_path = part_path
+        self.common_metadata = None
+        self.is_valid = True
+
+        if first_page == 0 or not os.path.exists(part_path):
+            self.f = open(part_path, "wb")
+            self.is_valid = first_page == 0
+            return
+
+        self.f = open(part_path, "r+b")
+        header = read_record(self.f)
+        if header is None or not skip_records(self.f, first_page):
+            # earlier windows are missing, this sidecar can't be completed
+            self.is_valid = False
+            return
+
+        self.common_metadata = header["metadata"]
+        # a window retried after a worker crash starts over at its first page
+        self.f.truncate()
+
+    def add(self, page_text: str, page_metadata: dict):
+        if not self.is_valid:
+            return
+
+        if self.common_metadata is None:
+            self.common_metadata = {
+                key: value for key, value in page_metadata.items()
+                if key not in PAGE_KEYS
+            }
+            write_record(self.f, {"version": get_page_cache_version(), "metadata": self.common_metadata})
+
+        write_record(self.f, {
+            "text": page_text,
+            "metadata": {
+                key: value for key, value in page_metadata.items()
+                if key not in self.common_metadata or self.common_metadata[key] != value
+            }
+        })
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+
+    def commit(self, page_cache_path: str):
+        # called after the last page, readers only ever see complete sidecars
+        self.close()
+        if not self.is_valid or self.common_metadata is None:
+            os.remove(self.part_path)
+            return False
+
+        os.makedirs(os.path.dirname(page_cache_path), exist_ok=True)
+        os.replace(self.part_path, page_cache_path)
+        return True
+
+def merge_page_cache_parts(part_paths: list, page_cache_path: str):
+    """
+    Joins the parts written for consecutive page ranges of one document,
+    in order, into the sidecar at page_cache_path. The first part is extended
+    in place and moved there, the others are left for the caller to remove.
+    Returns False when a part is empty or belongs to another document.
+    """
+    with open(part_paths[0], "ab+") as merged:
+        merged.seek(0)
+        header = read_record(merged)
+        if header is None:
+            return False
+
+        merged.seek(0, os.SEEK_END)
+        for part_path in part_paths[1:]:
+            with open(part_path, "rb") as part:
+                if read_record(part) != header:
+                    return False
+                shutil.copyfileobj(part, merged)
+
+    os.makedirs(os.path.dirname(page_cache_path), exist_ok=True)
+    os.replace(part_paths[0], page_cache_path)
+    return True
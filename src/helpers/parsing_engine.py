@@ -0,0 +1,385 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from models import SplitterEnum
+from .text_splitter import OffsetTextSplitter
+from .page_cache import PageCacheWriter, iter_cached_pages
+from .document_loaders import get_loader
+import multiprocessing
+import asyncio
+import logging
+import os
+
+# The functions below run inside the worker processes, they only take
+# plain paths/numbers and only return (text, metadata) tuples so nothing
+# heavier than strings and dicts crosses the process boundary.
+# LangChain and PyMuPDF are imported where they are used: the API process
+# imports this module for ParsingEngine and must not pay for them at startup.
+# Formats are read by the DocumentLoader registered for them (document_loaders).
+
+# how far back, in pages, split_with_carry may carry a top level piece
+MAX_CARRY_PAGES = 16
+
+def get_file_loader(file_path: str):
+    # the registered DocumentLoader of the file's format
+    if not os.path.exists(file_path):
+        return None
+
+    return get_loader(file_path=file_path)
+
+def get_text_splitter(chunk_size: int, overlap_size: int,
+                      splitter: str = SplitterEnum.LANGCHAIN.value):
+    if splitter == SplitterEnum.NATIVE.value:
+        return OffsetTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap_size)
+
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=overlap_size,
+        length_function=len,
+        is_separator_regex=False,
+    )
+
+def load_file_pages(file_path: str, segment_size: int = 65536):
+    loader = get_file_loader(file_path=file_path)
+    if loader is None:
+        return None
+
+    return loader.load_pages(file_path=file_path, segment_size=segment_size)
+
+def open_file_pages(file_path: str, cursor: object = None, segment_size: int = 65536):
+    """
+    Generator of (next_cursor, page_text, page_metadata) starting at cursor,
+    or None when the file is missing or its type is not supported.
+    """
+    loader = get_file_loader(file_path=file_path)
+    if loader is None:
+        return None
+
+    return loader.open_pages(file_path=file_path, cursor=cursor, segment_size=segment_size)
+
+def get_page_count(file_path: str):
+    return get_loader(file_path=file_path).get_page_count(file_path)
+
+def extract_page_range(file_path: str, first_page: int, last_page: int, part_path: str):
+    """
+    Extracts pages [first_page, last_page) of a paged document into a sidecar
+    part, one range of a large document parsed by several workers at once.
+    Returns the number of pages written.
+    """
+    page_cache = PageCacheWriter(part_path=part_path)
+    pages = get_loader(file_path=file_path).open_pages(file_path=file_path, cursor=first_page, stop=last_page)
+
+    page_count = 0
+    try:
+        for _, page_text, page_metadata in pages:
+            page_cache.add(page_text=page_text, page_metadata=page_metadata)
+            page_count += 1
+    finally:
+        pages.close()
+        page_cache.close()
+
+    return page_count
+
+def is_page_cache_supported(file_path: str):
+    # text files are their own pages, only parsed formats are worth a sidecar
+    loader = get_loader(file_path=file_path)
+    return loader is not None and loader.paged
+
+def get_chunk_offsets(text_splitter, text: str, overlap_size: int):
+    if isinstance(text_splitter, OffsetTextSplitter):
+        return text_splitter.split_offsets(text)
+
+    # LangChain only gives back strings, locate them the way add_start_index does
+    offsets = []
+    index = 0
+    previous_chunk_len = 0
+    for chunk_text in text_splitter.split_text(text):
+        offset = index + previous_chunk_len - overlap_size
+        index = text.find(chunk_text, max(0, offset))
+        previous_chunk_len = len(chunk_text)
+        offsets.append((index, index + previous_chunk_len))
+
+    return offsets
+
+def get_separators(text_splitter):
+    if isinstance(text_splitter, OffsetTextSplitter):
+        return text_splitter.separators
+    return text_splitter._separators
+
+def get_piece_start(text: str, separator: str, position: int):
+    # start of the piece the position is in, text split on separator the way
+    # the splitters do it: every piece but the first starts with the separator
+    piece_start = 0
+    for piece_no, piece in enumerate(text.split(separator)):
+        piece_len = len(piece) + (len(separator) if piece_no > 0 else 0)
+        if piece_start + piece_len > position:
+            break
+        piece_start += piece_len
+
+    return piece_start
+
+def split_with_carry(text_splitter, carry: tuple,
+                     page_text: str, page_metadata: dict, overlap_size: int,
+                     page_offset: int = 0, page_separator: str = "\n\n"):
+    """
+    Splits one page with the unfinished end of the previous page in front of it,
+    so chunks and their overlap run across page boundaries.
+    Returns the finished chunks and the new carry.
+    Chunks are (text, metadata, start): a chunk keeps the metadata of the page
+    it starts on and start is its offset in that page's text (page_offset is
+    added, the position of the page in the file for text segments).
+    The carry is (text, segments, skip), segments being (offset in text, page
+    metadata, offset in the page) for every page the carried text runs through
+    and skip the offset of the first chunk still to come, the ones in front of
+    it are out already.
+    page_separator goes between the carry and the page: a page break for real
+    pages, nothing for text segments, which are cut anywhere in the text.
+    """
+    carry_text, carry_segments, skip = carry if carry else ("", [], 0)
+    if carry_text:
+        text = carry_text + page_separator + page_text
+        segments = carry_segments + [(len(carry_text) + len(page_separator), page_metadata, page_offset)]
+    else:
+        text = page_text
+        segments = [(0, page_metadata, page_offset)]
+
+    chunk_offsets = [
+        (start, end)
+        for start, end in get_chunk_offsets(text_splitter=text_splitter, text=text, overlap_size=overlap_size)
+        if start >= skip
+    ]
+    if len(chunk_offsets) == 0:
+        return [], (text, segments, skip) if text.strip() else carry
+
+    # The splitters cut a chunk depending on the whole top level piece (say a
+    # paragraph) it is in and on the pieces merged with it, the last piece of
+    # the text may still grow into the next page. The chunks touching it and
+    # the last chunk are carried and split again with the next page, the text
+    # from the piece the last finished chunk starts in, where the splitter
+    # gets to the same chunks again. A long piece would be split over and
+    # over: when that is more than a few pages back the pieces of the next
+    # separator are tried, and at last only the last chunk is carried.
+    final_count = len(chunk_offsets) - 1
+    carry_from = start = chunk_offsets[final_count][0]
+    for separator in get_separators(text_splitter):
+        if separator == "":
+            break
+
+        last_piece_start = get_piece_start(text=text, separator=separator, position=len(text) - 1)
+        piece_final_count = len(chunk_offsets) - 1
+        while piece_final_count > 0 and chunk_offsets[piece_final_count - 1][1] > last_piece_start:
+            piece_final_count -= 1
+
+        piece_start = get_piece_start(
+            text=text,
+            separator=separator,
+            position=chunk_offsets[piece_final_count - 1][0]
+        ) if piece_final_count > 0 else 0
+        if len(text) - piece_start <= MAX_CARRY_PAGES * len(page_text):
+            final_count = piece_final_count
+            carry_from = chunk_offsets[piece_final_count][0]
+            start = piece_start
+            break
+
+    chunks = []
+    for chunk_start, chunk_end in chunk_offsets[:final_count]:
+        segment_offset, segment_metadata, segment_page_start = get_segment(segments, chunk_start)
+        chunks.append((
+            text[chunk_start:chunk_end],
+            segment_metadata,
+            segment_page_start + chunk_start - segment_offset
+        ))
+
+    carry_segments = []
+    for segment_offset, segment_metadata, segment_page_start in segments:
+        if segment_offset <= start:
+            carry_segments = [(0, segment_metadata, segment_page_start + start - segment_offset)]
+        else:
+            carry_segments.append((segment_offset - start, segment_metadata, segment_page_start))
+
+    return chunks, (text[start:], carry_segments, carry_from - start)
+
+def get_segment(segments: list, start: int):
+    # the page a position of the joined text belongs to, segments are few
+    for segment in reversed(segments):
+        if segment[0] <= start:
+            return segment
+
+    return segments[0]
+
+def split_carry(text_splitter, carry: tuple, overlap_size: int):
+    # the end of the document, what is carried only has to be split
+    carry_text, carry_segments, skip = carry
+    chunks = []
+    for start, end in get_chunk_offsets(text_splitter=text_splitter, text=carry_text, overlap_size=overlap_size):
+        if start < skip:
+            continue
+        segment_offset, segment_metadata, segment_page_start = get_segment(carry_segments, start)
+        chunks.append((carry_text[start:end], segment_metadata, segment_page_start + start - segment_offset))
+
+    return chunks
+
+def parse_file_window(file_path: str, cursor: int, carry: tuple,
+                      chunk_size: int, overlap_size: int,
+                      max_pages: int = 20, segment_size: int = 65536,
+                      splitter: str = SplitterEnum.LANGCHAIN.value,
+                      page_cache_path: str = None, page_cache_part: str = None):
+    """
+    Parses and splits at most max_pages pages (or text segments) starting at cursor.
+    Returns (chunks, next_cursor, carry), next_cursor is None once the file is done,
+    or None when the file can't be loaded. Keeps one window in memory at a time.
+
+    With page_cache_path alone the pages are read from that sidecar instead of
+    the file. With page_cache_part too, the file is parsed and its pages are
+    written to the part, which becomes page_cache_path after the last window.
+    """
+    if page_cache_path is not None and page_cache_part is None:
+        pages = iter_cached_pages(page_cache_path=page_cache_path, cursor=cursor, file_path=file_path)
+    else:
+        pages = open_file_pages(file_path=file_path, cursor=cursor, segment_size=segment_size)
+    if pages is None:
+        return None
+
+    loader = get_loader(file_path=file_path)
+    text_splitter = get_text_splitter(chunk_size=chunk_size, overlap_size=overlap_size, splitter=splitter)
+    # pdf cursors are page numbers, the first page this window writes
+    page_cache = PageCacheWriter(part_path=page_cache_part, first_page=cursor) \
+        if page_cache_part is not None else None
+
+    chunks = []
+    next_cursor = None
+    page_offset = loader.get_text_offset(cursor)
+    try:
+        for page_no, (page_cursor, page_text, page_metadata) in enumerate(pages):
+            if page_cache is not None:
+                page_cache.add(page_text=page_text, page_metadata=page_metadata)
+
+            page_chunks, carry = split_with_carry(
+                text_splitter=text_splitter,
+                carry=carry,
+                page_text=page_text,
+                page_metadata=page_metadata,
+                overlap_size=overlap_size,
+                page_offset=page_offset,
+                page_separator=loader.page_separator
+            )
+            chunks.extend(page_chunks)
+            next_cursor = page_cursor
+            page_offset = loader.get_text_offset(page_cursor)
+
+            if page_no + 1 >= max_pages:
+                return chunks, next_cursor, carry
+    finally:
+        pages.close()
+        if page_cache is not None:
+            page_cache.close()
+
+    if page_cache is not None:
+        page_cache.commit(page_cache_path=page_cache_path)
+
+    # end of file, the carried text holds the last chunks
+    if carry:
+        chunks.extend(split_carry(text_splitter=text_splitter, carry=carry, overlap_size=overlap_size))
+
+    return chunks, None, None
+
+
+class ParsingEngine:
+    """
+    ProcessPoolExecutor wrapper used by ProcessController for the CPU-bound
+    load/split work, so parsing uses every core and a crashing or hanging
+    PyMuPDF call takes down a worker process instead of the API process.
+    """
+
+    def __init__(self, workers: int = None, max_tasks_per_child: int = None,
+                       task_timeout: float = None):
+        self.workers = workers if workers else (os.cpu_count() or 1)
+        self.max_tasks_per_child = max_tasks_per_child if max_tasks_per_child else None
+        self.task_timeout = task_timeout if task_timeout else None
+
+        self.executor = None
+        self.logger = logging.getLogger('uvicorn.error')
+
+    def _create_executor(self):
+        # max_tasks_per_child does not work with fork, spawn is also safer with PyMuPDF
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=self.max_tasks_per_child
+        )
+
+    def start(self):
+        if self.executor is None:
+            self.executor = self._create_executor()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _restart(self, broken_executor: ProcessPoolExecutor):
+        # the first task that notices the broken/hung pool replaces it,
+        # later ones just retry on the new pool
+        if self.executor is not broken_executor:
+            return
+
+        self.logger.error("Restarting parsing worker pool")
+        for process in list((broken_executor._processes or {}).values()):
+            if process.is_alive():
+                process.kill()
+
+        broken_executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = self._create_executor()
+
+    async def _run_on(self, executor: ProcessPoolExecutor, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(executor, fn, *args),
+            timeout=self.task_timeout
+        )
+
+    async def _run_isolated(self, fn, *args):
+        # one-off single worker pool: if this task is the one that kills its
+        # worker again, no other task goes down with it
+        executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            return await self._run_on(executor, fn, *args)
+        finally:
+            for process in list((executor._processes or {}).values()):
+                if process.is_alive():
+                    process.kill()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_pooled(self, fn, *args):
+        self.start()
+        executor = self.executor
+
+        try:
+            return await self._run_on(executor, fn, *args)
+        except asyncio.TimeoutError:
+            self.logger.error(f"Parsing task timed out after {self.task_timeout}s: {args}")
+            self._restart(broken_executor=executor)
+            raise
+        except BrokenProcessPool:
+            self._restart(broken_executor=executor)
+            raise
+
+    async def run(self, fn, *args):
+        """
+        Runs fn(*args) in a worker process.
+        A task that exceeds task_timeout raises TimeoutError. Its worker can only
+        be stopped by replacing the pool, the other tasks that were on it lose
+        their worker and are resubmitted to the new pool.
+        A task whose pool breaks a second time may be the one crashing it, it
+        runs in an isolated process and raises BrokenProcessPool if that fails too.
+        """
+        for _ in range(2):
+            try:
+                return await self._run_pooled(fn, *args)
+            except BrokenProcessPool:
+                pass
+
+        return await self._run_isolated(fn, *args)
@@ -0,0 +1,113 @@
+class OffsetTextSplitter:
+    """
+    Single-pass replacement for RecursiveCharacterTextSplitter(length_function=len,
+    keep_separator=True, is_separator_regex=False) that gives the same chunks.
+
+    With keep_separator the splits of one level cover the text back to back, so
+    they are kept as a start offset plus a list of lengths instead of substrings,
+    a merged chunk is just text[start:end] and nothing is copied until the caller
+    asks for the chunk text.
+    """
+
+    def __init__(self, chunk_size: int = 100, chunk_overlap: int = 20, separators: list = None):
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk "
+                f"size ({chunk_size}), should be smaller."
+            )
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or ["\n\n", "\n", " ", ""]
+
+    def _split_lengths(self, text: str, start: int, end: int, separator: str):
+        # same pieces as re.split with a kept separator (every piece but the
+        # first starts with the separator), str.split does the scanning in C
+        if separator == "":
+            return [1] * (end - start)
+
+        separator_len = len(separator)
+        pieces = text[start:end].split(separator)
+        return [len(pieces[0])] + [len(piece) + separator_len for piece in pieces[1:]]
+
+    def _add_chunk(self, text: str, start: int, end: int, chunks: list):
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            chunks.append((start, end))
+
+    def _merge_splits(self, text: str, start: int, lengths: list, chunks: list):
+        # TextSplitter._merge_splits with an empty separator, current_doc is the
+        # window lengths[first:i] starting at first_start instead of a list
+        first = 0
+        first_start = start
+        end = start
+        total = 0
+        for i, split_len in enumerate(lengths):
+            if total + split_len > self.chunk_size:
+                if i > first:
+                    self._add_chunk(text, first_start, end, chunks)
+
+                    while total > self.chunk_overlap or (
+                        total + split_len > self.chunk_size and total > 0
+                    ):
+                        total -= lengths[first]
+                        first_start += lengths[first]
+                        first += 1
+
+            total += split_len
+            end += split_len
+
+        if len(lengths) > first:
+            self._add_chunk(text, first_start, end, chunks)
+
+    def _split_offsets(self, text: str, start: int, end: int, separators: list, chunks: list):
+        separator = separators[-1]
+        new_separators = []
+        for i, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                new_separators = separators[i + 1:]
+                break
+
+        good_start = start
+        good_lengths = []
+        split_start = start
+        for split_len in self._split_lengths(text, start, end, separator):
+            split_end = split_start + split_len
+
+            if split_len == 0:
+                # the empty piece in front of a leading separator
+                pass
+            elif split_len < self.chunk_size:
+                if not good_lengths:
+                    good_start = split_start
+                good_lengths.append(split_len)
+            else:
+                if good_lengths:
+                    self._merge_splits(text, good_start, good_lengths, chunks)
+                    good_lengths = []
+
+                if not new_separators:
+                    chunks.append((split_start, split_end))
+                else:
+                    self._split_offsets(text, split_start, split_end, new_separators, chunks)
+
+            split_start = split_end
+
+        if good_lengths:
+            self._merge_splits(text, good_start, good_lengths, chunks)
+
+    def split_offsets(self, text: str):
+        """Returns the (start, end) character offsets of every chunk in text."""
+        chunks = []
+        self._split_offsets(text, 0, len(text), self.separators, chunks)
+        return chunks
+
+    def split_text(self, text: str):
+        return [text[start:end] for start, end in self.split_offsets(text)]
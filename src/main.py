@@ -1,22 +1,18 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from routes import data
-from motor.motor_asyncio import AsyncIOMotorClient
 from helpers.config import get_settings
+from helpers.container import AppContainer
 from routes import base
 
-app = FastAPI()
-
-@app.on_event("startup")
-async def startup_db_client():
-    settings = get_settings()
-    app.mongo_conn = AsyncIOMotorClient(settings.MONGODB_URL)
-    app.db_client = app.mongo_conn[settings.MONGODB_DATABASE]
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    app.mongo_conn.close()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.container = AppContainer(settings=get_settings())
+    await app.container.start()
+    yield
+    await app.container.stop()
 
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(base.base_router)
 app.include_router(data.data_router)
-
@@ -1,7 +1,9 @@
 from .BaseDataModel import BaseDataModel
 from .db_schemes import Asset
 from .enums.DataBaseEnum import DataBaseEnum
+from .IndexManager import IndexManager
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 
 class AssetModel(BaseDataModel):
 
@@ -17,20 +19,12 @@ class AssetModel(BaseDataModel):
         return instance  
       
     async def init_collection(self):
-        all_collections = await self.db_client.list_collection_names()
-        if DataBaseEnum.COLLECTION_ASSET_NAME.value not in all_collections:
-            self.collection = self.db_client[DataBaseEnum.COLLECTION_ASSET_NAME.value]
-        indexes = Asset.get_indexes() 
-        for index in indexes:
-            try:
-                print(f"Creating index: {index['name']}")
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
-                )
-            except Exception as e:
-                print(f"Error creating index {index['name']}: {e}")
+        # startup runs IndexManager.ensure_indexes() for every collection,
+        # this is only for instances created outside the app
+        await IndexManager(db_client=self.db_client).ensure_collection_indexes(
+            collection_name=DataBaseEnum.COLLECTION_ASSET_NAME.value,
+            indexes=Asset.get_indexes()
+        )
 
 
     async def create_asset(self, asset:Asset):
@@ -39,6 +33,36 @@ class AssetModel(BaseDataModel):
 
         return asset
     
+    async def insert_many_assets(self, assets: list):
+        """
+        Returns the assets that were inserted. Assets whose content hash the
+        project already has (a concurrent upload won the unique index) are
+        left out, any other write error is raised.
+        """
+        if len(assets) == 0:
+            return []
+
+        # insert_many sets _id on the documents before sending them, so the ids
+        # are known even when part of the batch fails
+        documents = [asset.model_dump(by_alias=True, exclude_unset=True) for asset in assets]
+        duplicate_indexes = set()
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(write_error["code"] != 11000 for write_error in write_errors):
+                raise
+            duplicate_indexes = {write_error["index"] for write_error in write_errors}
+
+        inserted_assets = []
+        for index, (asset, document) in enumerate(zip(assets, documents)):
+            if index in duplicate_indexes:
+                continue
+            asset.id = document["_id"]
+            inserted_assets.append(asset)
+
+        return inserted_assets
+
     async def get_all_project_assets(self, asset_project_id:str, asset_type:str):
         records = await self.collection.find(
             {"asset_project_id" : ObjectId(asset_project_id) if isinstance(asset_project_id, str) else asset_project_id,
@@ -47,6 +71,69 @@ class AssetModel(BaseDataModel):
     
         return [Asset(**record) for record in records]
 
+    async def get_asset_by_id(self, asset_id: str):
+        record = await self.collection.find_one({
+            "_id": ObjectId(asset_id) if isinstance(asset_id, str) else asset_id
+        })
+        if record is None:
+            return None
+
+        return Asset(**record)
+
+    async def get_asset_by_content_hash(self, asset_project_id: ObjectId, asset_content_hash: str):
+        record = await self.collection.find_one({
+            "asset_project_id": asset_project_id,
+            "asset_content_hash": asset_content_hash
+        })
+        if record is None:
+            return None
+
+        return Asset(**record)
+
+    async def get_assets_by_content_hashes(self, asset_project_id: ObjectId, asset_content_hashes: list):
+        # {content_hash: Asset}, first asset wins when old data holds duplicates
+        if len(asset_content_hashes) == 0:
+            return {}
+
+        records = await self.collection.find({
+            "asset_project_id": asset_project_id,
+            "asset_content_hash": {"$in": asset_content_hashes}
+        }).to_list(length=None)
+
+        assets = {}
+        for record in records:
+            assets.setdefault(record["asset_content_hash"], Asset(**record))
+
+        return assets
+
+    async def set_asset_content_hash(self, asset_id: ObjectId, asset_content_hash: str):
+        await self.collection.update_one(
+            {"_id": asset_id},
+            {"$set": {"asset_content_hash": asset_content_hash}}
+        )
+
+    async def set_asset_metadata(self, asset_id: ObjectId, asset_metadata: dict):
+        await self.collection.update_one(
+            {"_id": asset_id},
+            {"$set": {"asset_metadata": asset_metadata}}
+        )
+
+    async def set_asset_process_state(self, asset_id: ObjectId, asset_process_state: dict):
+        await self.collection.update_one(
+            {"_id": asset_id},
+            {"$set": {"asset_process_state": asset_process_state}}
+        )
+
+    async def clear_process_states(self, asset_project_id: ObjectId, except_asset_ids: list):
+        await self.collection.update_many(
+            {
+                "asset_project_id": asset_project_id,
+                "_id": {"$nin": except_asset_ids},
+                "asset_process_state": {"$ne": None}
+            },
+            {"$set": {"asset_process_state": None}}
+        )
+
     async def get_asset_record(self, asset_project_id: str , asset_name:str):
         record = await self.collection.find_one({
             "asset_project_id": ObjectId(asset_project_id) if isinstance(asset_project_id, str) else asset_project_id,
@@ -1,15 +1,99 @@
 from .BaseDataModel import BaseDataModel
-from .db_schemes import DataChunk
+from .db_schemes import DataChunk, ChunkDictionary
 from .enums.DataBaseEnum import DataBaseEnum
+from .enums.ChunkCodecEnum import ChunkCodecEnum
+from .IndexManager import IndexManager
+from helpers.chunk_codec import ChunkTextCodec
 from bson.objectid import ObjectId
-from pymongo import InsertOne
+from pymongo import InsertOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from fastapi.responses import JSONResponse
+from functools import partial
+import asyncio
+import logging
+
+class ChunkBulkWriter:
+    """
+    Buffers raw chunk documents and writes them with unordered insert_many,
+    keeping up to max_in_flight batches going at once.
+    inserted_count only counts what Mongo reported as inserted.
+    """
+
+    def __init__(self, collection: object, batch_size: int = 1000, max_in_flight: int = 4,
+                 encode_documents: object = None):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.encode_documents = encode_documents # async, applied to every batch before the insert
+
+        self.documents = []
+        self.in_flight = set()
+        self.inserted_count = 0
+
+    async def _insert_batch(self, documents: list):
+        if self.encode_documents is not None:
+            documents = await self.encode_documents(documents)
+
+        try:
+            result = await self.collection.insert_many(documents, ordered=False)
+            self.inserted_count += len(result.inserted_ids)
+        except BulkWriteError as e:
+            # unordered: everything but the failed documents went in
+            self.inserted_count += e.details.get("nInserted", 0)
+            raise
+
+    async def _wait_for_one(self):
+        done, self.in_flight = await asyncio.wait(self.in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+
+    async def add(self, document: dict):
+        self.documents.append(document)
+        if len(self.documents) < self.batch_size:
+            return
+
+        if len(self.in_flight) >= self.max_in_flight:
+            await self._wait_for_one()
+
+        self.in_flight.add(asyncio.ensure_future(self._insert_batch(self.documents)))
+        self.documents = []
+
+    async def flush(self):
+        if len(self.documents) > 0:
+            self.in_flight.add(asyncio.ensure_future(self._insert_batch(self.documents)))
+            self.documents = []
+
+        while self.in_flight:
+            await self._wait_for_one()
+
+        return self.inserted_count
+
+    async def abort(self):
+        self.documents = []
+        for task in self.in_flight:
+            task.cancel()
+        await asyncio.gather(*self.in_flight, return_exceptions=True)
+        self.in_flight = set()
+
 
 class ChunkModel(BaseDataModel):
     
     def __init__(self, db_client):
         super().__init__(db_client)
         self.collection = self.db_client[DataBaseEnum.COLLECTION_CHUNK_NAME.value]
+        self.dictionary_collection = self.db_client[DataBaseEnum.COLLECTION_CHUNK_DICTIONARY_NAME.value]
+        self.logger = logging.getLogger('uvicorn.error')
+
+        # CHUNK_TEXT_CODEC only picks what new chunks are written with,
+        # compressed chunks are decoded whatever it is set to
+        self.text_codec = self.app_settings.CHUNK_TEXT_CODEC
+        self.codec = ChunkTextCodec(
+            level=self.app_settings.CHUNK_TEXT_CODEC_LEVEL,
+            dictionary_size=self.app_settings.CHUNK_TEXT_DICTIONARY_SIZE
+        )
+        # dictionaries never change once written, so they are kept for the process lifetime
+        self.dictionaries = {}
+        self.project_dictionaries = {}
 
     @classmethod
     async def create_instance(cls, db_client: object):
@@ -25,20 +109,117 @@ class ChunkModel(BaseDataModel):
         return instance  
 
     async def init_collection(self):
-        all_collections = await self.db_client.list_collection_names()
-        if DataBaseEnum.COLLECTION_CHUNK_NAME.value not in all_collections:
-            self.collection = self.db_client[DataBaseEnum.COLLECTION_CHUNK_NAME.value]
-        indexes = DataChunk.get_indexes()
-        for index in indexes:
+        # startup runs IndexManager.ensure_indexes() for every collection,
+        # this is only for instances created outside the app
+        index_manager = IndexManager(db_client=self.db_client)
+        await index_manager.ensure_collection_indexes(
+            collection_name=DataBaseEnum.COLLECTION_CHUNK_NAME.value,
+            indexes=DataChunk.get_indexes()
+        )
+        await index_manager.ensure_collection_indexes(
+            collection_name=DataBaseEnum.COLLECTION_CHUNK_DICTIONARY_NAME.value,
+            indexes=ChunkDictionary.get_indexes()
+        )
+
+    async def get_project_dictionary(self, project_id: ObjectId, samples: list = None):
+        """
+        Returns (dictionary_id, dictionary) for the project, training it from samples
+        the first time. Concurrent writers race on the unique dictionary_project_id
+        index and all end up with the first one stored.
+        (None, None) when there is none yet and the samples were too few to train one.
+        """
+        if project_id in self.project_dictionaries:
+            return self.project_dictionaries[project_id]
+
+        record = await self.dictionary_collection.find_one({"dictionary_project_id": project_id})
+        if record is None and samples:
+            dictionary_data = await asyncio.to_thread(self.codec.train_dictionary, samples)
+            if dictionary_data is None:
+                return None, None
+
+            chunk_dictionary = ChunkDictionary(
+                dictionary_project_id=project_id,
+                dictionary_codec=ChunkCodecEnum.ZSTD.value,
+                dictionary_data=dictionary_data,
+                dictionary_samples=len(samples)
+            )
             try:
-                print(f"Creating index: {index['name']}")
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
+                record = await self.dictionary_collection.find_one_and_update(
+                    {"dictionary_project_id": project_id},
+                    {"$setOnInsert": chunk_dictionary.model_dump(by_alias=True, exclude_unset=False, exclude={"id"})},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
                 )
-            except Exception as e:
-                print(f"Error creating index {index['name']}: {e}")
+            except DuplicateKeyError:
+                record = await self.dictionary_collection.find_one({"dictionary_project_id": project_id})
+
+        if record is None:
+            return None, None
+
+        dictionary = await self.load_dictionary(record)
+        self.project_dictionaries[project_id] = (record["_id"], dictionary)
+        return record["_id"], dictionary
+
+    async def load_dictionary(self, record: dict):
+        if record["_id"] not in self.dictionaries:
+            self.dictionaries[record["_id"]] = await asyncio.to_thread(
+                self.codec.load_dictionary, record["dictionary_data"]
+            )
+        return self.dictionaries[record["_id"]]
+
+    async def load_dictionaries(self, dictionary_ids: set):
+        missing_ids = [dictionary_id for dictionary_id in dictionary_ids if dictionary_id not in self.dictionaries]
+        if len(missing_ids) == 0:
+            return
+
+        async for record in self.dictionary_collection.find({"_id": {"$in": missing_ids}}):
+            await self.load_dictionary(record)
+
+    def _encode_documents(self, documents: list, dictionary_id: ObjectId, dictionary: object):
+        compressor = self.codec.get_compressor(dictionary)
+        for document in documents:
+            document["chunk_text_z"] = self.codec.compress(compressor, document.pop("chunk_text"))
+            document["chunk_codec"] = ChunkCodecEnum.ZSTD.value
+            document["chunk_dictionary_id"] = dictionary_id
+
+        return documents
+
+    async def encode_documents(self, documents: list, project_id: ObjectId):
+        """
+        Swaps chunk_text for chunk_text_z on raw chunk documents, in place.
+        The first batch written for a project trains its dictionary.
+        """
+        dictionary_id, dictionary = await self.get_project_dictionary(
+            project_id=project_id,
+            samples=[document["chunk_text"] for document in documents]
+        )
+        return await asyncio.to_thread(self._encode_documents, documents, dictionary_id, dictionary)
+
+    async def decode_records(self, records: list):
+        """
+        Puts chunk_text back on compressed chunk records, plain ones are left as they are,
+        so a project can hold both while it is being migrated.
+        """
+        encoded_records = [record for record in records if "chunk_text_z" in record]
+        if len(encoded_records) == 0:
+            return records
+
+        await self.load_dictionaries({
+            record["chunk_dictionary_id"] for record in encoded_records
+            if record.get("chunk_dictionary_id") is not None
+        })
+
+        decompressors = {}
+        for record in encoded_records:
+            dictionary_id = record.get("chunk_dictionary_id")
+            if dictionary_id not in decompressors:
+                decompressors[dictionary_id] = self.codec.get_decompressor(self.dictionaries.get(dictionary_id))
+
+            record["chunk_text"] = self.codec.decompress(decompressors[dictionary_id], record.pop("chunk_text_z"))
+            record.pop("chunk_codec", None)
+            record.pop("chunk_dictionary_id", None)
+
+        return records
 
 
     async def create_chunk(self, chunk:DataChunk):
@@ -46,18 +227,48 @@ class ChunkModel(BaseDataModel):
         chunk._id = result.inserted_id
         return chunk
     
-    async def get_chunk(self, chunk_id:str):
-        result = self.collection.find_one({
+    async def get_chunk(self, chunk_id:str, with_metadata: bool = True):
+        result = await self.collection.find_one({
             "_id":ObjectId(chunk_id)
         })
 
         if result == None :
             return None
         
-        return DataChunk(**result)
+        await self.decode_records(records=[result])
+        chunk = DataChunk(**result)
+        if with_metadata:
+            await self.assemble_metadata(chunks=[chunk])
+
+        return chunk
+
+    async def assemble_metadata(self, chunks: list):
+        """
+        Puts the full loader metadata back on chunk_metadata: one query for the
+        asset-level metadata of all the chunks, then page and per-chunk keys on top.
+        """
+        asset_ids = list({chunk.chunk_asset_id for chunk in chunks})
+        if len(asset_ids) == 0:
+            return chunks
+
+        asset_collection = self.db_client[DataBaseEnum.COLLECTION_ASSET_NAME.value]
+        asset_metadata = {
+            record["_id"]: record.get("asset_metadata")
+            async for record in asset_collection.find(
+                {"_id": {"$in": asset_ids}},
+                projection={"asset_metadata": 1}
+            )
+        }
+
+        for chunk in chunks:
+            chunk.chunk_metadata = chunk.get_full_metadata(
+                asset_metadata=asset_metadata.get(chunk.chunk_asset_id)
+            )
+
+        return chunks
     
     async def insert_many_chunks(self, chunks:list , batch_size : int=100):
-        
+        no_inserted = 0
         for i in range(0,len(chunks), batch_size):
             batch = chunks[i:i+batch_size]
 
@@ -66,18 +277,108 @@ class ChunkModel(BaseDataModel):
                 for chunk in batch
             ]
 
-            await self.collection.bulk_write(operations)
+            result = await self.collection.bulk_write(operations)
+            no_inserted += result.inserted_count
+
+        return no_inserted
 
-        return len(chunks)
+    def get_bulk_writer(self, batch_size: int = 1000, max_in_flight: int = 4, project_id: ObjectId = None):
+        encode_documents = None
+        if self.text_codec == ChunkCodecEnum.ZSTD.value and project_id is not None:
+            encode_documents = partial(self.encode_documents, project_id=project_id)
+
+        return ChunkBulkWriter(
+            collection=self.collection,
+            batch_size=batch_size,
+            max_in_flight=max_in_flight,
+            encode_documents=encode_documents
+        )
     
     async def delete_chunks_by_project_id(self, project_id: ObjectId):
-        print("project_id is : ",project_id) #depugging step 
+        self.logger.debug(f"Deleting the chunks of project {project_id}")
         result = await self.collection.delete_many({
             "chunk_project_id": project_id
         })
 
         return result.deleted_count
 
+    def get_generation_filter(self, generation: int):
+        # chunks written before generations existed have no chunk_generation, they are generation 0
+        if generation == 0:
+            return {"$in": [0, None]}
+        return generation
+
+    async def delete_generation_chunks(self, project_id: ObjectId, generation: int = None,
+                                       older_than: int = None, batch_size: int = 1000,
+                                       pause: float = 0.1):
+        """
+        Deletes the chunks of one generation, or of every generation older than older_than,
+        batch_size documents at a time with a pause in between so the
+        garbage collection of a big project doesn't hammer Mongo.
+        """
+        query = {"chunk_project_id": project_id}
+        if generation is not None:
+            query["chunk_generation"] = self.get_generation_filter(generation)
+        else:
+            query["$or"] = [
+                {"chunk_generation": {"$lt": older_than}},
+                {"chunk_generation": {"$exists": False}}
+            ]
+
+        return await self.delete_chunks_in_batches(query=query, batch_size=batch_size, pause=pause)
+
+    async def delete_stale_generation_chunks(self, project_id: ObjectId, active_generation: int,
+                                             latest_generation: int, batch_size: int = 1000,
+                                             pause: float = 0.1, except_generations: list = None):
+        """
+        Deletes the chunks of every generation up to latest_generation but the
+        active one: replaced ones and resets that never finished. Generations
+        allocated after latest_generation was read, and except_generations
+        (resets still being built), are left alone.
+        """
+        stale_filters = [
+            {"chunk_generation": {"$lt": active_generation}},
+            {"chunk_generation": {"$gt": active_generation, "$lte": latest_generation}}
+        ]
+        if active_generation > 0:
+            stale_filters.append({"chunk_generation": {"$exists": False}})
+
+        query = {"chunk_project_id": project_id, "$or": stale_filters}
+        if except_generations:
+            query["chunk_generation"] = {"$nin": except_generations}
+
+        return await self.delete_chunks_in_batches(
+            query=query,
+            batch_size=batch_size,
+            pause=pause
+        )
+
+    async def delete_chunks_in_batches(self, query: dict, batch_size: int = 1000, pause: float = 0.1):
+        deleted_count = 0
+        while True:
+            batch_ids = [
+                record["_id"]
+                async for record in self.collection.find(query, projection={"_id": 1}).limit(batch_size)
+            ]
+            if len(batch_ids) == 0:
+                break
+
+            result = await self.collection.delete_many({"_id": {"$in": batch_ids}})
+            deleted_count += result.deleted_count
+
+            await asyncio.sleep(pause)
+
+        return deleted_count
+
+    async def delete_chunks_by_asset_id(self, asset_id: ObjectId, generation: int = None):
+        query = {"chunk_asset_id": asset_id}
+        if generation is not None:
+            query["chunk_generation"] = self.get_generation_filter(generation)
+
+        result = await self.collection.delete_many(query)
+
+        return result.deleted_count
+
     
 
     
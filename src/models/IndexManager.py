@@ -0,0 +1,72 @@
+from .db_schemes import Project, Asset, DataChunk, ProcessJob, UploadSession, ChunkDictionary
+from .enums.DataBaseEnum import DataBaseEnum
+import logging
+
+class IndexManager:
+    """
+    Creates the indexes declared by the db schemes (get_indexes) once, at startup.
+    Existing indexes are read with a single index_information() per collection
+    and only the missing ones are created, so a warm start costs one round trip
+    per collection and requests never touch index management.
+    """
+
+    def __init__(self, db_client: object):
+        self.db_client = db_client
+        self.logger = logging.getLogger('uvicorn.error')
+
+    def get_declared_indexes(self):
+        return {
+            DataBaseEnum.COLLECTION_PROJECT_NAME.value: Project.get_indexes(),
+            DataBaseEnum.COLLECTION_ASSET_NAME.value: Asset.get_indexes(),
+            DataBaseEnum.COLLECTION_CHUNK_NAME.value: DataChunk.get_indexes(),
+            DataBaseEnum.COLLECTION_PROCESS_JOB_NAME.value: ProcessJob.get_indexes(),
+            DataBaseEnum.COLLECTION_UPLOAD_SESSION_NAME.value: UploadSession.get_indexes(),
+            DataBaseEnum.COLLECTION_CHUNK_DICTIONARY_NAME.value: ChunkDictionary.get_indexes(),
+        }
+
+    async def ensure_collection_indexes(self, collection_name: str, indexes: list):
+        collection = self.db_client[collection_name]
+        existing_indexes = await collection.index_information()
+
+        created = []
+        for index in indexes:
+            existing_index = existing_indexes.get(index["name"])
+
+            if existing_index is not None:
+                if list(existing_index["key"]) != list(index["key"]) or \
+                        existing_index.get("unique", False) != index["unique"] or \
+                        existing_index.get("partialFilterExpression") != index.get("partialFilterExpression"):
+                    # never drop on our own, a changed definition needs a manual migration
+                    self.logger.warning(
+                        f"Index {index['name']} on {collection_name} differs from its declaration"
+                    )
+                continue
+
+            options = {}
+            if index.get("partialFilterExpression") is not None:
+                options["partialFilterExpression"] = index["partialFilterExpression"]
+
+            try:
+                await collection.create_index(
+                    index["key"],
+                    name=index["name"],
+                    unique=index["unique"],
+                    **options
+                )
+                created.append(index["name"])
+            except Exception as e:
+                self.logger.error(f"Error creating index {index['name']} on {collection_name}: {e}")
+
+        return created
+
+    async def ensure_indexes(self):
+        created = {}
+        for collection_name, indexes in self.get_declared_indexes().items():
+            created[collection_name] = await self.ensure_collection_indexes(
+                collection_name=collection_name,
+                indexes=indexes
+            )
+            if created[collection_name]:
+                self.logger.info(f"Created indexes on {collection_name}: {created[collection_name]}")
+
+        return created
@@ -0,0 +1,179 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemes import ProcessJob
+from .enums.DataBaseEnum import DataBaseEnum
+from .IndexManager import IndexManager
+from .enums.ProcessJobEnum import ProcessJobEnum
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from datetime import datetime, timezone, timedelta
+
+class ProcessJobModel(BaseDataModel):
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client)
+        self.collection = self.db_client[DataBaseEnum.COLLECTION_PROCESS_JOB_NAME.value]
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        instance = cls(db_client)
+        await instance.init_collection()
+        return instance
+
+    async def init_collection(self):
+        # startup runs IndexManager.ensure_indexes() for every collection,
+        # this is only for instances created outside the app
+        await IndexManager(db_client=self.db_client).ensure_collection_indexes(
+            collection_name=DataBaseEnum.COLLECTION_PROCESS_JOB_NAME.value,
+            indexes=ProcessJob.get_indexes()
+        )
+
+    def _to_object_id(self, job_id):
+        if isinstance(job_id, ObjectId):
+            return job_id
+        if not ObjectId.is_valid(job_id):
+            return None
+        return ObjectId(job_id)
+
+    async def create_job(self, job: ProcessJob):
+        result = await self.collection.insert_one(job.model_dump(by_alias=True, exclude_unset=False, exclude={"id"}))
+        job.id = result.inserted_id
+        return job
+
+    async def get_job(self, job_id: str):
+        job_id = self._to_object_id(job_id)
+        if job_id is None:
+            return None
+
+        record = await self.collection.find_one({"_id": job_id})
+        if record is None:
+            return None
+
+        return ProcessJob(**record)
+
+    def _claimable_query(self, owner: str, now: datetime):
+        # unclaimed, ours already, or left behind by an instance that stopped renewing
+        return {"$or": [
+            {"job_owner": None},
+            {"job_owner": owner},
+            {"job_lease_until": {"$lt": now}}
+        ]}
+
+    async def get_unclaimed_jobs(self, job_statuses: list):
+        now = datetime.now(timezone.utc)
+        cursor = self.collection.find({
+            "job_status": {"$in": job_statuses},
+            "$or": [
+                {"job_owner": None},
+                {"job_lease_until": {"$lt": now}}
+            ]
+        }).sort("job_created_at", 1)
+
+        return [ProcessJob(**record) async for record in cursor]
+
+    async def get_claimed_jobs(self, job_statuses: list):
+        # jobs some instance is still renewing the claim of
+        cursor = self.collection.find({
+            "job_status": {"$in": job_statuses},
+            "job_owner": {"$ne": None},
+            "job_lease_until": {"$gte": datetime.now(timezone.utc)}
+        })
+
+        return [ProcessJob(**record) async for record in cursor]
+
+    async def claim_job(self, job_id: ObjectId, owner: str, lease_seconds: int):
+        """
+        Takes the job for owner if nobody else holds a live claim on it,
+        returns the claimed job or None.
+        """
+        now = datetime.now(timezone.utc)
+        record = await self.collection.find_one_and_update(
+            {
+                "_id": job_id,
+                "job_status": {"$in": [ProcessJobEnum.QUEUED.value, ProcessJobEnum.RUNNING.value]},
+                **self._claimable_query(owner=owner, now=now)
+            },
+            {"$set": {
+                "job_owner": owner,
+                "job_lease_until": now + timedelta(seconds=lease_seconds)
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        if record is None:
+            return None
+
+        return ProcessJob(**record)
+
+    async def renew_claims(self, owner: str, lease_seconds: int):
+        # one heartbeat for every job the instance holds, queued or running
+        await self.collection.update_many(
+            {
+                "job_owner": owner,
+                "job_status": {"$in": [ProcessJobEnum.QUEUED.value, ProcessJobEnum.RUNNING.value]}
+            },
+            {"$set": {"job_lease_until": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)}}
+        )
+
+    async def release_claims(self, owner: str, job_id: ObjectId = None):
+        query = {"job_owner": owner}
+        if job_id is not None:
+            query["_id"] = job_id
+
+        await self.collection.update_many(
+            query,
+            {"$set": {"job_owner": None, "job_lease_until": None}}
+        )
+
+    async def set_job_status(self, job_id: ObjectId, job_status: str, job_error: str = None):
+        update = {
+            "job_status": job_status,
+            "job_updated_at": datetime.now(timezone.utc)
+        }
+        if job_error is not None:
+            update["job_error"] = job_error
+
+        await self.collection.update_one({"_id": job_id}, {"$set": update})
+
+    async def set_job_generation(self, job_id: ObjectId, job_generation: int):
+        await self.collection.update_one(
+            {"_id": job_id},
+            {"$set": {"job_generation": job_generation, "job_updated_at": datetime.now(timezone.utc)}}
+        )
+
+    async def set_asset_progress(self, job_id: ObjectId, asset_id: ObjectId, **progress):
+        # positional operator updates only the matching entry of job_assets
+        update = {f"job_assets.$.{key}": value for key, value in progress.items()}
+        update["job_updated_at"] = datetime.now(timezone.utc)
+
+        await self.collection.update_one(
+            {"_id": job_id, "job_assets.asset_id": asset_id},
+            {"$set": update}
+        )
+
+    async def request_cancel(self, job_id: str):
+        """
+        Only jobs that are still queued or running can be cancelled,
+        the worker picks up the flag between assets and between chunk batches.
+        """
+        job_id = self._to_object_id(job_id)
+        if job_id is None:
+            return None
+
+        record = await self.collection.find_one_and_update(
+            {
+                "_id": job_id,
+                "job_status": {"$in": [ProcessJobEnum.QUEUED.value, ProcessJobEnum.RUNNING.value]}
+            },
+            {"$set": {"job_cancel_requested": True, "job_updated_at": datetime.now(timezone.utc)}},
+            return_document=ReturnDocument.AFTER
+        )
+        if record is None:
+            return None
+
+        return ProcessJob(**record)
+
+    async def is_cancel_requested(self, job_id: ObjectId):
+        record = await self.collection.find_one(
+            {"_id": job_id},
+            projection={"job_cancel_requested": 1}
+        )
+        return bool(record and record.get("job_cancel_requested"))
@@ -1,12 +1,25 @@
 from .BaseDataModel import BaseDataModel
 from .db_schemes import Project
+from bson.objectid import ObjectId
 from .enums.DataBaseEnum import DataBaseEnum
+from .IndexManager import IndexManager
+from helpers.ttl_cache import TTLCache
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timezone, timedelta
 
 class ProjectModel(BaseDataModel):
 
     def __init__(self, db_client: object):
         super().__init__(db_client)
         self.collection = self.db_client[DataBaseEnum.COLLECTION_PROJECT_NAME.value]
+        # project_id -> Project, only used to resolve the project document on
+        # hot request paths. generation pointers change over time, code that
+        # needs them must read through get_project_by_id()
+        self.cache = TTLCache(
+            max_size=self.app_settings.PROJECT_CACHE_SIZE,
+            ttl=self.app_settings.PROJECT_CACHE_TTL
+        )
 
     @classmethod
     async def create_instance(cls, db_client: object):
@@ -24,20 +37,12 @@ class ProjectModel(BaseDataModel):
       
 
     async def init_collection(self):
-        all_collections = await self.db_client.list_collection_names()
-        if DataBaseEnum.COLLECTION_PROJECT_NAME.value not in all_collections:
-            self.collection = self.db_client[DataBaseEnum.COLLECTION_PROJECT_NAME.value]
-        indexes = Project.get_indexes()
-        for index in indexes:
-            try:
-                print(f"Creating index: {index['name']}")
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
-                )
-            except Exception as e:
-                print(f"Error creating index {index['name']}: {e}")
+        # startup runs IndexManager.ensure_indexes() for every collection,
+        # this is only for instances created outside the app
+        await IndexManager(db_client=self.db_client).ensure_collection_indexes(
+            collection_name=DataBaseEnum.COLLECTION_PROJECT_NAME.value,
+            indexes=Project.get_indexes()
+        )
 
     async def create_project(self, project : Project):
         # Insert into MongoDB
@@ -50,22 +55,102 @@ class ProjectModel(BaseDataModel):
         return project
     
     async def get_project_or_create_one(self, project_id: str):
-        print("Looking for project_id:", project_id)  # Debugging step
+        project = self.cache.get(project_id)
+        if project is not None:
+            return project
+
+        # validates project_id before anything reaches the database
+        defaults = Project(project_id=project_id).model_dump(by_alias=True, exclude={"id"})
+
+        # one round trip for both cases, and the unique project_id index makes
+        # concurrent first uploads to the same project end up on one document
+        try:
+            record = await self.collection.find_one_and_update(
+                {"project_id": project_id},
+                {"$setOnInsert": defaults},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # two upserts raced on the insert, the other one won
+            record = await self.collection.find_one({"project_id": project_id})
+
+        project = Project(**record)
+        self.cache.set(project_id, project)
+        return project
+
+    async def get_project_by_id(self, project_id: ObjectId):
         record = await self.collection.find_one({
-            "project_id": project_id
+            "_id": project_id
         })
-        print("Record found:", record)  # Debugging step
-
         if record is None:
-            # create new project
-            project = Project(project_id=project_id)
-            print("Created new Project object:", project.model_dump(by_alias=True))  # Debugging step
-            project = await self.create_project(project=project)
-            print("Inserted Project into DB:", project.model_dump(by_alias=True))  # Debugging step
-            return project
-        
+            return None
+
         return Project(**record)
 
+    async def allocate_generation(self, project_id: ObjectId):
+        # $inc is atomic, two resets of the same project never share a generation
+        record = await self.collection.find_one_and_update(
+            {"_id": project_id},
+            {"$inc": {"project_latest_generation": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        return record["project_latest_generation"]
+
+    async def activate_generation(self, project_id: ObjectId, generation: int):
+        # only move forward, a slow older reset must not replace a newer one
+        result = await self.collection.update_one(
+            {
+                "_id": project_id,
+                "$or": [
+                    {"project_active_generation": {"$lt": generation}},
+                    {"project_active_generation": {"$exists": False}}
+                ]
+            },
+            {"$set": {"project_active_generation": generation}}
+        )
+        return result.modified_count == 1
+
+    async def claim_project_jobs(self, project_id: ObjectId, owner: str, lease_seconds: int):
+        # free, ours already, or held by an instance that stopped renewing
+        now = datetime.now(timezone.utc)
+        result = await self.collection.update_one(
+            {
+                "_id": project_id,
+                "$or": [
+                    {"project_job_owner": None},
+                    {"project_job_owner": owner},
+                    {"project_job_lease_until": {"$lt": now}}
+                ]
+            },
+            {"$set": {
+                "project_job_owner": owner,
+                "project_job_lease_until": now + timedelta(seconds=lease_seconds)
+            }}
+        )
+        return result.matched_count == 1
+
+    async def renew_project_job_claims(self, owner: str, lease_seconds: int):
+        await self.collection.update_many(
+            {"project_job_owner": owner},
+            {"$set": {"project_job_lease_until": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)}}
+        )
+
+    async def release_project_job_claims(self, owner: str, project_id: ObjectId = None):
+        query = {"project_job_owner": owner}
+        if project_id is not None:
+            query["_id"] = project_id
+
+        await self.collection.update_many(
+            query,
+            {"$set": {"project_job_owner": None, "project_job_lease_until": None}}
+        )
+
+    async def get_projects_with_generations(self):
+        # projects that were reset at least once, only they can have stale generations
+        cursor = self.collection.find({"project_latest_generation": {"$gt": 0}})
+        return [Project(**record) async for record in cursor]
+
     async def get_all_projects(self, page: int = 1, page_size: int = 10):
         # page represents the current page you want to retrieve.
         # page_size represents the number of documents you want per page.
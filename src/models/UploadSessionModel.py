@@ -0,0 +1,174 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemes import UploadSession
+from .enums.DataBaseEnum import DataBaseEnum
+from .enums.UploadSessionEnum import UploadSessionEnum
+from .IndexManager import IndexManager
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from datetime import datetime, timezone, timedelta
+import uuid
+
+class UploadSessionModel(BaseDataModel):
+
+    # a PATCH that died without releasing its lease blocks the session this long,
+    # a live one renews it every lease_seconds / 3
+    lease_seconds = 60
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client)
+        self.collection = self.db_client[DataBaseEnum.COLLECTION_UPLOAD_SESSION_NAME.value]
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        instance = cls(db_client)
+        await instance.init_collection()
+        return instance
+
+    async def init_collection(self):
+        # startup runs IndexManager.ensure_indexes() for every collection,
+        # this is only for instances created outside the app
+        await IndexManager(db_client=self.db_client).ensure_collection_indexes(
+            collection_name=DataBaseEnum.COLLECTION_UPLOAD_SESSION_NAME.value,
+            indexes=UploadSession.get_indexes()
+        )
+
+    def _to_object_id(self, session_id):
+        if isinstance(session_id, ObjectId):
+            return session_id
+        if not ObjectId.is_valid(session_id):
+            return None
+        return ObjectId(session_id)
+
+    async def create_session(self, session: UploadSession):
+        result = await self.collection.insert_one(session.model_dump(by_alias=True, exclude={"id"}))
+        session.id = result.inserted_id
+        return session
+
+    async def get_session(self, session_id: str, session_project_id: ObjectId):
+        session_id = self._to_object_id(session_id)
+        if session_id is None:
+            return None
+
+        record = await self.collection.find_one({
+            "_id": session_id,
+            "session_project_id": session_project_id
+        })
+        if record is None:
+            return None
+
+        return UploadSession(**record)
+
+    async def acquire_lease(self, session_id: ObjectId, session_offset: int):
+        """
+        Claims the session for one PATCH starting at session_offset. Fails when the
+        offset moved, the session is finalized or another PATCH is still appending.
+        The returned session carries the session_lease_token the holder renews
+        and releases the lease with.
+        """
+        now = datetime.now(timezone.utc)
+        record = await self.collection.find_one_and_update(
+            {
+                "_id": session_id,
+                "session_status": UploadSessionEnum.OPEN.value,
+                "session_offset": session_offset,
+                "$or": [
+                    {"session_lease_until": None},
+                    {"session_lease_until": {"$lt": now}}
+                ]
+            },
+            {"$set": {
+                "session_lease_until": now + timedelta(seconds=self.lease_seconds),
+                "session_lease_token": uuid.uuid4().hex,
+                "session_updated_at": now
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        if record is None:
+            return None
+
+        return UploadSession(**record)
+
+    async def renew_lease(self, session_id: ObjectId, session_lease_token: str):
+        # misses once the lease expired and another request took the session
+        now = datetime.now(timezone.utc)
+        result = await self.collection.update_one(
+            {"_id": session_id, "session_lease_token": session_lease_token},
+            {"$set": {
+                "session_lease_until": now + timedelta(seconds=self.lease_seconds),
+                "session_updated_at": now
+            }}
+        )
+        return result.matched_count == 1
+
+    async def release_lease(self, session_id: ObjectId, session_lease_token: str, session_offset: int):
+        result = await self.collection.update_one(
+            {"_id": session_id, "session_lease_token": session_lease_token},
+            {"$set": {
+                "session_offset": session_offset,
+                "session_lease_until": None,
+                "session_lease_token": None,
+                "session_updated_at": datetime.now(timezone.utc)
+            }}
+        )
+        return result.matched_count == 1
+
+    async def set_content_hash(self, session_id: ObjectId, session_content_hash: str):
+        await self.collection.update_one(
+            {"_id": session_id},
+            {"$set": {
+                "session_content_hash": session_content_hash,
+                "session_updated_at": datetime.now(timezone.utc)
+            }}
+        )
+
+    def _expired_query(self, expired_before: datetime):
+        # idle since expired_before and not claimed by a PATCH or finalize
+        return {
+            "session_updated_at": {"$lt": expired_before},
+            "$or": [
+                {"session_lease_until": None},
+                {"session_lease_until": {"$lt": datetime.now(timezone.utc)}}
+            ]
+        }
+
+    async def get_expired_sessions(self, expired_before: datetime):
+        records = await self.collection.find(
+            self._expired_query(expired_before=expired_before)
+        ).to_list(length=None)
+
+        return [UploadSession(**record) for record in records]
+
+    async def delete_expired_session(self, session_id: ObjectId, expired_before: datetime):
+        # re-checked here, the session may have been resumed since it was listed
+        result = await self.collection.delete_one({
+            "_id": session_id,
+            **self._expired_query(expired_before=expired_before)
+        })
+        return result.deleted_count == 1
+
+    async def get_session_temp_names(self, session_temp_names: list):
+        if len(session_temp_names) == 0:
+            return set()
+
+        records = await self.collection.find(
+            {"session_temp_name": {"$in": session_temp_names}},
+            {"session_temp_name": 1}
+        ).to_list(length=None)
+
+        return {record["session_temp_name"] for record in records}
+
+    async def finalize_session(self, session_id: ObjectId, session_lease_token: str,
+                               session_asset_id: ObjectId):
+        # a finalize that lost its lease leaves the session to the one that took it,
+        # both store the same content and get the same asset
+        result = await self.collection.update_one(
+            {"_id": session_id, "session_lease_token": session_lease_token},
+            {"$set": {
+                "session_status": UploadSessionEnum.FINALIZED.value,
+                "session_asset_id": session_asset_id,
+                "session_lease_until": None,
+                "session_lease_token": None,
+                "session_updated_at": datetime.now(timezone.utc)
+            }}
+        )
+        return result.matched_count == 1
@@ -1,2 +1,6 @@
 from .enums.ResponseEnum import ResponseSignal
 from .enums.ProcessingEnum import ProcessingEnum
+from .enums.ProcessJobEnum import ProcessJobEnum
+from .enums.SplitterEnum import SplitterEnum
+from .enums.UploadSessionEnum import UploadSessionEnum
+from .enums.ChunkCodecEnum import ChunkCodecEnum
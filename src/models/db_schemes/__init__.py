@@ -1,3 +1,6 @@
 from .project import Project
 from .data_chunk import DataChunk 
-from .asset import Asset
\ No newline at end of file
+from .asset import Asset
+from .process_job import ProcessJob
+from .upload_session import UploadSession
+from .chunk_dictionary import ChunkDictionary
\ No newline at end of file
@@ -10,6 +10,14 @@ class Asset(BaseModel):
     asset_name : str = Field(..., min_length=1)
     asset_size : int = Field(ge=0, default=None)
     asset_config : dict = Field(default=None)
+    asset_content_hash : Optional[str] = Field(default=None) # sha256 of the stored file
+    # path of the content-addressed blob under assets/blobs, None for assets
+    # uploaded before blobs, which live in assets/files/<project_id>/<asset_name>
+    asset_blob : Optional[str] = Field(default=None)
+    # content hash + chunking params of the chunks currently stored for this asset
+    asset_process_state : Optional[dict] = Field(default=None)
+    # document-level loader metadata, stored once here instead of on every chunk
+    asset_metadata : Optional[dict] = Field(default=None)
     asset_pushed_at: datetime = Field(default=datetime.now(timezone.utc))
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
@@ -30,5 +38,18 @@ class Asset(BaseModel):
                 ],
                 "name": "asset_project_id_name_index_1",
                 "unique": True
+            },
+            {
+                "key":[
+                    ("asset_project_id", 1),
+                    ("asset_content_hash", 1)
+                ],
+                # unique so concurrent uploads of the same bytes cannot both
+                # create an asset, partial so assets without a hash are left out
+                "name": "asset_project_id_content_hash_unique_index_1",
+                "unique": True,
+                "partialFilterExpression": {
+                    "asset_content_hash": {"$type": "string"}
+                }
             }
         ]
\ No newline at end of file
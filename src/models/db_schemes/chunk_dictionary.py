@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional
+from bson.objectid import ObjectId
+from datetime import datetime, timezone
+
+class ChunkDictionary(BaseModel):
+    # compression dictionary shared by the compressed chunks of one project
+    id: Optional[ObjectId] = Field(None, alias="_id")
+    dictionary_project_id: ObjectId
+    dictionary_codec: str = Field(..., min_length=1)
+    dictionary_data: bytes
+    dictionary_samples: int = Field(default=0, ge=0) # chunks it was trained on
+    dictionary_created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            {
+                "key":[
+                    ("dictionary_project_id", 1)
+                ],
+                "name": "dictionary_project_id_index_1",
+                "unique": True
+            }
+        ]
@@ -5,14 +5,68 @@ from bson.objectid import ObjectId
 class DataChunk(BaseModel):
     id: Optional[ObjectId] = Field(None, alias="_id")
     chunk_text: str = Field(..., min_length=1)
-    chunk_metadata : dict
+    # only what differs from the asset's asset_metadata, see get_full_metadata();
+    # chunks written before that carry the whole loader metadata
+    chunk_metadata : dict = Field(default_factory=dict)
+    chunk_page: Optional[int] = None # "page" of the loader metadata, pdf only
+    chunk_start: Optional[int] = None # offset of the chunk in its page's text, in the file for .txt
+    chunk_end: Optional[int] = None
     chunk_order : int = Field(..., gt=0)
     chunk_project_id: ObjectId
     chunk_asset_id: ObjectId
+    chunk_generation: int = Field(default=0, ge=0) # see Project.project_active_generation
+    chunk_embedding: Optional[list] = None # set when processing embeds chunks (PROCESS_EMBED_CHUNKS)
 
     class Config:
         arbitrary_types_allowed = True
 
+    @classmethod
+    def get_document_metadata(cls, chunk_metadata: dict):
+        # the part of a page's loader metadata shared by the whole document
+        return {key: value for key, value in chunk_metadata.items() if key != "page"}
+
+    @classmethod
+    def build_document(cls, chunk_text: str, chunk_metadata: dict, chunk_order: int,
+                       chunk_project_id: ObjectId, chunk_asset_id: ObjectId,
+                       chunk_generation: int = 0, asset_metadata: dict = None,
+                       chunk_start: int = None):
+        """
+        Mongo-ready dict with the same fields as DataChunk(...).model_dump(by_alias=True, exclude_unset=True),
+        for the bulk write path where validating a model per chunk costs more than the write.
+        With asset_metadata, chunk_metadata is split into chunk_page and the keys that differ from it.
+        """
+        document = {
+            "chunk_text": chunk_text,
+            "chunk_metadata": chunk_metadata,
+            "chunk_order": chunk_order,
+            "chunk_project_id": chunk_project_id,
+            "chunk_asset_id": chunk_asset_id,
+            "chunk_generation": chunk_generation
+        }
+
+        if asset_metadata is not None:
+            document["chunk_metadata"] = {
+                key: value for key, value in chunk_metadata.items()
+                if key != "page" and (key not in asset_metadata or asset_metadata[key] != value)
+            }
+            if chunk_metadata.get("page") is not None:
+                document["chunk_page"] = chunk_metadata["page"]
+
+        if chunk_start is not None:
+            document["chunk_start"] = chunk_start
+            document["chunk_end"] = chunk_start + len(chunk_text)
+
+        return document
+
+    def get_full_metadata(self, asset_metadata: dict = None):
+        # the loader metadata the chunk was built from
+        full_metadata = dict(asset_metadata) if asset_metadata else {}
+        if self.chunk_page is not None:
+            full_metadata["page"] = self.chunk_page
+        full_metadata.update(self.chunk_metadata)
+
+        return full_metadata
+
     @classmethod
     def get_indexes(cls):
         return [
@@ -22,5 +76,20 @@ class DataChunk(BaseModel):
                 ],
                 "name": "chunk_project_id_index_1",
                 "unique": False
+            },
+            {
+                "key":[
+                    ("chunk_asset_id", 1)
+                ],
+                "name": "chunk_asset_id_index_1",
+                "unique": False
+            },
+            {
+                "key":[
+                    ("chunk_project_id", 1),
+                    ("chunk_generation", 1)
+                ],
+                "name": "chunk_project_id_generation_index_1",
+                "unique": False
             }
         ]
\ No newline at end of file
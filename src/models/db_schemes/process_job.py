@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional
+from bson.objectid import ObjectId
+from datetime import datetime, timezone
+
+class ProcessJob(BaseModel):
+    id: Optional[ObjectId] = Field(None, alias="_id")
+    job_project_id: ObjectId
+    job_status: str = Field(..., min_length=1)
+    job_config: dict = Field(default_factory=dict)
+    # one entry per asset: {asset_id, asset_name, status, inserted_chunks, error}
+    job_assets: list = Field(default_factory=list)
+    job_cancel_requested: bool = False
+    job_error: Optional[str] = None
+    # the queue instance running or holding the job, it renews job_lease_until
+    # while it does, a job whose lease ran out is taken over by another instance
+    job_owner: Optional[str] = None
+    job_lease_until: Optional[datetime] = None
+    job_generation: Optional[int] = None # the generation a reset builds, set once allocated
+    job_created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    job_updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            {
+                "key":[
+                    ("job_project_id", 1)
+                ],
+                "name": "job_project_id_index_1",
+                "unique": False
+            },
+            {
+                "key":[
+                    ("job_status", 1)
+                ],
+                "name": "job_status_index_1",
+                "unique": False
+            }
+        ]
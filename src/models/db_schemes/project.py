@@ -1,10 +1,19 @@
 from pydantic import BaseModel, Field, field_validator 
 from typing import Optional
 from bson.objectid import ObjectId
+from datetime import datetime
 
 class Project(BaseModel):
     id: Optional[ObjectId] = Field(None, alias="_id")
     project_id: str = Field(..., min_length=1)
+    # readers only see chunks of the active generation, a reset builds
+    # project_latest_generation next to it and flips the pointer when done
+    project_active_generation: int = Field(default=0, ge=0)
+    project_latest_generation: int = Field(default=0, ge=0)
+    # the queue instance running the project's process jobs, jobs of one
+    # project run one after the other across instances, renewed like a job claim
+    project_job_owner: Optional[str] = None
+    project_job_lease_until: Optional[datetime] = None
 
 
     @field_validator('project_id')
@@ -22,9 +31,9 @@ class Project(BaseModel):
     def get_indexes(cls):
         return [
             {
-                "key": [("chunk_project_id", 1)],
-                "name": "chunk_project_id_index_1",
-                "unique": False
+                "key": [("project_id", 1)],
+                "name": "project_id_index_1",
+                "unique": True
             }
         ]
 
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional
+from bson.objectid import ObjectId
+from datetime import datetime, timezone
+
+class UploadSession(BaseModel):
+    id: Optional[ObjectId] = Field(None, alias="_id")
+    session_project_id: ObjectId
+    session_file_name: str = Field(..., min_length=1)
+    session_content_type: str = Field(..., min_length=1)
+    session_file_size: int = Field(..., gt=0) # declared when the session is created
+    session_offset: int = Field(default=0, ge=0) # bytes received so far
+    session_temp_name: str = Field(..., min_length=1) # file under assets/blobs/tmp
+    session_status: str = Field(..., min_length=1)
+    # set while a PATCH is appending, so two requests never write the same range,
+    # the token tells the holder's renewals and release from a later holder's
+    session_lease_until: Optional[datetime] = None
+    session_lease_token: Optional[str] = None
+    # sha256 recorded by finalize before the temp file becomes a blob, so a
+    # retried finalize finds the blob once the temp file is gone
+    session_content_hash: Optional[str] = None
+    session_asset_id: Optional[ObjectId] = None # set by finalize
+    session_created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    session_updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            {
+                "key":[
+                    ("session_project_id", 1)
+                ],
+                "name": "session_project_id_index_1",
+                "unique": False
+            },
+            {
+                "key":[
+                    ("session_updated_at", 1)
+                ],
+                "name": "session_updated_at_index_1",
+                "unique": False
+            }
+        ]
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class ChunkCodecEnum(Enum):
+    PLAIN = "plain"
+    ZSTD = "zstd" # zstd with a dictionary trained per project
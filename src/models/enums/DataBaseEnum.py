@@ -4,4 +4,7 @@ class DataBaseEnum(Enum):
 
     COLLECTION_PROJECT_NAME = "projects"
     COLLECTION_CHUNK_NAME = "chunks"
-    COLLECTION_ASSET_NAME = "assets"
\ No newline at end of file
+    COLLECTION_ASSET_NAME = "assets"
+    COLLECTION_PROCESS_JOB_NAME = "process_jobs"
+    COLLECTION_UPLOAD_SESSION_NAME = "upload_sessions"
+    COLLECTION_CHUNK_DICTIONARY_NAME = "chunk_dictionaries"
\ No newline at end of file
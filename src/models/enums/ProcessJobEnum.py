@@ -0,0 +1,10 @@
+from enum import Enum
+
+class ProcessJobEnum(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    PARTIALLY_COMPLETED = "partially_completed" # some assets failed, the rest are in
+    CANCELLED = "cancelled"
+    SKIPPED = "skipped" # asset already chunked with the same content and params
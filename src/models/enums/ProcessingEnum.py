@@ -2,4 +2,5 @@ from enum import Enum
 
 class ProcessingEnum(Enum):
     TXT = ".txt"
-    PDF = ".pdf"
\ No newline at end of file
+    PDF = ".pdf"
+    MD = ".md"
\ No newline at end of file
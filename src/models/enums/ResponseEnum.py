@@ -6,8 +6,29 @@ class ResponseSignal(Enum):
     FILE_SIZE_EXCEEDED = "file_size_excedded"
     FILE_UPLOAD_FAILED = "file_upload_failed"
     FILE_UPLOAD_SUCCESS = "file_upload_success"
+    FILE_ALREADY_UPLOADED = "file_already_uploaded"
+    FILE_CONTENT_NOT_MATCHING_TYPE = "file_content_not_matching_type"
+    FILE_ARCHIVE_NOT_READABLE = "file_archive_not_readable"
+    FILE_BATCH_TOO_MANY_FILES = "file_batch_too_many_files"
+    FILE_BATCH_UPLOAD_DONE = "file_batch_upload_done"
+    UPLOAD_SESSION_CREATED = "upload_session_created"
+    UPLOAD_SESSION_FOUND = "upload_session_found"
+    UPLOAD_SESSION_NOT_FOUND = "upload_session_not_found"
+    UPLOAD_SESSION_RANGE_SAVED = "upload_session_range_saved"
+    UPLOAD_SESSION_OFFSET_MISMATCH = "upload_session_offset_mismatch"
+    UPLOAD_SESSION_BUSY = "upload_session_busy"
+    UPLOAD_SESSION_INCOMPLETE = "upload_session_incomplete"
+    UPLOAD_SESSION_ALREADY_FINALIZED = "upload_session_already_finalized"
     PROCESSING_FAILED = "process_failed"
     PROCESSING_SUCCEDED = "process_succeded"
     PROCESSING_FILE_NOT_FOUND = "file_not_found"
     PROCESSING_PROJECT_NOT_FOUND = "project_not_found"
-    FILE_ID_ERROR = "no_file_found_with_this_id"
\ No newline at end of file
+    FILE_ID_ERROR = "no_file_found_with_this_id"
+    PROCESSING_JOB_QUEUED = "process_job_queued"
+    PROCESSING_JOB_FOUND = "process_job_found"
+    PROCESSING_JOB_NOT_FOUND = "process_job_not_found"
+    PROCESSING_JOB_CANCELLED = "process_job_cancelled"
+    PROCESSING_JOB_NOT_CANCELLABLE = "process_job_not_cancellable"
+    PROCESSING_QUEUE_FULL = "process_queue_full"
+    PROCESSING_SPLITTER_NOT_SUPPORTED = "splitter_not_supported"
+    LLM_STATS_FOUND = "llm_stats_found"
\ No newline at end of file
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class SplitterEnum(Enum):
+    LANGCHAIN = "langchain"
+    NATIVE = "native"
\ No newline at end of file
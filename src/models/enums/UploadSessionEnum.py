@@ -0,0 +1,5 @@
+from enum import Enum
+
+class UploadSessionEnum(Enum):
+    OPEN = "open"
+    FINALIZED = "finalized"
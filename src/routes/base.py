@@ -1,6 +1,9 @@
 from fastapi import FastAPI, APIRouter, Depends
 import os
 from helpers.config import get_settings, Settings
+from helpers.container import AppContainer
+from routes.dependencies import get_container
+from models import ResponseSignal
 
 base_router = APIRouter(
     prefix="/api/v1",
@@ -16,4 +19,13 @@ async def welcome(app_settings: Settings=Depends(get_settings)):
     return{
         "app_name":app_name,
         "app_version":app_version
+    }
+
+@base_router.get("/llm/stats")
+async def llm_stats(container: AppContainer = Depends(get_container)):
+    # provider queue depths, wait times and retries, embedding cache hit rates
+    return {
+        "signal": ResponseSignal.LLM_STATS_FOUND.value,
+        "scheduler": container.llm_scheduler.stats() if container.llm_scheduler else None,
+        "embedding_cache": container.embedding_cache.stats() if container.embedding_cache else None
     }
\ No newline at end of file
@@ -1,19 +1,32 @@
-from fastapi import FastAPI, APIRouter, Depends, UploadFile, status, Request
+from fastapi import FastAPI, APIRouter, Depends, UploadFile, Header, Form, status, Request
+from starlette.requests import ClientDisconnect
 from fastapi.responses import JSONResponse
 import os
 from helpers.config import get_settings, Settings
-from controllers import DataController, ProjectController, ErrorController, ProcessController  # Import correctly
+from controllers import DataController, ProjectController, ErrorController, BlobController, ArchiveController  # Import correctly
 import aiofiles
+import hashlib
+import asyncio
 from models import ResponseSignal
 import logging
-from routes.schemes import ProcessRequest
+from routes.schemes import ProcessRequest, UploadSessionRequest
 from models.ProjectModel import ProjectModel
-from models.ChunkModel import ChunkModel
 from models.AssetModel import AssetModel
-from models.db_schemes.data_chunk import DataChunk
-from models.db_schemes import Asset
+from models.ProcessJobModel import ProcessJobModel
+from models.UploadSessionModel import UploadSessionModel
+from models.db_schemes import Asset, ProcessJob, UploadSession
 from models.enums.AssetTypeEnum import AssetTypeEnum
+from models import ProcessJobEnum, SplitterEnum, UploadSessionEnum
+from tasks import ProcessJobQueue
+from routes.dependencies import (
+    get_app_settings, get_data_controller, get_blob_controller, get_archive_controller,
+    get_project_model, get_asset_model, get_process_job_model, get_process_queue,
+    get_upload_session_model
+)
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from typing import List
+from contextlib import asynccontextmanager
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -23,14 +36,17 @@ data_router = APIRouter(
 )
 
 @data_router.post("/upload/{project_id}")
-async def upload_data(request:Request ,project_id: str, file: UploadFile, app_settings: Settings = Depends(get_settings)):
-    
-    project_model =await ProjectModel.create_instance(db_client=request.app.db_client)
+async def upload_data(request:Request ,project_id: str, file: UploadFile,
+                      app_settings: Settings = Depends(get_app_settings),
+                      data_controller: DataController = Depends(get_data_controller),
+                      blob_controller: BlobController = Depends(get_blob_controller),
+                      project_model: ProjectModel = Depends(get_project_model),
+                      asset_model: AssetModel = Depends(get_asset_model)):
 
     project = await project_model.get_project_or_create_one(project_id=project_id)
     
     # Validate the file properties
-    is_valid, result_signal = DataController().validate_uploaded_file(file)
+    is_valid, result_signal = data_controller.validate_uploaded_file(file)
     
     if not is_valid:
         return JSONResponse(
@@ -40,18 +56,20 @@ async def upload_data(request:Request ,project_id: str, file: UploadFile, app_se
             }
         )
 
-    project_dir_path = ProjectController().get_project_path(project_id)
-    file_path, file_id = DataController().generate_unique_filepath(
-        orig_file_name=file.filename,
-        project_id=project_id
-    )
+    file_id = data_controller.generate_file_id(orig_file_name=file.filename)
 
+    # the name of the stored file is the hash of its content, which is only
+    # known once the last chunk arrived
+    temp_path = blob_controller.get_temp_path()
     try:
-        async with aiofiles.open(file_path, "wb") as f:
-            while chunk := await file.read(size=app_settings.FILE_DEFAULT_CHUNK_SIZE):
-                await f.write(chunk)
+        content_hash = await save_upload_file(
+            file=file,
+            temp_path=temp_path,
+            read_size=app_settings.FILE_DEFAULT_CHUNK_SIZE
+        )
     except Exception as e:
         logger.error(f"Error while uploading file: {e}")
+        blob_controller.discard_temp(temp_path)
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={
@@ -59,32 +77,740 @@ async def upload_data(request:Request ,project_id: str, file: UploadFile, app_se
             }
         )
 
+    asset_record, is_duplicate = await store_file_asset(
+        project=project,
+        file_id=file_id,
+        temp_path=temp_path,
+        content_hash=content_hash,
+        asset_model=asset_model,
+        blob_controller=blob_controller
+    )
+
+    return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "signal":ResponseSignal.FILE_ALREADY_UPLOADED.value if is_duplicate
+                    else ResponseSignal.FILE_UPLOAD_SUCCESS.value,
+                "file_id":str(asset_record.id),
+                "project_id": str(project.id)
+            }
+        )
+
+async def save_upload_file(file: UploadFile, temp_path: str, read_size: int):
+    # streams the upload to temp_path, returns the sha256 of its content
+    file_hash = hashlib.sha256()
+    async with aiofiles.open(temp_path, "wb") as f:
+        while chunk := await file.read(size=read_size):
+            file_hash.update(chunk)
+            await f.write(chunk)
+
+    return file_hash.hexdigest()
+
+@data_router.post("/upload/{project_id}/batch")
+async def upload_batch(request: Request, project_id: str, files: List[UploadFile],
+                       process: int = Form(0), # 1 = enqueue processing of the new assets
+                       chunk_size: int = Form(100),
+                       overlap_size: int = Form(20),
+                       incremental: int = Form(0),
+                       splitter: str = Form(SplitterEnum.NATIVE.value),
+                       app_settings: Settings = Depends(get_app_settings),
+                       data_controller: DataController = Depends(get_data_controller),
+                       blob_controller: BlobController = Depends(get_blob_controller),
+                       archive_controller: ArchiveController = Depends(get_archive_controller),
+                       project_model: ProjectModel = Depends(get_project_model),
+                       asset_model: AssetModel = Depends(get_asset_model),
+                       process_job_model: ProcessJobModel = Depends(get_process_job_model),
+                       process_queue: ProcessJobQueue = Depends(get_process_queue)):
+    """
+    Uploads many files in one request, plain files and zip/tar archives mixed.
+    Every file or archive member is validated with the single-upload rules and
+    reported on its own; the new assets are written with one insert_many.
+    """
+    if process == 1 and splitter not in [e.value for e in SplitterEnum]:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal":ResponseSignal.PROCESSING_SPLITTER_NOT_SUPPORTED.value
+            }
+        )
+
+    if len(files) > app_settings.FILE_BATCH_MAX_FILES:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.FILE_BATCH_TOO_MANY_FILES.value
+            }
+        )
+
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    semaphore = asyncio.Semaphore(app_settings.FILE_BATCH_CONCURRENCY)
+
+    # each stage returns the entries of its file or archive members:
+    # {"file_name", "signal", "file_id", and while staged "temp_path", "content_hash"}
+    async def stage_file(file: UploadFile):
+        batch_file = {"file_name": file.filename, "signal": None, "file_id": None}
+
+        is_valid, result_signal = data_controller.validate_uploaded_file(file)
+        if not is_valid:
+            batch_file["signal"] = result_signal
+            return [batch_file]
+
+        temp_path = blob_controller.get_temp_path()
+        async with semaphore:
+            try:
+                batch_file["content_hash"] = await save_upload_file(
+                    file=file,
+                    temp_path=temp_path,
+                    read_size=app_settings.FILE_DEFAULT_CHUNK_SIZE
+                )
+                batch_file["temp_path"] = temp_path
+            except Exception as e:
+                logger.error(f"Error while uploading file {file.filename}: {e}")
+                blob_controller.discard_temp(temp_path)
+                batch_file["signal"] = ResponseSignal.FILE_UPLOAD_FAILED.value
+
+        return [batch_file]
+
+    async def stage_archive(file: UploadFile, archive_type: str):
+        archive_file = {"file_name": file.filename, "signal": None, "file_id": None}
+
+        if file.size > app_settings.FILE_BATCH_MAX_SIZE * data_controller.size_scale:
+            archive_file["signal"] = ResponseSignal.FILE_SIZE_EXCEEDED.value
+            return [archive_file]
+
+        archive_path = blob_controller.get_temp_path()
+        try:
+            async with semaphore:
+                await save_upload_file(
+                    file=file,
+                    temp_path=archive_path,
+                    read_size=app_settings.FILE_DEFAULT_CHUNK_SIZE
+                )
+            members = await asyncio.to_thread(
+                archive_controller.list_members,
+                archive_path=archive_path,
+                archive_type=archive_type
+            )
+        except Exception as e:
+            logger.error(f"Error while reading archive {file.filename}: {e}")
+            blob_controller.discard_temp(archive_path)
+            archive_file["signal"] = ResponseSignal.FILE_ARCHIVE_NOT_READABLE.value
+            return [archive_file]
+
+        if len(members) > app_settings.FILE_BATCH_MAX_FILES:
+            blob_controller.discard_temp(archive_path)
+            archive_file["signal"] = ResponseSignal.FILE_BATCH_TOO_MANY_FILES.value
+            return [archive_file]
+
+        archive_files = []
+        member_files = {}
+        # declared sizes, already checked against FILE_MAX_SIZE, a member
+        # that turns out longer is rejected while it is copied
+        member_sizes = {}
+        member_content_types = {}
+        for member_name, member_size in members:
+            member_file = {"file_name": f"{file.filename}/{member_name}", "signal": None, "file_id": None}
+            archive_files.append(member_file)
+
+            content_type = archive_controller.get_member_content_type(member_name)
+            is_valid, result_signal = data_controller.validate_file_properties(
+                content_type=content_type,
+                file_size=member_size,
+                max_size=app_settings.FILE_MAX_SIZE
+            )
+            if not is_valid:
+                member_file["signal"] = result_signal
+                continue
+
+            member_file["temp_path"] = blob_controller.get_temp_path()
+            member_files[member_name] = member_file
+            member_sizes[member_name] = member_size
+            member_content_types[member_name] = content_type
+
+        async def extract_zip_member(member_name: str, member_file: dict):
+            async with semaphore:
+                return await asyncio.to_thread(
+                    archive_controller.extract_zip_member,
+                    archive_path=archive_path,
+                    member_name=member_name,
+                    temp_path=member_file["temp_path"],
+                    max_size=member_sizes[member_name]
+                )
+
+        try:
+            if archive_type == "zip":
+                extracted = await asyncio.gather(*[
+                    extract_zip_member(member_name, member_file)
+                    for member_name, member_file in member_files.items()
+                ], return_exceptions=True)
+                extracted = dict(zip(member_files.keys(), extracted))
+            else:
+                async with semaphore:
+                    extracted = await asyncio.to_thread(
+                        archive_controller.extract_tar_members,
+                        archive_path=archive_path,
+                        temp_paths={name: member_file["temp_path"] for name, member_file in member_files.items()},
+                        max_sizes=member_sizes
+                    )
+        finally:
+            blob_controller.discard_temp(archive_path)
+
+        for member_name, member_file in member_files.items():
+            result = extracted.get(member_name)
+            if result is None or isinstance(result, BaseException):
+                logger.error(f"Error while extracting {member_file['file_name']}: {result}")
+                blob_controller.discard_temp(member_file.pop("temp_path"))
+                member_file["signal"] = ResponseSignal.FILE_UPLOAD_FAILED.value
+                continue
+
+            # the content type only comes from the member name, check the bytes
+            # look like it the way a finalized resumable upload is checked
+            is_valid, result_signal = await asyncio.to_thread(
+                data_controller.validate_file_content,
+                file_path=member_file["temp_path"],
+                content_type=member_content_types[member_name]
+            )
+            if not is_valid:
+                blob_controller.discard_temp(member_file.pop("temp_path"))
+                member_file["signal"] = result_signal
+                continue
+
+            member_file["content_hash"], _ = result
+
+        return archive_files
+
+    stage_tasks = []
+    for file in files:
+        archive_type = archive_controller.get_archive_type(file.filename or "")
+        if archive_type is None:
+            stage_tasks.append(stage_file(file))
+        else:
+            stage_tasks.append(stage_archive(file, archive_type))
+
+    batch_files = [
+        batch_file
+        for staged in await asyncio.gather(*stage_tasks)
+        for batch_file in staged
+    ]
+
+    staged_files = [batch_file for batch_file in batch_files if "content_hash" in batch_file]
+    if len(staged_files) > app_settings.FILE_BATCH_MAX_FILES:
+        for batch_file in staged_files:
+            blob_controller.discard_temp(batch_file.pop("temp_path"))
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.FILE_BATCH_TOO_MANY_FILES.value
+            }
+        )
+
+    # one lookup for the whole batch instead of one per file
+    existing_assets = await asset_model.get_assets_by_content_hashes(
+        asset_project_id=project.id,
+        asset_content_hashes=list({batch_file["content_hash"] for batch_file in staged_files})
+    )
+
+    new_assets = {}
+    for batch_file in staged_files:
+        content_hash = batch_file["content_hash"]
+        if content_hash in existing_assets or content_hash in new_assets:
+            # already in the project, or earlier in this same batch
+            blob_controller.discard_temp(batch_file["temp_path"])
+            batch_file["signal"] = ResponseSignal.FILE_ALREADY_UPLOADED.value
+            continue
+
+        file_id = data_controller.generate_file_id(orig_file_name=os.path.basename(batch_file["file_name"]))
+        file_size = os.path.getsize(batch_file["temp_path"])
+        blob_name, _ = blob_controller.commit_blob(
+            temp_path=batch_file["temp_path"],
+            content_hash=content_hash,
+            file_extention=os.path.splitext(file_id)[-1]
+        )
+        new_assets[content_hash] = Asset(
+            asset_project_id=project.id,
+            asset_type=AssetTypeEnum.FILE.value,
+            asset_name=file_id,
+            asset_size=file_size,
+            asset_content_hash=content_hash,
+            asset_blob=blob_name
+        )
+        batch_file["signal"] = ResponseSignal.FILE_UPLOAD_SUCCESS.value
+
+    asset_records = await asset_model.insert_many_assets(assets=list(new_assets.values()))
+    inserted_hashes = {asset_record.asset_content_hash for asset_record in asset_records}
+    lost_hashes = [content_hash for content_hash in new_assets if content_hash not in inserted_hashes]
+    if len(lost_hashes) > 0:
+        # a concurrent upload stored the same bytes first, report its assets
+        existing_assets.update(await asset_model.get_assets_by_content_hashes(
+            asset_project_id=project.id,
+            asset_content_hashes=lost_hashes
+        ))
+        for batch_file in staged_files:
+            if batch_file["content_hash"] in lost_hashes:
+                batch_file["signal"] = ResponseSignal.FILE_ALREADY_UPLOADED.value
+
+    existing_assets.update({
+        asset_record.asset_content_hash: asset_record
+        for asset_record in asset_records
+    })
+
+    for batch_file in staged_files:
+        batch_file["file_id"] = str(existing_assets[batch_file.pop("content_hash")].id)
+        batch_file.pop("temp_path", None)
+
+    content = {
+        "signal": ResponseSignal.FILE_BATCH_UPLOAD_DONE.value,
+        "project_id": str(project.id),
+        "uploaded_files": len(asset_records),
+        "duplicate_files": sum(
+            1 for batch_file in batch_files
+            if batch_file["signal"] == ResponseSignal.FILE_ALREADY_UPLOADED.value
+        ),
+        "failed_files": sum(
+            1 for batch_file in batch_files
+            if batch_file["file_id"] is None
+        ),
+        "files": batch_files
+    }
+
+    if process == 1 and len(asset_records) > 0:
+        process_status_code, content["process"] = await enqueue_process_job(
+            project=project,
+            project_id=project_id,
+            process_request=ProcessRequest(
+                chunk_size=chunk_size,
+                overlap_size=overlap_size,
+                incremental=incremental,
+                splitter=splitter
+            ),
+            asset_records=asset_records,
+            process_job_model=process_job_model,
+            process_queue=process_queue
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=content
+    )
+
+async def store_file_asset(project, file_id: str, temp_path: str, content_hash: str,
+                           asset_model: AssetModel, blob_controller: BlobController):
+    """
+    Turns a fully received upload into an asset. Returns (asset, is_duplicate),
+    is_duplicate means the project already had these bytes and that asset is returned.
+    """
+    # same bytes already in this project: hand back the existing asset, its
+    # chunks (and anything built from them) stay valid
+    asset_record = await asset_model.get_asset_by_content_hash(
+        asset_project_id=project.id,
+        asset_content_hash=content_hash
+    )
+    if asset_record is not None:
+        blob_controller.discard_temp(temp_path)
+        return asset_record, True
+
+    # another project may already have uploaded it, then nothing new is stored
+    blob_name, _ = blob_controller.commit_blob(
+        temp_path=temp_path,
+        content_hash=content_hash,
+        file_extention=os.path.splitext(file_id)[-1]
+    )
+    file_size = os.path.getsize(blob_controller.get_blob_path(blob_name=blob_name))
+
     #store the assetes in the database
-    asset_model = await AssetModel.create_instance(db_client=request.app.db_client)
     asset_resource = Asset(
         asset_project_id=project.id,
         asset_type=AssetTypeEnum.FILE.value,
         asset_name=file_id,
-        asset_size= os.path.getsize(file_path)
+        asset_size=file_size,
+        asset_content_hash=content_hash,
+        asset_blob=blob_name
+    )
+
+    try:
+        asset_record= await asset_model.create_asset(asset=asset_resource)
+    except DuplicateKeyError:
+        # a concurrent upload of the same bytes created the asset first, the
+        # blob is content-addressed and shared so it stays where it is
+        asset_record = await asset_model.get_asset_by_content_hash(
+            asset_project_id=project.id,
+            asset_content_hash=content_hash
+        )
+        if asset_record is None:
+            raise
+        return asset_record, True
+
+    return asset_record, False
+
+def serialize_upload_session(upload_session: UploadSession):
+    return {
+        "session_id": str(upload_session.id),
+        "file_name": upload_session.session_file_name,
+        "content_type": upload_session.session_content_type,
+        "file_size": upload_session.session_file_size,
+        "offset": upload_session.session_offset,
+        "status": upload_session.session_status,
+        "file_id": str(upload_session.session_asset_id) if upload_session.session_asset_id else None
+    }
+
+@asynccontextmanager
+async def hold_upload_lease(upload_session_model: UploadSessionModel, upload_session: UploadSession):
+    """
+    Renews the session's lease every lease_seconds / 3 while the block runs.
+    The yielded event is set once a renewal misses: the lease expired and
+    another request took the session, the block must stop writing.
+    """
+    lease_lost = asyncio.Event()
+
+    async def renew():
+        while True:
+            await asyncio.sleep(upload_session_model.lease_seconds / 3)
+            try:
+                is_renewed = await upload_session_model.renew_lease(
+                    session_id=upload_session.id,
+                    session_lease_token=upload_session.session_lease_token
+                )
+            except Exception as e:
+                logger.error(f"Error while renewing the lease of upload session {upload_session.id}: {e}")
+                continue
+
+            if not is_renewed:
+                logger.warning(f"Upload session {upload_session.id} lease was taken over")
+                lease_lost.set()
+                return
+
+    renew_task = asyncio.create_task(renew())
+    try:
+        yield lease_lost
+    finally:
+        renew_task.cancel()
+        await asyncio.gather(renew_task, return_exceptions=True)
+
+@data_router.post("/upload/{project_id}/sessions")
+async def create_upload_session(request: Request, project_id: str, session_request: UploadSessionRequest,
+                                app_settings: Settings = Depends(get_app_settings),
+                                data_controller: DataController = Depends(get_data_controller),
+                                blob_controller: BlobController = Depends(get_blob_controller),
+                                project_model: ProjectModel = Depends(get_project_model),
+                                upload_session_model: UploadSessionModel = Depends(get_upload_session_model)):
+    """
+    Resumable upload: create a session, PATCH byte ranges in order with an
+    Upload-Offset header, then finalize. A dropped PATCH resumes from the
+    offset returned by GET on the session.
+    """
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    is_valid, result_signal = data_controller.validate_file_properties(
+        content_type=session_request.content_type,
+        file_size=session_request.file_size,
+        max_size=app_settings.FILE_RESUMABLE_MAX_SIZE
+    )
+    if not is_valid:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal":result_signal
+            }
+        )
+
+    temp_name = blob_controller.get_temp_name()
+    async with aiofiles.open(blob_controller.get_temp_path(temp_name=temp_name), "wb"):
+        pass
+
+    upload_session = await upload_session_model.create_session(
+        session=UploadSession(
+            session_project_id=project.id,
+            session_file_name=session_request.file_name,
+            session_content_type=session_request.content_type,
+            session_file_size=session_request.file_size,
+            session_temp_name=temp_name,
+            session_status=UploadSessionEnum.OPEN.value
+        )
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            "signal": ResponseSignal.UPLOAD_SESSION_CREATED.value,
+            **serialize_upload_session(upload_session)
+        }
+    )
+
+@data_router.get("/upload/{project_id}/sessions/{session_id}")
+async def get_upload_session(request: Request, project_id: str, session_id: str,
+                             project_model: ProjectModel = Depends(get_project_model),
+                             upload_session_model: UploadSessionModel = Depends(get_upload_session_model)):
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+    upload_session = await upload_session_model.get_session(
+        session_id=session_id,
+        session_project_id=project.id
+    )
+    if upload_session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
+            }
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "signal": ResponseSignal.UPLOAD_SESSION_FOUND.value,
+            **serialize_upload_session(upload_session)
+        }
+    )
+
+@data_router.patch("/upload/{project_id}/sessions/{session_id}")
+async def upload_session_range(request: Request, project_id: str, session_id: str,
+                               upload_offset: int = Header(),
+                               blob_controller: BlobController = Depends(get_blob_controller),
+                               project_model: ProjectModel = Depends(get_project_model),
+                               upload_session_model: UploadSessionModel = Depends(get_upload_session_model)):
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+    upload_session = await upload_session_model.get_session(
+        session_id=session_id,
+        session_project_id=project.id
+    )
+    if upload_session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
+            }
+        )
+
+    # ranges are appended in order, the client resends from the offset we have
+    if upload_offset != upload_session.session_offset:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_OFFSET_MISMATCH.value,
+                **serialize_upload_session(upload_session)
+            }
+        )
+
+    upload_session = await upload_session_model.acquire_lease(
+        session_id=upload_session.id,
+        session_offset=upload_offset
     )
+    if upload_session is None:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_BUSY.value
+            }
+        )
 
-    asset_record= await asset_model.create_asset(asset=asset_resource)
+    temp_path = blob_controller.get_temp_path(temp_name=upload_session.session_temp_name)
+    session_offset = upload_session.session_offset
+    is_too_large = False
+    is_lease_lost = False
+    try:
+        async with (
+            hold_upload_lease(upload_session_model, upload_session) as lease_lost,
+            aiofiles.open(temp_path, "r+b") as f
+        ):
+            # bytes past the recorded offset belong to a PATCH that died
+            # before it could record them, they are sent again
+            await f.truncate(session_offset)
+            await f.seek(session_offset)
+            async for chunk in request.stream():
+                # the request that took the session over owns the temp file now
+                if lease_lost.is_set():
+                    is_lease_lost = True
+                    break
+                if session_offset + len(chunk) > upload_session.session_file_size:
+                    is_too_large = True
+                    break
+                await f.write(chunk)
+                session_offset += len(chunk)
+    except ClientDisconnect:
+        logger.warning(f"Upload session {upload_session.id} disconnected at offset {session_offset}")
+    finally:
+        # what made it to disk counts, even when the connection dropped,
+        # unless another request holds the session by now
+        if not is_lease_lost:
+            is_lease_lost = not await upload_session_model.release_lease(
+                session_id=upload_session.id,
+                session_lease_token=upload_session.session_lease_token,
+                session_offset=session_offset
+            )
+
+    if is_lease_lost:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_BUSY.value
+            }
+        )
+
+    upload_session.session_offset = session_offset
+    if is_too_large:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={
+                "signal": ResponseSignal.FILE_SIZE_EXCEEDED.value,
+                **serialize_upload_session(upload_session)
+            }
+        )
 
     return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "signal": ResponseSignal.UPLOAD_SESSION_RANGE_SAVED.value,
+            **serialize_upload_session(upload_session)
+        }
+    )
+
+@data_router.post("/upload/{project_id}/sessions/{session_id}/finalize")
+async def finalize_upload_session(request: Request, project_id: str, session_id: str,
+                                  data_controller: DataController = Depends(get_data_controller),
+                                  blob_controller: BlobController = Depends(get_blob_controller),
+                                  project_model: ProjectModel = Depends(get_project_model),
+                                  asset_model: AssetModel = Depends(get_asset_model),
+                                  upload_session_model: UploadSessionModel = Depends(get_upload_session_model)):
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+    upload_session = await upload_session_model.get_session(
+        session_id=session_id,
+        session_project_id=project.id
+    )
+    if upload_session is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_NOT_FOUND.value
+            }
+        )
+
+    # a retried finalize gets the asset the first one created
+    if upload_session.session_status == UploadSessionEnum.FINALIZED.value:
+        return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
-                "signal":ResponseSignal.FILE_UPLOAD_SUCCESS.value,
-                "file_id":str(asset_record.id),
+                "signal": ResponseSignal.UPLOAD_SESSION_ALREADY_FINALIZED.value,
+                "file_id": str(upload_session.session_asset_id),
                 "project_id": str(project.id)
             }
         )
 
+    if upload_session.session_offset != upload_session.session_file_size:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_INCOMPLETE.value,
+                **serialize_upload_session(upload_session)
+            }
+        )
+
+    # the lease keeps a concurrent finalize from creating a second asset
+    upload_session = await upload_session_model.acquire_lease(
+        session_id=upload_session.id,
+        session_offset=upload_session.session_file_size
+    )
+    if upload_session is None:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "signal": ResponseSignal.UPLOAD_SESSION_BUSY.value
+            }
+        )
+
+    temp_path = blob_controller.get_temp_path(temp_name=upload_session.session_temp_name)
+    # set when an earlier finalize got as far as committing the blob, the
+    # temp file may be gone, commit_blob finds the blob instead
+    content_hash = upload_session.session_content_hash
+    try:
+        # validating and hashing a large file outlasts a single lease
+        async with hold_upload_lease(upload_session_model, upload_session) as lease_lost:
+            if content_hash is None:
+                is_valid, result_signal = await asyncio.to_thread(
+                    data_controller.validate_file_content,
+                    file_path=temp_path,
+                    content_type=upload_session.session_content_type
+                )
+                if not is_valid:
+                    await upload_session_model.release_lease(
+                        session_id=upload_session.id,
+                        session_lease_token=upload_session.session_lease_token,
+                        session_offset=upload_session.session_offset
+                    )
+                    return JSONResponse(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        content={
+                            "signal": result_signal
+                        }
+                    )
+
+                content_hash = await asyncio.to_thread(blob_controller.get_file_hash, temp_path)
+                await upload_session_model.set_content_hash(
+                    session_id=upload_session.id,
+                    session_content_hash=content_hash
+                )
+
+            # a finalize that took the session over commits the temp file itself
+            if lease_lost.is_set():
+                return JSONResponse(
+                    status_code=status.HTTP_409_CONFLICT,
+                    content={
+                        "signal": ResponseSignal.UPLOAD_SESSION_BUSY.value
+                    }
+                )
+
+            asset_record, is_duplicate = await store_file_asset(
+                project=project,
+                file_id=data_controller.generate_file_id(orig_file_name=upload_session.session_file_name),
+                temp_path=temp_path,
+                content_hash=content_hash,
+                asset_model=asset_model,
+                blob_controller=blob_controller
+            )
+    except Exception as e:
+        logger.error(f"Error while finalizing upload session {upload_session.id}: {e}")
+        await upload_session_model.release_lease(
+            session_id=upload_session.id,
+            session_lease_token=upload_session.session_lease_token,
+            session_offset=upload_session.session_offset
+        )
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.FILE_UPLOAD_FAILED.value
+            }
+        )
+
+    await upload_session_model.finalize_session(
+        session_id=upload_session.id,
+        session_lease_token=upload_session.session_lease_token,
+        session_asset_id=asset_record.id
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "signal": ResponseSignal.FILE_ALREADY_UPLOADED.value if is_duplicate
+                else ResponseSignal.FILE_UPLOAD_SUCCESS.value,
+            "file_id": str(asset_record.id),
+            "project_id": str(project.id)
+        }
+    )
+
 @data_router.post("/process/{project_id}")
-async def process_endpoint(request : Request,project_id: str, process_request:ProcessRequest):
+async def process_endpoint(request : Request,project_id: str, process_request:ProcessRequest,
+                           project_model: ProjectModel = Depends(get_project_model),
+                           asset_model: AssetModel = Depends(get_asset_model),
+                           process_job_model: ProcessJobModel = Depends(get_process_job_model),
+                           process_queue: ProcessJobQueue = Depends(get_process_queue)):
     # file_id = process_request.file_id
-    chunk_size = process_request.chunk_size
-    overlab_size = process_request.overlap_size
-    do_reset = process_request.do_reset
+
+    if process_request.splitter not in [e.value for e in SplitterEnum]:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal":ResponseSignal.PROCESSING_SPLITTER_NOT_SUPPORTED.value
+            }
+        )
 
     """
     #check if the project not in assets
@@ -107,18 +833,9 @@ async def process_endpoint(request : Request,project_id: str, process_request:Pr
     #     )    
     
     
-    project_model = await ProjectModel.create_instance(
-        db_client=request.app.db_client
-    )
-    chunk_model = await ChunkModel.create_instance(
-        db_client=request.app.db_client
-    )
-
     project = await project_model.get_project_or_create_one(
         project_id=project_id
     )
-    asset_model = await AssetModel.create_instance(
-        db_client=request.app.db_client)
 
 
     project_file_ids = {}
@@ -136,7 +853,7 @@ async def process_endpoint(request : Request,project_id: str, process_request:Pr
         )
 
         project_file_ids ={
-            asset_record.id : asset_record.asset_name
+            asset_record.id : asset_record
         }
 
     else:
@@ -147,7 +864,7 @@ async def process_endpoint(request : Request,project_id: str, process_request:Pr
 
         
         project_file_ids = {
-            record.id : record.asset_name
+            record.id : record
             for record in project_files
         }
         
@@ -159,59 +876,145 @@ async def process_endpoint(request : Request,project_id: str, process_request:Pr
             }
         )
     
-    #start Processing
-    processcontroller = ProcessController(project_id= project_id)
+    status_code, content = await enqueue_process_job(
+        project=project,
+        project_id=project_id,
+        process_request=process_request,
+        asset_records=list(project_file_ids.values()),
+        process_job_model=process_job_model,
+        process_queue=process_queue
+    )
+
+    return JSONResponse(
+        status_code=status_code,
+        content=content
+    )
 
+async def enqueue_process_job(project, project_id: str, process_request: ProcessRequest, asset_records: list,
+                              process_job_model: ProcessJobModel, process_queue: ProcessJobQueue):
+    """
+    Records a processing job for asset_records and hands it to the queue.
+    Returns (status_code, content) of the response.
+    """
+    #start Processing in the background, the request only records the job
+    if process_queue.is_full():
+        return status.HTTP_429_TOO_MANY_REQUESTS, {
+            "signal":ResponseSignal.PROCESSING_QUEUE_FULL.value
+        }
 
+    process_job = await process_job_model.create_job(
+        job=ProcessJob(
+            job_project_id=project.id,
+            job_status=ProcessJobEnum.QUEUED.value,
+            job_owner=process_queue.owner_id,
+            job_lease_until=process_queue.get_lease_until(),
+            job_config={
+                "project_id": project_id,
+                "chunk_size": process_request.chunk_size,
+                "overlap_size": process_request.overlap_size,
+                "do_reset": process_request.do_reset,
+                "incremental": process_request.incremental,
+                "splitter": process_request.splitter
+            },
+            job_assets=[
+                {
+                    "asset_id": asset_record.id,
+                    "asset_name": asset_record.asset_name,
+                    "asset_blob": asset_record.asset_blob,
+                    "status": ProcessJobEnum.QUEUED.value,
+                    "inserted_chunks": 0,
+                    "total_chunks": None,
+                    "error": None
+                }
+                for asset_record in asset_records
+            ]
+        )
+    )
 
-    if do_reset == 1:
-        print("deleting . . .") #depugging step
-        _ = await chunk_model.delete_chunks_by_project_id(project_id=project.id)
+    if not process_queue.submit(job_id=process_job.id):
+        await process_job_model.set_job_status(
+            job_id=process_job.id,
+            job_status=ProcessJobEnum.FAILED.value,
+            job_error=ResponseSignal.PROCESSING_QUEUE_FULL.value
+        )
+        return status.HTTP_429_TOO_MANY_REQUESTS, {
+            "signal":ResponseSignal.PROCESSING_QUEUE_FULL.value
+        }
 
-    no_records = 0
-    no_files = 0
+    return status.HTTP_202_ACCEPTED, {
+        "signal": ResponseSignal.PROCESSING_JOB_QUEUED.value,
+        "job_id": str(process_job.id),
+        "queued_files": len(asset_records)
+    }
 
-    for asset_id, file_id in project_file_ids.items():
-        file_content = processcontroller.get_file_content(file_id=file_id)
+def serialize_process_job(process_job: ProcessJob):
+    job_assets = [
+        {
+            "asset_id": str(asset["asset_id"]),
+            "asset_name": asset["asset_name"],
+            "status": asset["status"],
+            "inserted_chunks": asset.get("inserted_chunks", 0),
+            "total_chunks": asset.get("total_chunks"),
+            "error": asset.get("error")
+        }
+        for asset in process_job.job_assets
+    ]
 
-        if file_content is None:
-            logger.error(f"Error while processing file: {file_id}")
-            continue
+    return {
+        "job_id": str(process_job.id),
+        "project_id": process_job.job_config.get("project_id"),
+        "status": process_job.job_status,
+        "cancel_requested": process_job.job_cancel_requested,
+        "error": process_job.job_error,
+        "assets": job_assets,
+        "inserted_chunks": sum(asset["inserted_chunks"] or 0 for asset in job_assets),
+        "processed_files": sum(
+            1 for asset in job_assets
+            if asset["status"] == ProcessJobEnum.COMPLETED.value
+        ),
+        "skipped_files": sum(
+            1 for asset in job_assets
+            if asset["status"] == ProcessJobEnum.SKIPPED.value
+        ),
+        "created_at": process_job.job_created_at.isoformat(),
+        "updated_at": process_job.job_updated_at.isoformat()
+    }
 
-        file_chunks = processcontroller.process_file_content(
-            file_content=file_content,
-            file_id=file_id,
-            chunk_size=process_request.chunk_size,
-            overlap_size=process_request.overlap_size
+@data_router.get("/process/jobs/{job_id}")
+async def process_job_status(request: Request, job_id: str,
+                             process_job_model: ProcessJobModel = Depends(get_process_job_model)):
+    process_job = await process_job_model.get_job(job_id=job_id)
+    if process_job is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={
+                "signal":ResponseSignal.PROCESSING_JOB_NOT_FOUND.value
+            }
         )
 
-        if file_chunks is None or len(file_chunks) == 0 :
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={
-                    "signal":ResponseSignal.PROCESSING_FAILED
-                }
-            )
-        
-        file_chunks_records = [
-            DataChunk(
-                chunk_text=chunk.page_content,
-                chunk_metadata=chunk.metadata,
-                chunk_order=i+1,
-                chunk_project_id=project.id,
-                chunk_asset_id=asset_id
-            )
-            for i, chunk in enumerate(file_chunks)
-        ]
+    return JSONResponse(
+        content={
+            "signal": ResponseSignal.PROCESSING_JOB_FOUND.value,
+            **serialize_process_job(process_job)
+        }
+    )
 
+@data_router.post("/process/jobs/{job_id}/cancel")
+async def cancel_process_job(request: Request, job_id: str,
+                             process_queue: ProcessJobQueue = Depends(get_process_queue)):
+    process_job = await process_queue.cancel(job_id=job_id)
 
-        no_records += await chunk_model.insert_many_chunks(chunks=file_chunks_records)
-        no_files += 1
+    if process_job is None:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "signal":ResponseSignal.PROCESSING_JOB_NOT_CANCELLABLE.value
+            }
+        )
 
     return JSONResponse(
         content={
-            "signal": ResponseSignal.PROCESSING_SUCCEDED.value,
-            "inserted_chunks": no_records,
-            "processed_files": no_files
+            "signal": ResponseSignal.PROCESSING_JOB_CANCELLED.value,
+            **serialize_process_job(process_job)
         }
     )
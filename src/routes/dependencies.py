@@ -0,0 +1,56 @@
+from fastapi import Request
+from helpers.config import Settings
+from helpers.container import AppContainer
+from controllers import DataController, ProjectController, BlobController, ArchiveController
+from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
+from models.ProcessJobModel import ProcessJobModel
+from models.UploadSessionModel import UploadSessionModel
+from stores.llm.AsyncLLMInterface import AsyncLLMInterface
+from tasks import ProcessJobQueue
+
+# FastAPI dependencies over the app container, they only hand out
+# long-lived instances and never allocate per request
+
+def get_container(request: Request) -> AppContainer:
+    return request.app.container
+
+def get_app_settings(request: Request) -> Settings:
+    return request.app.container.settings
+
+def get_data_controller(request: Request) -> DataController:
+    return request.app.container.data_controller
+
+def get_project_controller(request: Request) -> ProjectController:
+    return request.app.container.project_controller
+
+def get_blob_controller(request: Request) -> BlobController:
+    return request.app.container.blob_controller
+
+def get_archive_controller(request: Request) -> ArchiveController:
+    return request.app.container.archive_controller
+
+def get_project_model(request: Request) -> ProjectModel:
+    return request.app.container.project_model
+
+def get_asset_model(request: Request) -> AssetModel:
+    return request.app.container.asset_model
+
+def get_chunk_model(request: Request) -> ChunkModel:
+    return request.app.container.chunk_model
+
+def get_process_job_model(request: Request) -> ProcessJobModel:
+    return request.app.container.process_job_model
+
+def get_upload_session_model(request: Request) -> UploadSessionModel:
+    return request.app.container.upload_session_model
+
+def get_process_queue(request: Request) -> ProcessJobQueue:
+    return request.app.container.process_queue
+
+def get_generation_client(request: Request) -> AsyncLLMInterface:
+    return request.app.container.generation_client
+
+def get_embedding_client(request: Request) -> AsyncLLMInterface:
+    return request.app.container.embedding_client
@@ -1,8 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
+from models import SplitterEnum
+
+class UploadSessionRequest(BaseModel):
+    file_name: str
+    content_type: str
+    file_size: int = Field(..., gt=0) # bytes, the session is complete once this many were received
 
 class ProcessRequest(BaseModel):
     file_id: str = None
     chunk_size: Optional[int] = 100
     overlap_size: Optional[int]= 20
-    do_reset: Optional[int] = 0 #delete the saved data
\ No newline at end of file
+    do_reset: Optional[int] = 0 #delete the saved data
+    incremental: Optional[int] = 0 #skip assets already chunked with the same content and params
+    splitter: Optional[str] = SplitterEnum.NATIVE.value #"native" or "langchain", same chunks
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Chunk text compression maintenance, run from src/ against the database in .env:
+
+    python -m scripts.chunk_text_codec migrate [--project-id ID] [--decompress]
+    python -m scripts.chunk_text_codec benchmark [--project-id ID] [--sample 2000]
+
+migrate compresses the plain chunks already stored (or puts them back with
+--decompress), batch by batch, and can be stopped and run again at any point:
+readers handle plain and compressed chunks side by side.
+benchmark reports what the codec would do to a sample of stored chunks.
+"""
+from motor.motor_asyncio import AsyncIOMotorClient
+from helpers.config import get_settings
+from models.ChunkModel import ChunkModel
+from models.enums.DataBaseEnum import DataBaseEnum
+from pymongo import UpdateOne
+import argparse
+import asyncio
+import bson
+import time
+
+async def get_project_ids(db_client: object, project_id: str = None):
+    # chunks reference the project document _id, the CLI takes the project_id used in the routes
+    if project_id is None:
+        chunk_collection = db_client[DataBaseEnum.COLLECTION_CHUNK_NAME.value]
+        return await chunk_collection.distinct("chunk_project_id")
+
+    project = await db_client[DataBaseEnum.COLLECTION_PROJECT_NAME.value].find_one({"project_id": project_id})
+    if project is None:
+        raise SystemExit(f"project {project_id} not found")
+
+    return [project["_id"]]
+
+async def compress_project(chunk_model: ChunkModel, project_id: object, batch_size: int):
+    query = {"chunk_project_id": project_id, "chunk_text": {"$exists": True}}
+    migrated = 0
+    while True:
+        records = [
+            record async for record in
+            chunk_model.collection.find(query, projection={"chunk_text": 1}).limit(batch_size)
+        ]
+        if len(records) == 0:
+            return migrated
+
+        # same path as the writers: the first batch trains the project dictionary
+        records = await chunk_model.encode_documents(documents=records, project_id=project_id)
+        result = await chunk_model.collection.bulk_write([
+            UpdateOne(
+                {"_id": record["_id"], "chunk_text": {"$exists": True}},
+                {
+                    "$set": {
+                        "chunk_text_z": record["chunk_text_z"],
+                        "chunk_codec": record["chunk_codec"],
+                        "chunk_dictionary_id": record["chunk_dictionary_id"]
+                    },
+                    "$unset": {"chunk_text": ""}
+                }
+            )
+            for record in records
+        ], ordered=False)
+        migrated += result.modified_count
+
+async def decompress_project(chunk_model: ChunkModel, project_id: object, batch_size: int):
+    query = {"chunk_project_id": project_id, "chunk_text_z": {"$exists": True}}
+    migrated = 0
+    while True:
+        records = [
+            record async for record in
+            chunk_model.collection.find(
+                query, projection={"chunk_text_z": 1, "chunk_codec": 1, "chunk_dictionary_id": 1}
+            ).limit(batch_size)
+        ]
+        if len(records) == 0:
+            return migrated
+
+        records = await chunk_model.decode_records(records=records)
+        result = await chunk_model.collection.bulk_write([
+            UpdateOne(
+                {"_id": record["_id"], "chunk_text_z": {"$exists": True}},
+                {
+                    "$set": {"chunk_text": record["chunk_text"]},
+                    "$unset": {"chunk_text_z": "", "chunk_codec": "", "chunk_dictionary_id": ""}
+                }
+            )
+            for record in records
+        ], ordered=False)
+        migrated += result.modified_count
+
+async def migrate(chunk_model: ChunkModel, project_ids: list, batch_size: int, decompress: bool):
+    for project_id in project_ids:
+        started = time.perf_counter()
+        if decompress:
+            migrated = await decompress_project(chunk_model, project_id, batch_size)
+        else:
+            migrated = await compress_project(chunk_model, project_id, batch_size)
+
+        print(f"project {project_id}: {migrated} chunks {'decompressed' if decompress else 'compressed'}"
+              f" in {time.perf_counter() - started:.1f}s")
+
+def time_per_item(function: object, items: list, repeat: int = 3):
+    # best of repeat runs, in microseconds per item
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            function(item)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best / len(items) * 1e6
+
+async def benchmark(chunk_model: ChunkModel, project_ids: list, sample: int):
+    records = []
+    for project_id in project_ids:
+        records += [
+            record async for record in
+            chunk_model.collection.find({"chunk_project_id": project_id}).limit(sample - len(records))
+        ]
+        if len(records) >= sample:
+            break
+
+    if len(records) == 0:
+        raise SystemExit("no chunks to benchmark")
+
+    records = await chunk_model.decode_records(records=records)
+    texts = [record["chunk_text"] for record in records]
+    codec = chunk_model.codec
+
+    started = time.perf_counter()
+    dictionary = codec.load_dictionary(codec.train_dictionary(texts))
+    train_ms = (time.perf_counter() - started) * 1e3
+
+    compressor = codec.get_compressor(dictionary)
+    decompressor = codec.get_decompressor(dictionary)
+    compressed = [codec.compress(compressor, text) for text in texts]
+
+    plain_compressor = codec.get_compressor()
+    plain_compressed_size = sum(len(codec.compress(plain_compressor, text)) for text in texts)
+
+    text_size = sum(len(text.encode("utf-8")) for text in texts)
+    compressed_size = sum(len(data) for data in compressed)
+
+    # whole documents as Mongo stores them, metadata and ids included
+    plain_document_size = 0
+    encoded_document_size = 0
+    for record, data in zip(records, compressed):
+        document = {key: value for key, value in record.items() if key != "chunk_text"}
+        encoded_document_size += len(bson.encode({
+            **document, "chunk_text_z": data, "chunk_codec": "zstd", "chunk_dictionary_id": bson.ObjectId()
+        }))
+        plain_document_size += len(bson.encode({**document, "chunk_text": record["chunk_text"]}))
+
+    print(f"chunks:                 {len(texts)} ({text_size / len(texts):.0f} bytes of text on average)")
+    print(f"dictionary:             {len(dictionary.as_bytes()) if dictionary else 0} bytes, trained in {train_ms:.0f} ms")
+    print(f"text ratio:             {text_size / compressed_size:.2f}x"
+          f" ({text_size / plain_compressed_size:.2f}x without the dictionary)")
+    print(f"document ratio:         {plain_document_size / encoded_document_size:.2f}x"
+          f" ({plain_document_size} -> {encoded_document_size} bytes)")
+    print(f"write overhead:         {time_per_item(lambda text: codec.compress(compressor, text), texts):.1f} us/chunk")
+    print(f"read overhead:          {time_per_item(lambda data: codec.decompress(decompressor, data), compressed):.1f} us/chunk")
+
+async def main():
+    parser = argparse.ArgumentParser(description="chunk_text compression")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="compress (or decompress) stored chunks")
+    migrate_parser.add_argument("--project-id", default=None, help="every project when omitted")
+    migrate_parser.add_argument("--batch-size", type=int, default=1000)
+    migrate_parser.add_argument("--decompress", action="store_true", help="store chunk_text as plain text again")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="storage ratio and codec overhead on stored chunks")
+    benchmark_parser.add_argument("--project-id", default=None)
+    benchmark_parser.add_argument("--sample", type=int, default=2000)
+
+    args = parser.parse_args()
+
+    settings = get_settings()
+    mongo_conn = AsyncIOMotorClient(settings.MONGODB_URL)
+    try:
+        chunk_model = await ChunkModel.create_instance(db_client=mongo_conn[settings.MONGODB_DATABASE])
+        project_ids = await get_project_ids(chunk_model.db_client, args.project_id)
+
+        if args.command == "migrate":
+            await migrate(chunk_model, project_ids, args.batch_size, args.decompress)
+        else:
+            await benchmark(chunk_model, project_ids, args.sample)
+    finally:
+        mongo_conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Chunk insert throughput, run from src/ against the database in .env:
+
+    python -m scripts.chunk_writer_benchmark [--chunks 50000] [--chunk-size 1000]
+
+The same synthetic chunks are written twice under a throwaway project:
+through DataChunk models and insert_many_chunks (the path the job worker
+used before) and as raw documents through the bulk writer it uses now.
+Chunk text compression is left out of both, every chunk is deleted again.
+"""
+from motor.motor_asyncio import AsyncIOMotorClient
+from helpers.config import get_settings
+from models.ChunkModel import ChunkModel
+from models.db_schemes import DataChunk
+from bson.objectid import ObjectId
+import argparse
+import asyncio
+import random
+import time
+
+def generate_chunks(count: int, chunk_size: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = ["the", "of", "chunk", "writer", "document", "retrieval", "insert", "batch"]
+    metadata = {"source": "assets/files/benchmark.pdf", "file_path": "assets/files/benchmark.pdf", "total_pages": 500}
+    chunks = []
+    for chunk_no in range(count):
+        text = " ".join(rng.choice(words) for _ in range(chunk_size // 6))
+        chunks.append((text, {**metadata, "page": chunk_no // 4}, chunk_no * chunk_size))
+
+    return chunks
+
+async def write_models(chunk_model: ChunkModel, chunks: list, project_id: ObjectId, asset_id: ObjectId,
+                       batch_size: int):
+    data_chunks = [
+        DataChunk(
+            chunk_text=chunk_text,
+            chunk_metadata=chunk_metadata,
+            chunk_order=chunk_no + 1,
+            chunk_project_id=project_id,
+            chunk_asset_id=asset_id
+        )
+        for chunk_no, (chunk_text, chunk_metadata, _) in enumerate(chunks)
+    ]
+    return await chunk_model.insert_many_chunks(chunks=data_chunks, batch_size=batch_size)
+
+async def write_documents(chunk_model: ChunkModel, chunks: list, project_id: ObjectId, asset_id: ObjectId,
+                          batch_size: int, max_in_flight: int):
+    chunk_writer = chunk_model.get_bulk_writer(batch_size=batch_size, max_in_flight=max_in_flight)
+    asset_metadata = DataChunk.get_document_metadata(chunks[0][1])
+    try:
+        for chunk_no, (chunk_text, chunk_metadata, chunk_start) in enumerate(chunks):
+            await chunk_writer.add(
+                DataChunk.build_document(
+                    chunk_text=chunk_text,
+                    chunk_metadata=chunk_metadata,
+                    chunk_order=chunk_no + 1,
+                    chunk_project_id=project_id,
+                    chunk_asset_id=asset_id,
+                    asset_metadata=asset_metadata,
+                    chunk_start=chunk_start
+                )
+            )
+        return await chunk_writer.flush()
+    except Exception:
+        await chunk_writer.abort()
+        raise
+
+async def run_once(name: str, write: object, chunk_model: ChunkModel, chunks: list, **kwargs):
+    project_id = ObjectId()
+    try:
+        started = time.perf_counter()
+        inserted = await write(chunk_model, chunks, project_id, ObjectId(), **kwargs)
+        elapsed = time.perf_counter() - started
+    finally:
+        await chunk_model.delete_chunks_by_project_id(project_id=project_id)
+
+    if inserted != len(chunks):
+        raise SystemExit(f"{name}: {inserted} of {len(chunks)} chunks inserted")
+
+    print(f"{name:<34} {elapsed:>8.2f} {len(chunks) / elapsed:>12.0f}")
+    return elapsed
+
+async def main():
+    parser = argparse.ArgumentParser(description="chunk insert throughput")
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="characters of text per chunk")
+    parser.add_argument("--model-batch-size", type=int, default=100, help="batch size of the old path")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    chunks = generate_chunks(count=args.chunks, chunk_size=args.chunk_size)
+
+    settings = get_settings()
+    mongo_conn = AsyncIOMotorClient(settings.MONGODB_URL)
+    try:
+        chunk_model = await ChunkModel.create_instance(db_client=mongo_conn[settings.MONGODB_DATABASE])
+
+        print(f"{len(chunks)} chunks of {args.chunk_size} characters")
+        print(f"{'path':<34} {'time (s)':>8} {'chunks/s':>12}")
+        models_time = await run_once(
+            f"models, insert_many_chunks x{args.model_batch_size}", write_models, chunk_model, chunks,
+            batch_size=args.model_batch_size
+        )
+        documents_time = await run_once(
+            f"bulk writer x{args.batch_size}, {args.max_in_flight} in flight", write_documents, chunk_model, chunks,
+            batch_size=args.batch_size, max_in_flight=args.max_in_flight
+        )
+        print(f"speedup: {models_time / documents_time:.2f}x")
+    finally:
+        mongo_conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""
+Embedding cache maintenance, run from src/ with the settings in .env:
+
+    python -m scripts.embedding_cache stats
+    python -m scripts.embedding_cache clear
+    python -m scripts.embedding_cache benchmark [--texts 20000] [--dimensions 1536]
+
+stats and clear work on the cache file the app uses (assets/embedding_cache).
+benchmark fills a temporary cache through CachedEmbeddingProvider, with a
+provider that returns random vectors, and reports lookup costs and hit rates
+for a first processing run, a reprocessing run and a partially new upload.
+"""
+from helpers.config import get_settings
+from stores.llm.LLMInterface import LLMInterface
+from stores.llm.EmbeddingCache import EmbeddingCache
+from stores.llm.CachedEmbeddingProvider import CachedEmbeddingProvider
+import argparse
+import os
+import random
+import tempfile
+import time
+
+def get_cache_path():
+    return os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        "assets/embedding_cache/embeddings.db"
+    )
+
+class RandomEmbeddingProvider(LLMInterface):
+    # stands in for a remote provider, counts what would have been sent
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.embedding_model_id = "random"
+        self.embedding_size = dimensions
+        self.calls = 0
+        self.embedded = 0
+
+    def set_generation_model(self, model_id: str):
+        pass
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        pass
+
+    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                            temperature: float = None):
+        return None
+
+    def embed_text(self, text: str, document_type: str = None):
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts: list, document_type: str = None):
+        self.calls += 1
+        self.embedded += len(texts)
+        return [[random.random() for _ in range(self.dimensions)] for _ in texts]
+
+    def construct_prompt(self, prompt: str, role: str):
+        return {"role": role, "content": prompt}
+
+def run(provider: CachedEmbeddingProvider, texts: list, batch_size: int):
+    embedded = provider.provider.embedded
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        provider.embed_texts(texts[start:start + batch_size])
+    elapsed = time.perf_counter() - started
+    return elapsed, provider.provider.embedded - embedded
+
+def benchmark(texts: int, dimensions: int, batch_size: int, memory_size: int):
+    corpus = [f"chunk {index} " + "lorem ipsum dolor sit amet " * 20 for index in range(texts)]
+    overlapping = corpus[:texts // 2] + [text + " v2" for text in corpus[texts // 2:]]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = EmbeddingCache(
+            cache_path=os.path.join(cache_dir, "embeddings.db"),
+            max_size=1024 * 1024 * 1024,
+            memory_size=memory_size * 1024 * 1024
+        )
+        provider = CachedEmbeddingProvider(
+            provider=RandomEmbeddingProvider(dimensions=dimensions),
+            provider_name="RANDOM",
+            cache=cache
+        )
+
+        # cache overhead only: the random provider costs nothing next to a remote call
+        for name, run_texts in [("first run", corpus), ("reprocess (memory)", corpus)]:
+            elapsed, embedded = run(provider, run_texts, batch_size)
+            print(f"{name:<24} {elapsed * 1e6 / len(run_texts):8.1f} us/text, {embedded} texts sent")
+
+        cache.memory.clear()
+        cache.memory_used = 0
+        for name, run_texts in [("reprocess (disk)", corpus), ("half new upload", overlapping)]:
+            elapsed, embedded = run(provider, run_texts, batch_size)
+            print(f"{name:<24} {elapsed * 1e6 / len(run_texts):8.1f} us/text, {embedded} texts sent")
+
+        stats = cache.stats()
+        print(f"cache file               {stats['size'] / 1024 / 1024:.1f} MB for {stats['entries']} vectors"
+              f" ({stats['size'] / max(stats['entries'], 1):.0f} bytes each)")
+        print(f"hit rate                 {stats['hit_rate']:.2%}"
+              f" ({stats['memory_hits']} memory, {stats['disk_hits']} disk, {stats['misses']} misses)")
+        cache.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="embedding cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="size of the app's cache")
+    subparsers.add_parser("clear", help="drop every cached vector")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="cache overhead and hit rates on a temporary cache")
+    benchmark_parser.add_argument("--texts", type=int, default=20000)
+    benchmark_parser.add_argument("--dimensions", type=int, default=1536)
+    benchmark_parser.add_argument("--batch-size", type=int, default=1000)
+    benchmark_parser.add_argument("--memory-size", type=int, default=64, help="MB")
+
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        benchmark(args.texts, args.dimensions, args.batch_size, args.memory_size)
+        return
+
+    settings = get_settings()
+    cache = EmbeddingCache(
+        cache_path=get_cache_path(),
+        max_size=settings.EMBEDDING_CACHE_SIZE * 1024 * 1024
+    )
+    try:
+        if args.command == "clear":
+            cache.clear()
+
+        stats = cache.stats()
+        print(f"{cache.cache_path}: {stats['entries']} vectors,"
+              f" {stats['size'] / 1024 / 1024:.1f} of {stats['max_size'] / 1024 / 1024:.0f} MB")
+    finally:
+        cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Startup import cost of the API process, run from src/:
+
+    python -m scripts.import_time_benchmark [--module main] [--runs 5] [--budget-ms 800]
+
+Imports the module in fresh interpreters under `python -X importtime` and
+reports the median cumulative import time, the packages that cost the most
+and any heavy dependency that got imported at startup. Exits with 1 when
+the median is over --budget-ms or a heavy dependency was imported, so it
+can guard startup cost in CI.
+"""
+from collections import defaultdict
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# only needed once a document is parsed or a provider is created
+HEAVY_PACKAGES = [
+    "langchain", "langchain_core", "langchain_community", "langchain_text_splitters",
+    "fitz", "pymupdf", "openai", "cohere", "sagemaker", "boto3",
+]
+
+def run_importtime(module: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    # "import time: self [us] | cumulative | imported package", nesting is indentation
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description="import time of the API process")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    totals = []
+    package_times = defaultdict(list)
+    imported = set()
+    for _ in range(args.runs):
+        records = run_importtime(args.module)
+        totals.append(next(cumulative for name, _, cumulative in records if name == args.module) / 1e3)
+
+        run_package_times = defaultdict(int)
+        for name, self_us, _ in records:
+            run_package_times[name.split(".")[0]] += self_us
+            imported.add(name.split(".")[0])
+        for package, self_us in run_package_times.items():
+            package_times[package].append(self_us / 1e3)
+
+    total = statistics.median(totals)
+    print(f"import {args.module}: {total:.0f} ms median of {args.runs} runs"
+          f" (min {min(totals):.0f}, max {max(totals):.0f})")
+
+    print(f"\n{'package':<32} {'ms':>8}")
+    top_packages = sorted(package_times.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for package, times in top_packages[:args.top]:
+        print(f"{package:<32} {statistics.median(times):>8.1f}")
+
+    heavy = [package for package in HEAVY_PACKAGES if package in imported]
+    print(f"\nheavy dependencies imported at startup: {', '.join(heavy) if heavy else 'none'}")
+
+    if heavy or (args.budget_ms is not None and total > args.budget_ms):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
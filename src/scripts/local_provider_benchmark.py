@@ -0,0 +1,57 @@
+"""
+Throughput of the LOCAL provider, run from src/:
+
+    python -m scripts.local_provider_benchmark [--chunks 100000] [--dimensions 384] [--batch-size 1000]
+
+Embeds synthetic chunks the size the splitter produces, reports chunks per
+second, and checks the vectors are usable for retrieval: a query made of a
+few words of a chunk should find that chunk first.
+"""
+from stores.llm.LLMEnums import LLMEnums
+from stores.llm import providers
+import argparse
+import random
+import time
+import numpy as np
+
+def make_chunks(count: int, words_per_chunk: int, vocabulary_size: int):
+    rng = random.Random(0)
+    vocabulary = [f"w{index}" for index in range(vocabulary_size)]
+    return [" ".join(rng.choices(vocabulary, k=words_per_chunk)) for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=f"{LLMEnums.LOCAL.value} provider throughput")
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--words-per-chunk", type=int, default=150)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks, args.words_per_chunk, args.vocabulary)
+    provider = providers.LocalProvider()
+    provider.set_embedding_model(model_id="benchmark", embedding_size=args.dimensions)
+
+    vectors = []
+    started = time.perf_counter()
+    for start in range(0, len(chunks), args.batch_size):
+        vectors += provider.embed_texts(chunks[start:start + args.batch_size])
+    elapsed = time.perf_counter() - started
+
+    print(f"embedded:      {len(vectors)} chunks of {args.words_per_chunk} words in {elapsed:.2f}s"
+          f" ({len(vectors) / elapsed:,.0f} chunks/s, {args.dimensions} dimensions)")
+    print(f"1M chunks:     ~{1e6 / len(vectors) * elapsed:.0f}s")
+
+    matrix = np.array(vectors, dtype=np.float32)
+    rng = random.Random(1)
+    targets = rng.sample(range(len(chunks)), min(args.queries, len(chunks)))
+    queries = [" ".join(rng.sample(chunks[target].split(), 8)) for target in targets]
+    query_vectors = np.array(provider.embed_texts(queries), dtype=np.float32)
+
+    found = np.argmax(query_vectors @ matrix.T, axis=1)
+    hits = sum(int(result == target) for result, target in zip(found, targets))
+    print(f"retrieval:     {hits}/{len(targets)} queries of 8 chunk words rank their chunk first")
+
+if __name__ == "__main__":
+    main()
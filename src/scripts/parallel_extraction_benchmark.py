@@ -0,0 +1,77 @@
+"""
+Speedup of the parallel pdf extraction by worker count, run from src/:
+
+    python -m scripts.parallel_extraction_benchmark FILE.pdf [--workers 1,2,4,8]
+
+For every worker count the file goes through ProcessController twice, page
+windows only (PARSER_PARALLEL_MIN_PAGES = 0) and split into page ranges
+extracted at once, without the page cache so every run really parses.
+Both must produce the same chunks.
+"""
+from controllers import ProcessController
+from helpers.parsing_engine import ParsingEngine, get_page_count
+import argparse
+import asyncio
+import os
+import time
+
+async def run_once(parsing_engine: ParsingEngine, file_path: str, args: argparse.Namespace,
+                   parallel_min_pages: int):
+    process_controller = ProcessController(
+        project_id="benchmark",
+        parsing_engine=parsing_engine,
+        pages_per_task=args.pages_per_task,
+        page_cache=False,
+        parallel_min_pages=parallel_min_pages,
+        pages_per_range=args.pages_per_range
+    )
+
+    started = time.perf_counter()
+    chunks = [
+        chunk async for chunk in process_controller.iter_path_chunks(
+            file_path=file_path, chunk_size=args.chunk_size, overlap_size=args.overlap_size
+        )
+    ]
+    return time.perf_counter() - started, chunks
+
+async def main():
+    parser = argparse.ArgumentParser(description="parallel pdf extraction speedup")
+    parser.add_argument("file_path")
+    parser.add_argument("--workers", default=None, help="comma separated, default 1,2,4.. up to the core count")
+    parser.add_argument("--pages-per-range", type=int, default=100)
+    parser.add_argument("--pages-per-task", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap-size", type=int, default=100)
+    args = parser.parse_args()
+
+    file_path = os.path.abspath(args.file_path)
+    if args.workers:
+        worker_counts = [int(workers) for workers in args.workers.split(",")]
+    else:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+            worker_counts.append(worker_counts[-1] * 2)
+
+    print(f"{get_page_count(file_path)} pages, {os.cpu_count()} cores, {args.pages_per_range} pages per range")
+    print(f"{'workers':>8} {'windows (s)':>12} {'ranges (s)':>11} {'speedup':>8}")
+
+    baseline = None
+    for workers in worker_counts:
+        parsing_engine = ParsingEngine(workers=workers)
+        try:
+            # spawn the workers before timing anything
+            await asyncio.gather(*[parsing_engine.run(get_page_count, file_path) for _ in range(workers)])
+
+            windows_time, windows_chunks = await run_once(parsing_engine, file_path, args, parallel_min_pages=0)
+            ranges_time, ranges_chunks = await run_once(parsing_engine, file_path, args, parallel_min_pages=1)
+        finally:
+            parsing_engine.shutdown()
+
+        if windows_chunks != ranges_chunks:
+            raise SystemExit(f"{workers} workers: parallel extraction changed the chunks")
+
+        baseline = baseline if baseline is not None else windows_time
+        print(f"{workers:>8} {windows_time:>12.2f} {ranges_time:>11.2f} {baseline / ranges_time:>7.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
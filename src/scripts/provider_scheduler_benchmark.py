@@ -0,0 +1,166 @@
+"""
+ProviderScheduler against a simulated rate limited provider, run from src/:
+
+    python -m scripts.provider_scheduler_benchmark [--bulk 200] [--queries 40] [--rpm 1200]
+
+A bulk embedding job and a trickle of interactive queries share a provider
+that allows rpm requests per minute, replenished continuously with a one
+second burst, and rejects the rest with a 429. Like the real providers,
+embed_texts() splits its texts into batch_size batches, one call each,
+and retries them on its own unless a scheduler is in charge. The
+same load runs straight against the provider and through the scheduler,
+with the scheduler's limits set to the provider's.
+"""
+from stores.llm.AsyncLLMInterface import AsyncLLMInterface
+from stores.llm.ProviderScheduler import ProviderScheduler, TokenBucket, request_priority
+from stores.llm.ScheduledProvider import ScheduledProvider
+from stores.llm.LLMEnums import RequestPriorityEnum
+from stores.llm.EmbeddingBatcher import EmbeddingBatcher
+from functools import partial
+import argparse
+import asyncio
+import logging
+import time
+
+class RateLimitError(Exception):
+    pass
+
+class SimulatedProvider(AsyncLLMInterface):
+    # a remote API: latency per call, its per minute limit replenished continuously
+
+    def __init__(self, requests_per_minute: int, latency: float, batch_size: int):
+        self.requests_per_minute = requests_per_minute
+        self.latency = latency
+        self.limit = TokenBucket(per_minute=requests_per_minute)
+        self.rejected = 0
+
+        self.embedding_batcher = EmbeddingBatcher(max_batch_size=batch_size, retry_backoff=0.5)
+        self.submit_batch = None
+
+        self.generation_model_id = "simulated"
+        self.embedding_model_id = "simulated"
+        self.embedding_size = 4
+        self.default_generation_max_output_tokens = 100
+
+    def use_scheduler(self, submit_batch: object):
+        self.submit_batch = submit_batch
+        self.embedding_batcher.max_retries = 0
+
+    def set_generation_model(self, model_id: str):
+        pass
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        pass
+
+    async def call(self):
+        now = time.monotonic()
+        if self.limit.get_delay(1, now) > 0:
+            self.rejected += 1
+            await asyncio.sleep(0.005)
+            raise RateLimitError("429")
+
+        self.limit.consume(1, now)
+        await asyncio.sleep(self.latency)
+
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                  temperature: float = None):
+        await self.call()
+        return prompt
+
+    async def embed_text(self, text: str, document_type: str = None):
+        await self.call()
+        return [0.0] * self.embedding_size
+
+    async def embed_texts(self, texts: list, document_type: str = None):
+        embed_batch = self.embed_batch
+        if self.submit_batch is not None:
+            embed_batch = partial(self.submit_batch, embed_batch)
+
+        return await self.embedding_batcher.embed_async(
+            texts=texts,
+            embed_batch=embed_batch,
+            is_retryable=self.is_retryable_error,
+            is_input_error=lambda error: False
+        )
+
+    async def embed_batch(self, texts: list):
+        await self.call()
+        return [[0.0] * self.embedding_size for _ in texts], None
+
+    def is_retryable_error(self, error: Exception):
+        return isinstance(error, RateLimitError)
+
+    def construct_prompt(self, prompt: str, role: str):
+        return {"role": role, "content": prompt}
+
+async def run_load(provider: AsyncLLMInterface, bulk: int, queries: int, query_interval: float):
+    failed = 0
+
+    async def embed_chunks(index: int):
+        nonlocal failed
+        # the batcher gives up on a batch instead of raising, its texts come back as None
+        vectors = await provider.embed_texts(texts=[f"chunk {index}"] * 96)
+        failed += sum(1 for vector in vectors if vector is None)
+
+    async def bulk_job():
+        with request_priority(RequestPriorityEnum.BULK):
+            await asyncio.gather(*[embed_chunks(index) for index in range(bulk)])
+
+    async def query(index: int):
+        nonlocal failed
+        await asyncio.sleep(index * query_interval)
+        started = time.monotonic()
+        try:
+            await provider.embed_text(text=f"query {index}")
+        except RateLimitError:
+            failed += 1
+            return None
+        return time.monotonic() - started
+
+    started = time.monotonic()
+    _, latencies = await asyncio.gather(bulk_job(), asyncio.gather(*[query(index) for index in range(queries)]))
+    elapsed = time.monotonic() - started
+
+    latencies = sorted(latency for latency in latencies if latency is not None)
+    return elapsed, failed, latencies
+
+def describe(name: str, provider: SimulatedProvider, elapsed: float, failed: int, latencies: list):
+    p50 = latencies[len(latencies) // 2] if latencies else float("nan")
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else float("nan")
+    print(f"{name:<12} {elapsed:6.1f}s, {failed:5} texts/queries failed, {provider.rejected:5} 429s,"
+          f" query latency p50 {p50 * 1e3:6.0f} ms / p95 {p95 * 1e3:6.0f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description="provider scheduler")
+    parser.add_argument("--bulk", type=int, default=200, help="bulk embed_texts calls of 96 texts")
+    parser.add_argument("--queries", type=int, default=40, help="interactive calls")
+    parser.add_argument("--query-interval", type=float, default=0.1, help="seconds between queries")
+    parser.add_argument("--rpm", type=int, default=1200, help="requests per minute the provider allows")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per provider call")
+    parser.add_argument("--batch-size", type=int, default=32, help="texts per provider call")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    # batches given up on are counted in the results, not logged one by one
+    logging.getLogger(EmbeddingBatcher.__module__).setLevel(logging.CRITICAL)
+
+    provider = SimulatedProvider(requests_per_minute=args.rpm, latency=args.latency, batch_size=args.batch_size)
+    describe("direct", provider, *await run_load(provider, args.bulk, args.queries, args.query_interval))
+
+    provider = SimulatedProvider(requests_per_minute=args.rpm, latency=args.latency, batch_size=args.batch_size)
+    scheduler = ProviderScheduler(
+        max_concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        max_retries=5,
+        retry_backoff=0.5
+    )
+    scheduled = ScheduledProvider(provider=provider, provider_name="SIMULATED", scheduler=scheduler)
+    describe("scheduled", provider, *await run_load(scheduled, args.bulk, args.queries, args.query_interval))
+
+    stats = scheduler.stats()
+    for priority, waits in stats["wait_seconds"].items():
+        print(f"  {priority:<11} waited {waits['mean'] * 1e3:6.0f} ms on average, {waits['max'] * 1e3:6.0f} ms at most"
+              f" ({waits['count']} calls)")
+    print(f"  retries {stats['retries']}, failed {stats['failed']}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
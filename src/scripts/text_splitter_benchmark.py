@@ -0,0 +1,69 @@
+"""
+OffsetTextSplitter against LangChain's RecursiveCharacterTextSplitter, run from src/:
+
+    python -m scripts.text_splitter_benchmark [FILE] [--size-mb 20] [--chunk-sizes 200,1000,4000]
+
+FILE is read as UTF-8 text, without one a text of --size-mb MB with
+paragraphs, lines and words of mixed length is generated. Both splitters
+go through get_chunk_offsets like the parsing workers use them, LangChain
+with its chunks located in the text again. Both must produce the same chunks.
+"""
+from helpers.parsing_engine import get_text_splitter, get_chunk_offsets
+from models import SplitterEnum
+import argparse
+import random
+import time
+
+def generate_text(size: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = ["the", "of", "chunk", "splitter", "document", "retrieval", "ünïcode", "overlap"]
+    paragraphs = []
+    length = 0
+    while length < size:
+        lines = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(3, 30)))
+            for _ in range(rng.randint(1, 12))
+        ]
+        paragraphs.append("\n".join(lines))
+        length += len(paragraphs[-1]) + 2
+
+    return "\n\n".join(paragraphs)
+
+def run_once(text: str, splitter: str, chunk_size: int, overlap_size: int):
+    text_splitter = get_text_splitter(chunk_size=chunk_size, overlap_size=overlap_size, splitter=splitter)
+
+    started = time.perf_counter()
+    offsets = get_chunk_offsets(text_splitter=text_splitter, text=text, overlap_size=overlap_size)
+    return time.perf_counter() - started, offsets
+
+def main():
+    parser = argparse.ArgumentParser(description="native vs langchain text splitter")
+    parser.add_argument("file_path", nargs="?")
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--chunk-sizes", default="200,1000,4000")
+    parser.add_argument("--overlap-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.file_path:
+        with open(args.file_path, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = generate_text(size=int(args.size_mb * 1024 * 1024))
+
+    print(f"{len(text)} characters")
+    print(f"{'chunk size':>10} {'chunks':>8} {'langchain (s)':>14} {'native (s)':>11} {'speedup':>8}")
+
+    for chunk_size in [int(chunk_size) for chunk_size in args.chunk_sizes.split(",")]:
+        overlap_size = int(chunk_size * args.overlap_ratio)
+        langchain_time, langchain_offsets = run_once(text, SplitterEnum.LANGCHAIN.value, chunk_size, overlap_size)
+        native_time, native_offsets = run_once(text, SplitterEnum.NATIVE.value, chunk_size, overlap_size)
+
+        if [text[start:end] for start, end in native_offsets] != \
+                [text[start:end] for start, end in langchain_offsets]:
+            raise SystemExit(f"chunk size {chunk_size}: the native splitter changed the chunks")
+
+        print(f"{chunk_size:>10} {len(native_offsets):>8} {langchain_time:>14.2f} "
+              f"{native_time:>11.2f} {langchain_time / native_time:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+
+class AsyncLLMInterface(ABC):
+    # LLMInterface for the event loop: the same methods, remote calls are coroutines
+
+    @abstractmethod
+    def set_generation_model(self, model_id: str):
+        pass
+
+    @abstractmethod
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        pass
+
+    @abstractmethod
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                  temperature: float = None):
+        pass
+
+    @abstractmethod
+    async def embed_text(self, text: str, document_type: str = None):
+        pass
+
+    @abstractmethod
+    async def embed_texts(self, texts: list, document_type: str = None):
+        # one embedding per text in input order, None for texts that failed
+        pass
+
+    def process_embedding_text(self, text: str):
+        # the text as the embedding call sends it, what cached vectors are keyed by
+        return text
+
+    @abstractmethod
+    def construct_prompt(self, prompt: str, role: str):
+        pass
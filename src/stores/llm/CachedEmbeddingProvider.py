@@ -0,0 +1,168 @@
+from .LLMInterface import LLMInterface
+from .AsyncLLMInterface import AsyncLLMInterface
+from .LLMEnums import DocumentTypeEnum
+from .EmbeddingCache import EmbeddingCache
+import asyncio
+
+# Providers wrapped with an EmbeddingCache: embed_texts() only sends the texts
+# the cache misses, once per distinct text, and stores what comes back.
+# Generation goes straight to the wrapped provider.
+
+def get_namespace(provider_name: str, provider: object, document_type: str = None):
+    # vectors differ by model, dimensions and, for some providers, input type
+    if isinstance(document_type, DocumentTypeEnum):
+        document_type = document_type.value
+
+    return "\x00".join([
+        provider_name,
+        str(provider.embedding_model_id),
+        str(provider.embedding_size),
+        document_type or DocumentTypeEnum.DOCUMENT.value
+    ])
+
+def get_misses(keys: list, vectors: list):
+    # key -> positions of the texts the cache doesn't have, duplicates sent once
+    misses = {}
+    for index, (key, vector) in enumerate(zip(keys, vectors)):
+        if vector is None:
+            misses.setdefault(key, []).append(index)
+    return misses
+
+
+class CachedEmbeddingProvider(LLMInterface):
+
+    def __init__(self, provider: LLMInterface, provider_name: str, cache: EmbeddingCache):
+        self.provider = provider
+        self.provider_name = provider_name
+        self.cache = cache
+
+    @property
+    def generation_model_id(self):
+        return self.provider.generation_model_id
+
+    @property
+    def embedding_model_id(self):
+        return self.provider.embedding_model_id
+
+    @property
+    def embedding_size(self):
+        return self.provider.embedding_size
+
+    def set_generation_model(self, model_id: str):
+        self.provider.set_generation_model(model_id=model_id)
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.provider.set_embedding_model(model_id=model_id, embedding_size=embedding_size)
+
+    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                            temperature: float = None):
+        return self.provider.generate_text(prompt=prompt, chat_history=chat_history,
+                                           max_output_tokens=max_output_tokens, temperature=temperature)
+
+    def get_keys(self, texts: list, document_type: str = None):
+        namespace = get_namespace(provider_name=self.provider_name, provider=self.provider,
+                                  document_type=document_type)
+        return [
+            self.cache.get_key(namespace=namespace, text=self.provider.process_embedding_text(text))
+            for text in texts
+        ]
+
+    def embed_text(self, text: str, document_type: str = None):
+        vectors = self.embed_texts(texts=[text], document_type=document_type)
+        return vectors[0] if vectors else None
+
+    def embed_texts(self, texts: list, document_type: str = None):
+        keys = self.get_keys(texts=texts, document_type=document_type)
+        vectors = self.cache.get_many(keys=keys)
+        misses = get_misses(keys=keys, vectors=vectors)
+        if not misses:
+            return vectors
+
+        embedded = self.provider.embed_texts(
+            texts=[texts[indices[0]] for indices in misses.values()],
+            document_type=document_type
+        )
+        if embedded is None:
+            return None
+
+        for indices, vector in zip(misses.values(), embedded):
+            for index in indices:
+                vectors[index] = vector
+
+        self.cache.set_many(items=[
+            (key, vector) for key, vector in zip(misses, embedded) if vector
+        ])
+        return vectors
+
+    def construct_prompt(self, prompt: str, role: str):
+        return self.provider.construct_prompt(prompt=prompt, role=role)
+
+
+class AsyncCachedEmbeddingProvider(AsyncLLMInterface):
+    # sqlite calls run in a thread, they would otherwise block the event loop on disk
+
+    def __init__(self, provider: AsyncLLMInterface, provider_name: str, cache: EmbeddingCache):
+        self.provider = provider
+        self.provider_name = provider_name
+        self.cache = cache
+
+    @property
+    def generation_model_id(self):
+        return self.provider.generation_model_id
+
+    @property
+    def embedding_model_id(self):
+        return self.provider.embedding_model_id
+
+    @property
+    def embedding_size(self):
+        return self.provider.embedding_size
+
+    def set_generation_model(self, model_id: str):
+        self.provider.set_generation_model(model_id=model_id)
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.provider.set_embedding_model(model_id=model_id, embedding_size=embedding_size)
+
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                  temperature: float = None):
+        return await self.provider.generate_text(prompt=prompt, chat_history=chat_history,
+                                                 max_output_tokens=max_output_tokens, temperature=temperature)
+
+    def get_keys(self, texts: list, document_type: str = None):
+        namespace = get_namespace(provider_name=self.provider_name, provider=self.provider,
+                                  document_type=document_type)
+        return [
+            self.cache.get_key(namespace=namespace, text=self.provider.process_embedding_text(text))
+            for text in texts
+        ]
+
+    async def embed_text(self, text: str, document_type: str = None):
+        vectors = await self.embed_texts(texts=[text], document_type=document_type)
+        return vectors[0] if vectors else None
+
+    async def embed_texts(self, texts: list, document_type: str = None):
+        keys = self.get_keys(texts=texts, document_type=document_type)
+        vectors = await asyncio.to_thread(self.cache.get_many, keys=keys)
+        misses = get_misses(keys=keys, vectors=vectors)
+        if not misses:
+            return vectors
+
+        embedded = await self.provider.embed_texts(
+            texts=[texts[indices[0]] for indices in misses.values()],
+            document_type=document_type
+        )
+        if embedded is None:
+            return None
+
+        for indices, vector in zip(misses.values(), embedded):
+            for index in indices:
+                vectors[index] = vector
+
+        await asyncio.to_thread(self.cache.set_many, items=[
+            (key, vector) for key, vector in zip(misses, embedded) if vector
+        ])
+        return vectors
+
+    def construct_prompt(self, prompt: str, role: str):
+        return self.provider.construct_prompt(prompt=prompt, role=role)
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+
+class EmbeddingBatcher:
+    """
+    Embeds a list of texts in as few provider calls as the provider allows.
+
+    Texts are packed in order into batches of at most batch_size texts and
+    max_batch_tokens estimated tokens. Token counts are estimated from the UTF-8
+    size of the texts, starting conservative and recalibrated from the usage the
+    provider reports, so batches grow to what the limits really allow.
+
+    A batch failing with a transient error (rate limit, timeout, 5xx) is retried
+    on its own with exponential backoff. A batch the provider rejects for its
+    input (bad request, context length) is split in halves, so a bad text only
+    costs a few extra calls for its own batch, and the batch size for the
+    following batches is halved too, growing back after every successful call.
+    Any other failure (authentication, permission, unknown model) would fail
+    every batch the same way and ends the run.
+    """
+
+    def __init__(self, max_batch_size: int, max_batch_tokens: int = None,
+                       max_retries: int = 3, retry_backoff: float = 1.0,
+                       tokens_per_byte: float = 0.5, token_margin: float = 1.2):
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.tokens_per_byte = tokens_per_byte
+        self.token_margin = token_margin
+
+        self.batch_size = max_batch_size
+
+        self.logger = logging.getLogger(__name__)
+
+    def estimate_tokens(self, text: str):
+        return int(len(text.encode("utf-8")) * self.tokens_per_byte) + 1
+
+    def observe_usage(self, texts: list, used_tokens: int):
+        # what a batch really cost, the next batches are packed with that ratio
+        text_bytes = sum(len(text.encode("utf-8")) for text in texts)
+        if used_tokens and text_bytes:
+            self.tokens_per_byte = used_tokens / text_bytes * self.token_margin
+
+    def next_batch(self, texts: list, start: int):
+        batch = []
+        batch_tokens = 0
+        for index in range(start, len(texts)):
+            tokens = self.estimate_tokens(texts[index])
+            if len(batch) > 0 and (
+                len(batch) >= self.batch_size or
+                (self.max_batch_tokens and batch_tokens + tokens > self.max_batch_tokens)
+            ):
+                break
+
+            batch.append(index)
+            batch_tokens += tokens
+
+        return batch
+
+    def iter_batches(self, texts: list, embeddings: list, is_retryable: object = None,
+                           is_input_error: object = None):
+        """
+        The batching plan behind embed() and embed_async(). Yields (delay, batch_texts):
+        the caller waits delay seconds, makes the call and sends back
+        (vectors in input order, used tokens or None), or the exception it raised.
+        Vectors are written to embeddings as batches succeed.
+        """
+        position = 0
+        # sub-batches waiting for a retry, (indices, attempt, delay)
+        retries = []
+
+        while position < len(texts) or retries:
+            if retries:
+                indices, attempt, delay = retries.pop()
+            else:
+                indices, attempt, delay = self.next_batch(texts=texts, start=position), 0, 0
+                position = indices[-1] + 1
+
+            batch_texts = [texts[index] for index in indices]
+            result = yield delay, batch_texts
+            try:
+                if isinstance(result, Exception):
+                    raise result
+
+                vectors, used_tokens = result
+                if vectors is None or len(vectors) != len(indices):
+                    raise ValueError(f"expected {len(indices)} embeddings, got {len(vectors) if vectors else 0}")
+            except Exception as e:
+                if is_retryable is not None and is_retryable(e):
+                    if attempt < self.max_retries:
+                        retries.append((indices, attempt + 1, self.retry_backoff * 2 ** attempt))
+                    else:
+                        self.logger.error(f"Giving up on {len(indices)} texts after {attempt + 1} attempts: {e}")
+                    continue
+
+                # a wrong number of vectors is about this batch too, without a
+                # classifier every rejection is treated as one
+                if isinstance(result, Exception) and is_input_error is not None and not is_input_error(result):
+                    self.logger.error(f"Stopped embedding {len(texts)} texts, the provider refuses every call: {e}")
+                    return
+
+                if len(indices) > 1:
+                    self.batch_size = max(1, min(self.batch_size, len(indices) // 2))
+                    half = len(indices) // 2
+                    retries.append((indices[half:], 0, 0))
+                    retries.append((indices[:half], 0, 0))
+                    continue
+
+                self.logger.error(f"Could not embed text {indices[0]}: {e}")
+                continue
+
+            for index, vector in zip(indices, vectors):
+                embeddings[index] = vector
+
+            self.observe_usage(texts=batch_texts, used_tokens=used_tokens)
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+
+    def embed(self, texts: list, embed_batch: object, is_retryable: object = None,
+                    is_input_error: object = None):
+        """
+        embed_batch(batch_texts) makes one provider call and returns
+        (vectors in input order, used tokens or None).
+        is_retryable(error) tells transient errors from rejected requests,
+        is_input_error(error) the rejections caused by the batch's texts.
+        Returns one vector per text, in input order, None for the texts
+        that could not be embedded.
+        """
+        embeddings = [None] * len(texts)
+        batches = self.iter_batches(
+            texts=texts, embeddings=embeddings,
+            is_retryable=is_retryable, is_input_error=is_input_error
+        )
+
+        result = None
+        for delay, batch_texts in iter(lambda: batches.send(result), None):
+            if delay:
+                time.sleep(delay)
+            try:
+                result = embed_batch(batch_texts)
+            except Exception as e:
+                result = e
+
+        return embeddings
+
+    async def embed_async(self, texts: list, embed_batch: object, is_retryable: object = None,
+                                is_input_error: object = None):
+        # embed() with a coroutine embed_batch
+        embeddings = [None] * len(texts)
+        batches = self.iter_batches(
+            texts=texts, embeddings=embeddings,
+            is_retryable=is_retryable, is_input_error=is_input_error
+        )
+
+        result = None
+        for delay, batch_texts in iter(lambda: batches.send(result), None):
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                result = await embed_batch(batch_texts)
+            except Exception as e:
+                result = e
+
+        return embeddings
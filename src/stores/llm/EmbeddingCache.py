@@ -0,0 +1,232 @@
+from collections import OrderedDict
+from array import array
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+class EmbeddingCache:
+    """
+    Embeddings already paid for, kept on local disk across restarts.
+
+    Keys are 16 byte blake2b digests of the namespace (provider, model, size,
+    document type) and the text as sent to the provider, values float32 vectors.
+    They live in a sqlite file, evicted least recently used first once it
+    outgrows max_size bytes, behind an in-memory LRU of memory_size bytes.
+    Thread safe, so the async providers can reach it through asyncio.to_thread.
+    """
+
+    def __init__(self, cache_path: str, max_size: int, memory_size: int = 0,
+                       evict_ratio: float = 0.9):
+        self.cache_path = cache_path
+        self.max_size = max_size
+        self.memory_size = memory_size
+        # eviction frees down to this share of max_size, not a single entry per insert
+        self.evict_ratio = evict_ratio
+
+        self.memory = OrderedDict()
+        self.memory_used = 0
+        # keys served from memory, their last use is written with the next store
+        self.touched = set()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        self.conn = sqlite3.connect(cache_path, timeout=30, check_same_thread=False)
+        # losing the last writes on a crash only costs a few embeddings again
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, vector BLOB NOT NULL, used_at INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used_at ON embeddings (used_at)")
+        self.conn.commit()
+
+        self.size, self.entries = self.get_disk_usage()
+
+    def get_key(self, namespace: str, text: str):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(namespace.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def encode_vector(self, vector: list):
+        return array("f", vector).tobytes()
+
+    def decode_vector(self, data: bytes):
+        vector = array("f")
+        vector.frombytes(data)
+        return vector.tolist()
+
+    def get_disk_usage(self):
+        size, entries = self.conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(key) + LENGTH(vector)), 0), COUNT(*) FROM embeddings"
+        ).fetchone()
+        return size, entries
+
+    def remember(self, key: bytes, data: bytes):
+        if len(data) > self.memory_size:
+            return
+
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_used -= len(previous)
+
+        self.memory[key] = data
+        self.memory_used += len(data)
+
+        while self.memory_used > self.memory_size:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_used -= len(evicted)
+
+    def touch(self, keys: list):
+        # last use decides what eviction keeps
+        now = time.time_ns()
+        self.conn.executemany(
+            "UPDATE embeddings SET used_at = ? WHERE key = ?",
+            [(now, key) for key in keys]
+        )
+
+    def get_many(self, keys: list):
+        # one vector or None per key, in order
+        vectors = [None] * len(keys)
+        with self.lock:
+            disk_keys = {}
+            for index, key in enumerate(keys):
+                data = self.memory.get(key)
+                if data is None:
+                    disk_keys.setdefault(key, []).append(index)
+                    continue
+
+                self.memory.move_to_end(key)
+                self.touched.add(key)
+                self.memory_hits += 1
+                vectors[index] = self.decode_vector(data)
+
+            found = []
+            # sqlite caps the bound parameters of a statement
+            disk_key_list = list(disk_keys)
+            for start in range(0, len(disk_key_list), 500):
+                batch = disk_key_list[start:start + 500]
+                found.extend(self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall())
+
+            for key, data in found:
+                vector = self.decode_vector(data)
+                for index in disk_keys.pop(key):
+                    vectors[index] = vector
+                    self.disk_hits += 1
+                self.remember(key=key, data=data)
+
+            self.misses += sum(len(indices) for indices in disk_keys.values())
+
+            if found:
+                self.touch(keys=[key for key, _ in found])
+                self.conn.commit()
+
+        return vectors
+
+    def set_many(self, items: list):
+        # (key, vector) pairs, returned by the provider for keys get_many missed
+        with self.lock:
+            self.touch(keys=self.touched)
+            self.touched.clear()
+
+            now = time.time_ns()
+            for key, vector in items:
+                data = self.encode_vector(vector)
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, used_at) VALUES (?, ?, ?)",
+                    (key, data, now)
+                )
+                if cursor.rowcount > 0:
+                    self.size += len(key) + len(data)
+                    self.entries += 1
+                    self.stores += 1
+
+                self.remember(key=key, data=data)
+
+            self.conn.commit()
+
+            if self.size > self.max_size:
+                self.evict()
+
+    def evict(self):
+        # other workers write to the same file, count again before deleting
+        self.size, self.entries = self.get_disk_usage()
+        target = int(self.max_size * self.evict_ratio)
+
+        while self.size > target:
+            rows = self.conn.execute(
+                "SELECT key, LENGTH(key) + LENGTH(vector) FROM embeddings ORDER BY used_at LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+
+            evicted = []
+            for key, size in rows:
+                if self.size <= target:
+                    break
+                evicted.append((key,))
+                self.size -= size
+
+            self.conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+            self.conn.commit()
+
+            for (key,) in evicted:
+                data = self.memory.pop(key, None)
+                if data is not None:
+                    self.memory_used -= len(data)
+
+            self.entries -= len(evicted)
+            self.evictions += len(evicted)
+
+        self.logger.info(f"Embedding cache evicted down to {self.size} bytes, {self.entries} entries")
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM embeddings")
+            self.conn.commit()
+            self.conn.execute("VACUUM")
+            self.memory.clear()
+            self.memory_used = 0
+            self.touched.clear()
+            self.size, self.entries = 0, 0
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "size": self.size,
+            "max_size": self.max_size,
+            "entries": self.entries,
+            "memory_size": self.memory_used,
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        with self.lock:
+            self.touch(keys=self.touched)
+            self.touched.clear()
+            self.conn.commit()
+            self.conn.close()
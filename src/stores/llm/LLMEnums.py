@@ -1,8 +1,9 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 class LLMEnums(Enum):
     OPENAI = "OPENAI"
     COHERE = "COHERE"
+    LOCAL = "LOCAL" # offline, for benchmarks and tests
 
 class OpenAIEnums(Enum):
     SYSTEM = "system"
@@ -18,6 +19,11 @@ class CoHereEnums(Enum):
     QUERY = "search_query"
 
 
+class RequestPriorityEnum(IntEnum):
+    # lower goes first through the ProviderScheduler
+    INTERACTIVE = 0
+    BULK = 1
+
 class DocumentTypeEnum(Enum):
     DOCUMENT = "document"
     QUERY = "query"
\ No newline at end of file
@@ -19,6 +19,15 @@ class LLMInterface(ABC):
     def embed_text(self, text: str, document_type: str = None):
         pass
 
+    @abstractmethod
+    def embed_texts(self, texts: list, document_type: str = None):
+        # one embedding per text in input order, None for texts that failed
+        pass
+
+    def process_embedding_text(self, text: str):
+        # the text as the embedding call sends it, what cached vectors are keyed by
+        return text
+
     @abstractmethod
     def construct_prompt(self, prompt: str, role: str):
         pass
@@ -1,27 +1,115 @@
-
 from .LLMEnums import LLMEnums
-from .providers import OpenAIProvider, CoHereProvider
+from .EmbeddingCache import EmbeddingCache
+from .CachedEmbeddingProvider import CachedEmbeddingProvider, AsyncCachedEmbeddingProvider
+from .ProviderScheduler import ProviderScheduler
+from .ScheduledProvider import ScheduledProvider
+from . import providers
 
 class LLMProviderFactory:
-    def __init__(self, config: dict):
+    # providers are looked up on the package at create() time,
+    # so only the SDK of a configured backend is ever imported
+    def __init__(self, config: dict, embedding_cache: EmbeddingCache = None,
+                       scheduler: ProviderScheduler = None):
         self.config = config
+        # every provider created here embeds through it when set
+        self.embedding_cache = embedding_cache
+        # async providers only, cache hits don't take a slot or budget
+        self.scheduler = scheduler
+        self.http_client = None
 
     def create(self, provider: str):
+        client = None
         if provider == LLMEnums.OPENAI.value:
-            return OpenAIProvider(
+            client = providers.OpenAIProvider(
                 api_key = self.config.OPENAI_API_KEY,
                 api_url = self.config.OPENAI_API_URL,
                 default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                embedding_batch_size=self.config.EMBEDDING_BATCH_SIZE or 2048,
+                embedding_max_retries=self.config.EMBEDDING_MAX_RETRIES
             )
 
         if provider == LLMEnums.COHERE.value:
-            return CoHereProvider(
+            client = providers.CoHereProvider(
                 api_key = self.config.COHERE_API_KEY,
+                api_url = self.config.COHERE_API_URL,
                 default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
-                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                embedding_batch_size=self.config.EMBEDDING_BATCH_SIZE or 96,
+                embedding_max_retries=self.config.EMBEDDING_MAX_RETRIES
             )
 
-        return None
+        if provider == LLMEnums.LOCAL.value:
+            client = providers.LocalProvider(**self.get_local_provider_args())
+
+        if client is None or self.embedding_cache is None:
+            return client
+
+        return CachedEmbeddingProvider(provider=client, provider_name=provider, cache=self.embedding_cache)
+
+    def create_async(self, provider: str):
+        # AsyncLLMInterface providers for the event loop, all on one connection pool
+        client = None
+        if provider == LLMEnums.OPENAI.value:
+            client = providers.AsyncOpenAIProvider(
+                api_key = self.config.OPENAI_API_KEY,
+                api_url = self.config.OPENAI_API_URL,
+                default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
+                default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                embedding_batch_size=self.config.EMBEDDING_BATCH_SIZE or 2048,
+                embedding_max_retries=self.config.EMBEDDING_MAX_RETRIES,
+                http_client=self.get_http_client()
+            )
+
+        if provider == LLMEnums.COHERE.value:
+            client = providers.AsyncCoHereProvider(
+                api_key = self.config.COHERE_API_KEY,
+                api_url = self.config.COHERE_API_URL,
+                default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
+                default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
+                default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+                embedding_batch_size=self.config.EMBEDDING_BATCH_SIZE or 96,
+                embedding_max_retries=self.config.EMBEDDING_MAX_RETRIES,
+                http_client=self.get_http_client()
+            )
+
+        if provider == LLMEnums.LOCAL.value:
+            client = providers.AsyncLocalProvider(**self.get_local_provider_args())
+
+        if client is not None and self.scheduler is not None:
+            client = ScheduledProvider(provider=client, provider_name=provider, scheduler=self.scheduler)
+
+        if client is None or self.embedding_cache is None:
+            return client
+
+        return AsyncCachedEmbeddingProvider(provider=client, provider_name=provider, cache=self.embedding_cache)
+
+    def get_local_provider_args(self):
+        return dict(
+            default_input_max_characters=self.config.INPUT_DAFAULT_MAX_CHARACTERS,
+            default_generation_max_output_tokens=self.config.GENERATION_DAFAULT_MAX_TOKENS,
+            default_generation_temperature=self.config.GENERATION_DAFAULT_TEMPERATURE,
+            generation_response=self.config.LOCAL_GENERATION_RESPONSE
+        )
+
+    def get_http_client(self):
+        # created with the first async provider, it belongs to the running event loop
+        if self.http_client is None:
+            import httpx
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.config.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=self.config.LLM_HTTP_MAX_KEEPALIVE
+                ),
+                timeout=self.config.LLM_HTTP_TIMEOUT
+            )
+
+        return self.http_client
+
+    async def aclose(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
@@ -0,0 +1,235 @@
+from .LLMEnums import RequestPriorityEnum
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+# priority of the provider calls made from the current task, tasks inherit it
+current_priority = ContextVar("current_priority", default=None)
+
+@contextmanager
+def request_priority(priority: RequestPriorityEnum):
+    # with request_priority(RequestPriorityEnum.BULK): ... for background work
+    reset_token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(reset_token)
+
+def estimate_tokens(text: str):
+    # about 4 characters a token, close enough for a per-minute budget
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    per_minute units, 0 = unlimited. Only burst_seconds worth of them are
+    saved up: providers enforce their per minute limits over much shorter
+    windows, a minute's worth sent at once is mostly rejected.
+    """
+
+    def __init__(self, per_minute: int, burst_seconds: float = 1.0):
+        self.per_minute = per_minute
+        self.capacity = max(1.0, per_minute * burst_seconds / 60)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def get_delay(self, amount: int, now: float):
+        # seconds until amount can go, a request larger than the bucket waits for a full one
+        if not self.per_minute:
+            return 0
+
+        self.refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.per_minute)
+
+    def consume(self, amount: int, now: float):
+        # may go below zero, the next requests then wait for the debt to be repaid
+        if self.per_minute:
+            self.refill(now)
+            self.level -= amount
+
+
+class ProviderScheduler:
+    """
+    Shared gate for the provider calls of the app.
+
+    At most max_concurrency calls run at once. Each (provider, model) has a
+    requests per minute and a tokens per minute bucket. Waiting calls are
+    started by priority, then arrival order: interactive queries go before
+    queued bulk embeddings. Among the calls of one (provider, model), a call
+    waiting on its bucket holds back the lower ones.
+    Retryable errors are retried with full jitter exponential backoff, outside
+    of the concurrency pool.
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_minute: int = 0, tokens_per_minute: int = 0,
+                       max_retries: int = 3, retry_backoff: float = 1.0, max_backoff: float = 60.0,
+                       burst_seconds: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_seconds = burst_seconds
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+
+        # (priority, sequence, key, tokens, future, queued_at)
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.running = 0
+        self.buckets = {}
+
+        self.timer = None
+        self.timer_at = None
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.waits = {priority: [0, 0.0, 0.0] for priority in RequestPriorityEnum}
+
+        self.logger = logging.getLogger(__name__)
+
+    def get_buckets(self, key: tuple):
+        buckets = self.buckets.get(key)
+        if buckets is None:
+            buckets = self.buckets[key] = (
+                TokenBucket(per_minute=self.requests_per_minute, burst_seconds=self.burst_seconds),
+                TokenBucket(per_minute=self.tokens_per_minute, burst_seconds=self.burst_seconds)
+            )
+        return buckets
+
+    def dispatch(self):
+        now = time.monotonic()
+        blocked = set()
+        held = []
+        delay = None
+
+        while self.waiting and self.running < self.max_concurrency:
+            entry = heapq.heappop(self.waiting)
+            priority, _, key, tokens, future, queued_at = entry
+            if future.done():
+                # cancelled while waiting
+                continue
+
+            if key in blocked:
+                held.append(entry)
+                continue
+
+            request_bucket, token_bucket = self.get_buckets(key)
+            key_delay = max(request_bucket.get_delay(1, now), token_bucket.get_delay(tokens, now))
+            if key_delay > 0:
+                blocked.add(key)
+                held.append(entry)
+                delay = key_delay if delay is None else min(delay, key_delay)
+                continue
+
+            request_bucket.consume(1, now)
+            token_bucket.consume(tokens, now)
+            self.running += 1
+
+            waits = self.waits[priority]
+            waits[0] += 1
+            waits[1] += now - queued_at
+            waits[2] = max(waits[2], now - queued_at)
+            future.set_result(None)
+
+        for entry in held:
+            heapq.heappush(self.waiting, entry)
+
+        if delay is not None and (self.timer_at is None or now + delay < self.timer_at):
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer_at = now + delay
+            self.timer = asyncio.get_running_loop().call_later(delay, self.on_timer)
+
+    def on_timer(self):
+        self.timer = None
+        self.timer_at = None
+        self.dispatch()
+
+    async def acquire(self, key: tuple, tokens: int, priority: RequestPriorityEnum):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiting, (priority, next(self.sequence), key, tokens, future, time.monotonic()))
+        self.dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # granted just before the cancellation arrived, give the slot back
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.running -= 1
+        self.dispatch()
+
+    def get_backoff(self, attempt: int):
+        return random.uniform(0, min(self.max_backoff, self.retry_backoff * 2 ** attempt))
+
+    async def submit(self, key: tuple, call: object, tokens: int = 1,
+                           priority: RequestPriorityEnum = None, is_retryable: object = None):
+        """
+        Runs call(), a coroutine function, once the pool and the buckets of key
+        allow it. priority defaults to the one set by request_priority(), else
+        INTERACTIVE. is_retryable(error) picks the errors worth another attempt.
+        """
+        if priority is None:
+            priority = current_priority.get()
+        if priority is None:
+            priority = RequestPriorityEnum.INTERACTIVE
+        self.submitted += 1
+
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(key=key, tokens=tokens, priority=priority)
+            try:
+                result = await call()
+            except Exception as e:
+                if is_retryable is None or not is_retryable(e) or attempt == self.max_retries:
+                    self.failed += 1
+                    raise
+
+                self.retries += 1
+                delay = self.get_backoff(attempt)
+                self.logger.warning(f"Retrying {key[0]} call in {delay:.1f}s after: {e}")
+            else:
+                self.completed += 1
+                return result
+            finally:
+                self.release()
+
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        queued = {priority.name: 0 for priority in RequestPriorityEnum}
+        for priority, _, _, _, future, _ in self.waiting:
+            if not future.done():
+                queued[priority.name] += 1
+
+        return {
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+            "queued": queued,
+            "wait_seconds": {
+                priority.name: {
+                    "count": count,
+                    "mean": total / count if count else 0.0,
+                    "max": longest
+                }
+                for priority, (count, total, longest) in self.waits.items()
+            },
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries
+        }
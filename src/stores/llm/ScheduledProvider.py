@@ -0,0 +1,95 @@
+from .AsyncLLMInterface import AsyncLLMInterface
+from .ProviderScheduler import ProviderScheduler, estimate_tokens
+
+class ScheduledProvider(AsyncLLMInterface):
+    """
+    An async provider whose remote calls go through a ProviderScheduler,
+    budgeted under (provider_name, model id) with an estimate of their tokens.
+    The priority comes from request_priority() around the caller.
+    Providers that batch embeddings (use_scheduler) hand every batch call to
+    the scheduler and leave the retries to it.
+    """
+
+    def __init__(self, provider: AsyncLLMInterface, provider_name: str, scheduler: ProviderScheduler):
+        self.provider = provider
+        self.provider_name = provider_name
+        self.scheduler = scheduler
+
+        use_scheduler = getattr(provider, "use_scheduler", None)
+        self.schedules_batches = use_scheduler is not None
+        if use_scheduler is not None:
+            use_scheduler(submit_batch=self.submit_embed_batch)
+
+    @property
+    def generation_model_id(self):
+        return self.provider.generation_model_id
+
+    @property
+    def embedding_model_id(self):
+        return self.provider.embedding_model_id
+
+    @property
+    def embedding_size(self):
+        return self.provider.embedding_size
+
+    def set_generation_model(self, model_id: str):
+        self.provider.set_generation_model(model_id=model_id)
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.provider.set_embedding_model(model_id=model_id, embedding_size=embedding_size)
+
+    def is_retryable_error(self, error: Exception):
+        is_retryable = getattr(self.provider, "is_retryable_error", None)
+        return is_retryable is not None and is_retryable(error)
+
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                  temperature: float = None):
+        # prompt, history and the longest answer allowed
+        tokens = estimate_tokens(prompt) + (max_output_tokens or self.provider.default_generation_max_output_tokens)
+        for message in chat_history or []:
+            tokens += estimate_tokens(str(message))
+
+        return await self.scheduler.submit(
+            key=(self.provider_name, self.generation_model_id),
+            call=lambda: self.provider.generate_text(
+                prompt=prompt, chat_history=chat_history,
+                max_output_tokens=max_output_tokens, temperature=temperature
+            ),
+            tokens=tokens,
+            is_retryable=self.is_retryable_error
+        )
+
+    async def embed_text(self, text: str, document_type: str = None):
+        return await self.scheduler.submit(
+            key=(self.provider_name, self.embedding_model_id),
+            call=lambda: self.provider.embed_text(text=text, document_type=document_type),
+            tokens=estimate_tokens(text),
+            is_retryable=self.is_retryable_error
+        )
+
+    async def submit_embed_batch(self, embed_batch: object, texts: list):
+        # one provider call of embed_texts(), with its own slot and budget
+        return await self.scheduler.submit(
+            key=(self.provider_name, self.embedding_model_id),
+            call=lambda: embed_batch(texts),
+            tokens=sum(estimate_tokens(text) for text in texts),
+            is_retryable=self.is_retryable_error
+        )
+
+    async def embed_texts(self, texts: list, document_type: str = None):
+        if self.schedules_batches:
+            return await self.provider.embed_texts(texts=texts, document_type=document_type)
+
+        # a provider that doesn't batch makes the whole call in one slot
+        return await self.scheduler.submit(
+            key=(self.provider_name, self.embedding_model_id),
+            call=lambda: self.provider.embed_texts(texts=texts, document_type=document_type),
+            tokens=sum(estimate_tokens(text) for text in texts),
+            is_retryable=self.is_retryable_error
+        )
+
+    def process_embedding_text(self, text: str):
+        return self.provider.process_embedding_text(text)
+
+    def construct_prompt(self, prompt: str, role: str):
+        return self.provider.construct_prompt(prompt=prompt, role=role)
@@ -0,0 +1,175 @@
+from ..AsyncLLMInterface import AsyncLLMInterface
+from ..LLMEnums import CoHereEnums, DocumentTypeEnum
+from ..EmbeddingBatcher import EmbeddingBatcher
+from functools import partial
+import cohere
+import httpx
+import logging
+
+class AsyncCoHereProvider(AsyncLLMInterface):
+    """
+    CoHereProvider over cohere.AsyncClient, sending its requests through the
+    pooled http_client shared by every async provider of the app.
+    """
+
+    def __init__(self, api_key: str, api_url: str=None,
+                       default_input_max_characters: int=1000,
+                       default_generation_max_output_tokens: int=1000,
+                       default_generation_temperature: float=0.1,
+                       embedding_batch_size: int=96, embedding_max_retries: int=3,
+                       http_client: httpx.AsyncClient=None):
+
+        self.api_key = api_key
+        self.api_url = api_url
+
+        self.default_input_max_characters = default_input_max_characters
+        self.default_generation_max_output_tokens = default_generation_max_output_tokens
+        self.default_generation_temperature = default_generation_temperature
+
+        self.generation_model_id = None
+
+        self.embedding_model_id = None
+        self.embedding_size = None
+
+        self.client = cohere.AsyncClient(
+            api_key=self.api_key,
+            base_url=self.api_url,
+            httpx_client=http_client
+        )
+
+        self.embedding_batcher = EmbeddingBatcher(
+            max_batch_size=embedding_batch_size,
+            max_retries=embedding_max_retries
+        )
+        # set by use_scheduler(), embed_batch calls then go through it
+        self.submit_batch = None
+
+        self.logger = logging.getLogger(__name__)
+
+    def use_scheduler(self, submit_batch: object):
+        """
+        Hands retries over to a ProviderScheduler: the batcher stops retrying
+        (the SDK only retries when asked to per request) and every embed_batch
+        call goes through submit_batch(embed_batch, texts).
+        """
+        self.submit_batch = submit_batch
+        self.embedding_batcher.max_retries = 0
+
+    def set_generation_model(self, model_id: str):
+        self.generation_model_id = model_id
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.embedding_model_id = model_id
+        self.embedding_size = embedding_size
+
+    def process_text(self, text: str):
+        return text[:self.default_input_max_characters].strip()
+
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                  temperature: float = None):
+
+        if not self.client:
+            self.logger.error("CoHere client was not set")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for CoHere was not set")
+            return None
+
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        response = await self.client.chat(
+            model = self.generation_model_id,
+            chat_history = chat_history if chat_history is not None else [],
+            message = self.process_text(prompt),
+            temperature = temperature,
+            max_tokens = max_output_tokens
+        )
+
+        if not response or not response.text:
+            self.logger.error("Error while generating text with CoHere")
+            return None
+
+        return response.text
+
+    async def embed_text(self, text: str, document_type: str = None):
+        if not self.client:
+            self.logger.error("CoHere client was not set")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for CoHere was not set")
+            return None
+
+        response = await self.client.embed(
+            model = self.embedding_model_id,
+            texts = [self.process_embedding_text(text)],
+            input_type = self.get_input_type(document_type),
+            embedding_types=['float'],
+        )
+
+        if not response or not response.embeddings or not response.embeddings.float:
+            self.logger.error("Error while embedding text with CoHere")
+            return None
+
+        return response.embeddings.float[0]
+
+    def process_embedding_text(self, text: str):
+        return self.process_text(text)
+
+    def get_input_type(self, document_type: str = None):
+        if document_type in [DocumentTypeEnum.QUERY, DocumentTypeEnum.QUERY.value]:
+            return CoHereEnums.QUERY.value
+        return CoHereEnums.DOCUMENT.value
+
+    async def embed_texts(self, texts: list, document_type: str = None):
+        if not self.client:
+            self.logger.error("CoHere client was not set")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for CoHere was not set")
+            return None
+
+        embed_batch = partial(self.embed_batch, input_type=self.get_input_type(document_type))
+        if self.submit_batch is not None:
+            embed_batch = partial(self.submit_batch, embed_batch)
+
+        return await self.embedding_batcher.embed_async(
+            texts=[self.process_embedding_text(text) for text in texts],
+            embed_batch=embed_batch,
+            is_retryable=self.is_retryable_error,
+            is_input_error=self.is_input_error
+        )
+
+    async def embed_batch(self, texts: list, input_type: str):
+        response = await self.client.embed(
+            model = self.embedding_model_id,
+            texts = texts,
+            input_type = input_type,
+            embedding_types=['float'],
+        )
+
+        if not response or not response.embeddings or not response.embeddings.float:
+            return None, None
+
+        billed_units = response.meta.billed_units if response.meta else None
+        return response.embeddings.float, billed_units.input_tokens if billed_units else None
+
+    def is_retryable_error(self, error: Exception):
+        return isinstance(error, (
+            cohere.TooManyRequestsError, cohere.ServiceUnavailableError,
+            cohere.GatewayTimeoutError, cohere.InternalServerError,
+            httpx.TimeoutException, httpx.NetworkError
+        ))
+
+    def is_input_error(self, error: Exception):
+        # 400 covers texts over the context length, 401/403/404 fail every batch
+        return isinstance(error, (cohere.BadRequestError, cohere.UnprocessableEntityError))
+
+    def construct_prompt(self, prompt: str, role: str):
+        return {
+            "role": role,
+            "text": self.process_text(prompt)
+        }
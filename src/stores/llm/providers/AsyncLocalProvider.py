@@ -0,0 +1,47 @@
+from ..AsyncLLMInterface import AsyncLLMInterface
+from .LocalProvider import LocalProvider
+
+class AsyncLocalProvider(AsyncLLMInterface):
+    """
+    LocalProvider behind the async interface. Its work is a few
+    microseconds of CPU per text, so it runs inline on the event loop.
+    """
+
+    def __init__(self, **kwargs):
+        self.provider = LocalProvider(**kwargs)
+
+    @property
+    def generation_model_id(self):
+        return self.provider.generation_model_id
+
+    @property
+    def default_generation_max_output_tokens(self):
+        return self.provider.default_generation_max_output_tokens
+
+    @property
+    def embedding_model_id(self):
+        return self.provider.embedding_model_id
+
+    @property
+    def embedding_size(self):
+        return self.provider.embedding_size
+
+    def set_generation_model(self, model_id: str):
+        self.provider.set_generation_model(model_id=model_id)
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.provider.set_embedding_model(model_id=model_id, embedding_size=embedding_size)
+
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                  temperature: float = None):
+        return self.provider.generate_text(prompt=prompt, chat_history=chat_history,
+                                           max_output_tokens=max_output_tokens, temperature=temperature)
+
+    async def embed_text(self, text: str, document_type: str = None):
+        return self.provider.embed_text(text=text, document_type=document_type)
+
+    async def embed_texts(self, texts: list, document_type: str = None):
+        return self.provider.embed_texts(texts=texts, document_type=document_type)
+
+    def construct_prompt(self, prompt: str, role: str):
+        return self.provider.construct_prompt(prompt=prompt, role=role)
@@ -0,0 +1,172 @@
+from ..AsyncLLMInterface import AsyncLLMInterface
+from ..LLMEnums import OpenAIEnums
+from ..EmbeddingBatcher import EmbeddingBatcher
+from openai import (
+    AsyncOpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError,
+    BadRequestError, UnprocessableEntityError
+)
+from functools import partial
+import httpx
+import logging
+
+class AsyncOpenAIProvider(AsyncLLMInterface):
+    """
+    OpenAIProvider over AsyncOpenAI. http_client is the pooled client shared by
+    every async provider of the app (LLMProviderFactory owns and closes it),
+    so calls reuse warm connections instead of opening a pool per provider.
+    """
+
+    def __init__(self, api_key: str, api_url: str=None,
+                       default_input_max_characters: int=1000,
+                       default_generation_max_output_tokens: int=1000,
+                       default_generation_temperature: float=0.1,
+                       embedding_batch_size: int=2048, embedding_batch_tokens: int=300000,
+                       embedding_max_retries: int=3,
+                       http_client: httpx.AsyncClient=None):
+
+        self.api_key = api_key
+        self.api_url = api_url
+
+        self.default_input_max_characters = default_input_max_characters
+        self.default_generation_max_output_tokens = default_generation_max_output_tokens
+        self.default_generation_temperature = default_generation_temperature
+
+        self.generation_model_id = None
+
+        self.embedding_model_id = None
+        self.embedding_size = None
+
+        self.client = AsyncOpenAI(
+            api_key = self.api_key,
+            base_url = self.api_url,
+            http_client = http_client
+        )
+
+        self.embedding_batcher = EmbeddingBatcher(
+            max_batch_size=embedding_batch_size,
+            max_batch_tokens=embedding_batch_tokens,
+            max_retries=embedding_max_retries
+        )
+        # set by use_scheduler(), embed_batch calls then go through it
+        self.submit_batch = None
+
+        self.logger = logging.getLogger(__name__)
+
+    def use_scheduler(self, submit_batch: object):
+        """
+        Hands retries over to a ProviderScheduler: the SDK and the batcher stop
+        retrying, so a failing call is not retried by three layers at once, and
+        every embed_batch call goes through submit_batch(embed_batch, texts).
+        """
+        self.submit_batch = submit_batch
+        self.embedding_batcher.max_retries = 0
+        self.client = self.client.with_options(max_retries=0)
+
+    def set_generation_model(self, model_id: str):
+        self.generation_model_id = model_id
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.embedding_model_id = model_id
+        self.embedding_size = embedding_size
+
+    def process_text(self, text: str):
+        return text[:self.default_input_max_characters].strip()
+
+    async def generate_text(self, prompt: str, chat_history: list=None, max_output_tokens: int=None,
+                                  temperature: float = None):
+
+        if not self.client:
+            self.logger.error("OpenAI client was not set")
+            return None
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for OpenAI was not set")
+            return None
+
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        # a new list, the scheduler may call again with the caller's history
+        messages = list(chat_history or []) + [
+            self.construct_prompt(prompt=prompt, role=OpenAIEnums.USER.value)
+        ]
+
+        response = await self.client.chat.completions.create(
+            model = self.generation_model_id,
+            messages = messages,
+            max_tokens = max_output_tokens,
+            temperature = temperature
+        )
+
+        if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
+            self.logger.error("Error while generating text with OpenAI")
+            return None
+
+        return response.choices[0].message.content
+
+    async def embed_text(self, text: str, document_type: str = None):
+
+        if not self.client:
+            self.logger.error("OpenAI client was not set")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for OpenAI was not set")
+            return None
+
+        response = await self.client.embeddings.create(
+            model = self.embedding_model_id,
+            input = text,
+        )
+
+        if not response or not response.data or len(response.data) == 0 or not response.data[0].embedding:
+            self.logger.error("Error while embedding text with OpenAI")
+            return None
+
+        return response.data[0].embedding
+
+    async def embed_texts(self, texts: list, document_type: str = None):
+
+        if not self.client:
+            self.logger.error("OpenAI client was not set")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for OpenAI was not set")
+            return None
+
+        embed_batch = self.embed_batch
+        if self.submit_batch is not None:
+            embed_batch = partial(self.submit_batch, embed_batch)
+
+        return await self.embedding_batcher.embed_async(
+            texts=texts,
+            embed_batch=embed_batch,
+            is_retryable=self.is_retryable_error,
+            is_input_error=self.is_input_error
+        )
+
+    async def embed_batch(self, texts: list):
+        response = await self.client.embeddings.create(
+            model = self.embedding_model_id,
+            input = texts,
+        )
+
+        if not response or not response.data:
+            return None, None
+
+        vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        return vectors, response.usage.prompt_tokens if response.usage else None
+
+    def is_retryable_error(self, error: Exception):
+        return isinstance(error, (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError))
+
+    def is_input_error(self, error: Exception):
+        # 400 covers texts over the context length, 401/403/404 fail every batch
+        return isinstance(error, (BadRequestError, UnprocessableEntityError))
+
+    def construct_prompt(self, prompt: str, role: str):
+        return {
+            "role": role,
+            "content": self.process_text(prompt)
+        }
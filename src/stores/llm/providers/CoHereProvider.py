@@ -1,16 +1,21 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import CoHereEnums, DocumentTypeEnum
+from ..EmbeddingBatcher import EmbeddingBatcher
+from functools import partial
 import cohere
+import httpx
 import logging
 
 class CoHereProvider(LLMInterface):
 
-    def __init__(self, api_key: str,
+    def __init__(self, api_key: str, api_url: str=None,
                        default_input_max_characters: int=1000,
                        default_generation_max_output_tokens: int=1000,
-                       default_generation_temperature: float=0.1):
+                       default_generation_temperature: float=0.1,
+                       embedding_batch_size: int=96, embedding_max_retries: int=3):
         
         self.api_key = api_key
+        self.api_url = api_url
 
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
@@ -21,7 +26,13 @@ class CoHereProvider(LLMInterface):
         self.embedding_model_id = None
         self.embedding_size = None
 
-        self.client = cohere.Client(api_key=self.api_key)
+        self.client = cohere.Client(api_key=self.api_key, base_url=self.api_url)
+
+        # embed takes up to 96 texts per call, each one is truncated server side
+        self.embedding_batcher = EmbeddingBatcher(
+            max_batch_size=embedding_batch_size,
+            max_retries=embedding_max_retries
+        )
 
         self.logger = logging.getLogger(__name__)
 
@@ -72,14 +83,10 @@ class CoHereProvider(LLMInterface):
             self.logger.error("Embedding model for CoHere was not set")
             return None
         
-        input_type = CoHereEnums.DOCUMENT
-        if document_type == DocumentTypeEnum.QUERY:
-            input_type = CoHereEnums.QUERY
-
         response = self.client.embed(
             model = self.embedding_model_id,
-            texts = [self.process_text(text)],
-            input_type = input_type,
+            texts = [self.process_embedding_text(text)],
+            input_type = self.get_input_type(document_type),
             embedding_types=['float'],
         )
 
@@ -88,6 +95,55 @@ class CoHereProvider(LLMInterface):
             return None
         
         return response.embeddings.float[0]
+
+    def process_embedding_text(self, text: str):
+        return self.process_text(text)
+
+    def get_input_type(self, document_type: str = None):
+        if document_type in [DocumentTypeEnum.QUERY, DocumentTypeEnum.QUERY.value]:
+            return CoHereEnums.QUERY.value
+        return CoHereEnums.DOCUMENT.value
+
+    def embed_texts(self, texts: list, document_type: str = None):
+        if not self.client:
+            self.logger.error("CoHere client was not set")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for CoHere was not set")
+            return None
+
+        return self.embedding_batcher.embed(
+            texts=[self.process_embedding_text(text) for text in texts],
+            embed_batch=partial(self.embed_batch, input_type=self.get_input_type(document_type)),
+            is_retryable=self.is_retryable_error,
+            is_input_error=self.is_input_error
+        )
+
+    def embed_batch(self, texts: list, input_type: str):
+        response = self.client.embed(
+            model = self.embedding_model_id,
+            texts = texts,
+            input_type = input_type,
+            embedding_types=['float'],
+        )
+
+        if not response or not response.embeddings or not response.embeddings.float:
+            return None, None
+
+        billed_units = response.meta.billed_units if response.meta else None
+        return response.embeddings.float, billed_units.input_tokens if billed_units else None
+
+    def is_retryable_error(self, error: Exception):
+        return isinstance(error, (
+            cohere.TooManyRequestsError, cohere.ServiceUnavailableError,
+            cohere.GatewayTimeoutError, cohere.InternalServerError,
+            httpx.TimeoutException, httpx.NetworkError
+        ))
+
+    def is_input_error(self, error: Exception):
+        # 400 covers texts over the context length, 401/403/404 fail every batch
+        return isinstance(error, (cohere.BadRequestError, cohere.UnprocessableEntityError))
     
     def construct_prompt(self, prompt: str, role: str):
         return {
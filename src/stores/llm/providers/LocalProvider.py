@@ -0,0 +1,137 @@
+from ..LLMInterface import LLMInterface
+from itertools import chain
+import numpy as np
+import logging
+import re
+import zlib
+
+class LocalProvider(LLMInterface):
+    """
+    Offline provider for benchmarks and tests: no network, no API key.
+
+    Embeddings are feature hashed. Every lowercased word of the text is hashed
+    (crc32 seeded with the model id) to a position and a sign in an
+    embedding_size vector, and the sums are L2 normalized. The same text gets
+    the same vector in every process, and texts sharing words get close ones,
+    so retrieval over them still ranks sensibly.
+    Generation is extractive, the leading sentences of the prompt, unless a
+    canned generation_response is set.
+    """
+
+    token_pattern = re.compile(r"\w+")
+    sentence_pattern = re.compile(r"(?<=[.!?])\s+")
+
+    def __init__(self, default_input_max_characters: int=1000,
+                       default_generation_max_output_tokens: int=1000,
+                       default_generation_temperature: float=0.1,
+                       generation_response: str=None, max_cached_tokens: int=1000000):
+
+        self.default_input_max_characters = default_input_max_characters
+        self.default_generation_max_output_tokens = default_generation_max_output_tokens
+        self.default_generation_temperature = default_generation_temperature
+        self.generation_response = generation_response
+
+        self.generation_model_id = None
+
+        self.embedding_model_id = None
+        self.embedding_size = None
+
+        # word -> crc32, the vocabulary of a corpus is small next to its word count
+        self.token_hashes = {}
+        self.max_cached_tokens = max_cached_tokens
+        self.seed = 0
+
+        self.logger = logging.getLogger(__name__)
+
+    def set_generation_model(self, model_id: str):
+        self.generation_model_id = model_id
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.embedding_model_id = model_id
+        self.embedding_size = embedding_size
+
+        # another model id, another hashing of the same words
+        self.seed = zlib.crc32(model_id.encode("utf-8")) if model_id else 0
+        self.token_hashes = {}
+
+    def process_text(self, text: str):
+        return text[:self.default_input_max_characters].strip()
+
+    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                            temperature: float = None):
+
+        if not self.generation_model_id:
+            self.logger.error("Generation model for Local was not set")
+            return None
+
+        if self.generation_response:
+            return self.generation_response
+
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+
+        # whole sentences while they fit, words counted as tokens
+        words = []
+        for sentence in self.sentence_pattern.split(self.process_text(prompt)):
+            sentence_words = sentence.split()
+            if len(words) + len(sentence_words) > max_output_tokens:
+                if not words:
+                    words = sentence_words[:max_output_tokens]
+                break
+            words += sentence_words
+
+        return " ".join(words)
+
+    def get_token_hashes(self, tokens: list):
+        # looked up in bulk, only words never seen before are hashed one by one
+        try:
+            return list(map(self.token_hashes.__getitem__, tokens))
+        except KeyError:
+            pass
+
+        new_tokens = set(tokens).difference(self.token_hashes)
+        if len(self.token_hashes) + len(new_tokens) > self.max_cached_tokens:
+            self.token_hashes.clear()
+            new_tokens = set(tokens)
+
+        for token in new_tokens:
+            self.token_hashes[token] = zlib.crc32(token.encode("utf-8"), self.seed)
+
+        return list(map(self.token_hashes.__getitem__, tokens))
+
+    def embed_text(self, text: str, document_type: str = None):
+        vectors = self.embed_texts(texts=[text], document_type=document_type)
+        return vectors[0] if vectors else None
+
+    def embed_texts(self, texts: list, document_type: str = None):
+
+        if not self.embedding_model_id or not self.embedding_size:
+            self.logger.error("Embedding model for Local was not set")
+            return None
+
+        if len(texts) == 0:
+            return []
+
+        text_tokens = [self.token_pattern.findall(text.lower()) for text in texts]
+        hashes = np.array(
+            self.get_token_hashes(list(chain.from_iterable(text_tokens))),
+            dtype=np.int64
+        )
+        rows = np.repeat(np.arange(len(texts)), [len(tokens) for tokens in text_tokens])
+
+        # the low bit picks the sign, so colliding words tend to cancel out
+        positions = rows * self.embedding_size + (hashes >> 1) % self.embedding_size
+        signs = np.where(hashes & 1, 1.0, -1.0)
+        vectors = np.bincount(
+            positions, weights=signs, minlength=len(texts) * self.embedding_size
+        ).reshape(len(texts), self.embedding_size)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1.0, norms)
+
+        return vectors.astype(np.float32).tolist()
+
+    def construct_prompt(self, prompt: str, role: str):
+        return {
+            "role": role,
+            "content": self.process_text(prompt)
+        }
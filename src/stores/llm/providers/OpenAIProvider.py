@@ -1,6 +1,10 @@
 from ..LLMInterface import LLMInterface
 from ..LLMEnums import OpenAIEnums
-from openai import OpenAI
+from ..EmbeddingBatcher import EmbeddingBatcher
+from openai import (
+    OpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError,
+    BadRequestError, UnprocessableEntityError
+)
 import logging
 
 class OpenAIProvider(LLMInterface):
@@ -8,7 +12,9 @@ class OpenAIProvider(LLMInterface):
     def __init__(self, api_key: str, api_url: str=None,
                        default_input_max_characters: int=1000,
                        default_generation_max_output_tokens: int=1000,
-                       default_generation_temperature: float=0.1):
+                       default_generation_temperature: float=0.1,
+                       embedding_batch_size: int=2048, embedding_batch_tokens: int=300000,
+                       embedding_max_retries: int=3):
         
         self.api_key = api_key
         self.api_url = api_url
@@ -24,7 +30,14 @@ class OpenAIProvider(LLMInterface):
 
         self.client = OpenAI(
             api_key = self.api_key,
-            api_url = self.api_url
+            base_url = self.api_url
+        )
+
+        # the embeddings endpoint takes up to 2048 inputs and 300k tokens per request
+        self.embedding_batcher = EmbeddingBatcher(
+            max_batch_size=embedding_batch_size,
+            max_batch_tokens=embedding_batch_tokens,
+            max_retries=embedding_max_retries
         )
 
         self.logger = logging.getLogger(__name__)
@@ -68,7 +81,7 @@ class OpenAIProvider(LLMInterface):
             self.logger.error("Error while generating text with OpenAI")
             return None
 
-        return response.choices[0].message["content"]
+        return response.choices[0].message.content
 
 
     def embed_text(self, text: str, document_type: str = None):
@@ -92,6 +105,43 @@ class OpenAIProvider(LLMInterface):
 
         return response.data[0].embedding
 
+    def embed_texts(self, texts: list, document_type: str = None):
+
+        if not self.client:
+            self.logger.error("OpenAI client was not set")
+            return None
+
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for OpenAI was not set")
+            return None
+
+        return self.embedding_batcher.embed(
+            texts=texts,
+            embed_batch=self.embed_batch,
+            is_retryable=self.is_retryable_error,
+            is_input_error=self.is_input_error
+        )
+
+    def embed_batch(self, texts: list):
+        response = self.client.embeddings.create(
+            model = self.embedding_model_id,
+            input = texts,
+        )
+
+        if not response or not response.data:
+            return None, None
+
+        # every item carries the position of its input
+        vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        return vectors, response.usage.prompt_tokens if response.usage else None
+
+    def is_retryable_error(self, error: Exception):
+        return isinstance(error, (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError))
+
+    def is_input_error(self, error: Exception):
+        # 400 covers texts over the context length, 401/403/404 fail every batch
+        return isinstance(error, (BadRequestError, UnprocessableEntityError))
+
     def construct_prompt(self, prompt: str, role: str):
         return {
             "role": role,
@@ -1,2 +1,24 @@
-from .CoHereProvider import CoHereProvider
-from .OpenAIProvider import OpenAIProvider
+import importlib
+
+# provider class -> its module, imported on first access: the vendor SDKs
+# take seconds to import (cohere pulls in boto3 and sagemaker) and a
+# process only ever uses the backends it is configured with
+PROVIDERS = {
+    "OpenAIProvider": ".OpenAIProvider",
+    "CoHereProvider": ".CoHereProvider",
+    "AsyncOpenAIProvider": ".AsyncOpenAIProvider",
+    "AsyncCoHereProvider": ".AsyncCoHereProvider",
+    "LocalProvider": ".LocalProvider",
+    "AsyncLocalProvider": ".AsyncLocalProvider",
+}
+
+__all__ = list(PROVIDERS)
+
+def __getattr__(name: str):
+    if name not in PROVIDERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    provider_class = getattr(importlib.import_module(PROVIDERS[name], __name__), name)
+    # importing the submodule bound its name on the package, the class replaces it
+    globals()[name] = provider_class
+    return provider_class
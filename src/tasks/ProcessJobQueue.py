@@ -0,0 +1,749 @@
+from controllers import ProcessController
+from models import ProcessJobEnum, SplitterEnum
+from models.ProcessJobModel import ProcessJobModel
+from models.ChunkModel import ChunkModel
+from models.AssetModel import AssetModel
+from models.ProjectModel import ProjectModel
+from models.db_schemes import DataChunk
+from stores.llm.AsyncLLMInterface import AsyncLLMInterface
+from stores.llm.ProviderScheduler import request_priority
+from stores.llm.LLMEnums import RequestPriorityEnum, DocumentTypeEnum
+from helpers.parsing_engine import ParsingEngine
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing
+from collections import deque
+from datetime import datetime, timezone, timedelta
+import asyncio
+import logging
+import socket
+import uuid
+
+class ProcessJobQueue:
+    """
+    In-process job queue for /process.
+    The route only records the job and puts its id on a bounded asyncio.Queue,
+    a fixed pool of worker tasks runs load -> split -> insert for every asset
+    and the blocking loader/splitter calls run in the parsing engine's worker
+    processes (or a thread without one) so the event loop keeps serving other requests.
+    With an embedding_client every insert batch is embedded before it is written,
+    in the scheduler's bulk lane so queries on the same provider go first.
+    Every job the queue holds is claimed in Mongo under owner_id and the claim
+    is renewed every job_lease / 3 seconds, so several app instances can share
+    the jobs collection and only take over the jobs of an instance that stopped.
+    Jobs of one project run one after the other, on any instance: the project
+    is claimed the same way while its jobs run, a job of a busy project waits
+    in pending_jobs without holding a worker.
+    """
+
+    def __init__(self, db_client: object, workers: int = 2, max_size: int = 100,
+                       insert_batch_size: int = 100, parsing_engine: ParsingEngine = None,
+                       pages_per_task: int = 20, text_segment_size: int = 65536,
+                       gc_batch_size: int = 1000, gc_pause: float = 0.1,
+                       asset_concurrency: int = 4, insert_max_in_flight: int = 4,
+                       page_cache: bool = True, parallel_min_pages: int = 0,
+                       pages_per_range: int = 100, embedding_client: AsyncLLMInterface = None,
+                       job_lease: int = 60):
+        self.db_client = db_client
+        self.parsing_engine = parsing_engine
+        self.pages_per_task = pages_per_task
+        self.text_segment_size = text_segment_size
+        self.page_cache = page_cache
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_range = pages_per_range
+        self.workers = workers
+        self.insert_batch_size = insert_batch_size
+        self.insert_max_in_flight = insert_max_in_flight
+        self.gc_batch_size = gc_batch_size
+        self.gc_pause = gc_pause
+        self.asset_concurrency = asset_concurrency
+        self.embedding_client = embedding_client
+        self.job_lease = job_lease
+        self.owner_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self.worker_tasks = []
+        self.heartbeat_task = None
+        self.gc_tasks = set()
+        # job ids known to be cancelled, saves a lookup of the persisted flag
+        self.cancelled_jobs = set()
+        # projects a worker of this queue runs jobs of
+        self.running_projects = set()
+        # project id -> ids of claimed jobs waiting for the project to be free
+        self.pending_jobs = {}
+
+        self.logger = logging.getLogger('uvicorn.error')
+
+    async def start(self, job_model: ProcessJobModel = None, chunk_model: ChunkModel = None,
+                          asset_model: AssetModel = None, project_model: ProjectModel = None):
+        # share the app's models, indexes are already in place (IndexManager at startup)
+        self.job_model = job_model if job_model else ProcessJobModel(db_client=self.db_client)
+        self.chunk_model = chunk_model if chunk_model else ChunkModel(db_client=self.db_client)
+        self.asset_model = asset_model if asset_model else AssetModel(db_client=self.db_client)
+        self.project_model = project_model if project_model else ProjectModel(db_client=self.db_client)
+
+        # read before any job can allocate a generation, the sweep must not
+        # take a reset that starts now for one that never finished. The claimed
+        # jobs are read after the projects: a reset of another instance that
+        # allocated a generation up to the latest one read is among them
+        projects = await self.project_model.get_projects_with_generations()
+        running_jobs = await self.job_model.get_claimed_jobs(job_statuses=[ProcessJobEnum.RUNNING.value])
+        self.track_gc_task(asyncio.create_task(
+            self.collect_stale_generations(projects=projects, running_jobs=running_jobs)
+        ))
+
+        for worker_no in range(self.workers):
+            self.worker_tasks.append(
+                asyncio.create_task(self._worker(worker_no))
+            )
+
+        await self.recover_jobs()
+        self.heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def collect_stale_generations(self, projects: list, running_jobs: list = None):
+        """
+        Generations are collected by background tasks that a restart loses,
+        whatever they left behind is deleted once at startup. Generations that
+        running_jobs (resets with a live claim, on any instance) are still
+        building are left to their job.
+        """
+        building_generations = {}
+        # resets that are running but haven't recorded their generation yet
+        unknown_generation_projects = set()
+        for job in running_jobs or []:
+            if job.job_config.get("do_reset") != 1:
+                continue
+            if job.job_generation is None:
+                unknown_generation_projects.add(job.job_project_id)
+                continue
+            building_generations.setdefault(job.job_project_id, []).append(job.job_generation)
+
+        for project in projects:
+            if project.id in unknown_generation_projects:
+                self.logger.info(f"Skipped the stale generations of project {project.id}, a reset is starting")
+                continue
+
+            deleted_count = await self.chunk_model.delete_stale_generation_chunks(
+                project_id=project.id,
+                active_generation=project.project_active_generation,
+                latest_generation=project.project_latest_generation,
+                batch_size=self.gc_batch_size,
+                pause=self.gc_pause,
+                except_generations=building_generations.get(project.id)
+            )
+            if deleted_count > 0:
+                self.logger.info(f"Deleted {deleted_count} chunks of stale generations of project {project.id}")
+
+    async def recover_jobs(self):
+        """
+        Jobs still queued or running with no live claim belong to an instance
+        that stopped before finishing them, they are claimed and queued here.
+        Rerunning is safe: an asset's chunks are replaced and a reset builds a
+        fresh generation. Jobs that don't fit in the queue stay unclaimed for
+        the next round or another instance.
+        """
+        jobs = await self.job_model.get_unclaimed_jobs(
+            job_statuses=[ProcessJobEnum.QUEUED.value, ProcessJobEnum.RUNNING.value]
+        )
+        for job in jobs:
+            if self.is_full():
+                break
+
+            # another instance may be recovering the same job right now
+            if await self.job_model.claim_job(job_id=job.id, owner=self.owner_id,
+                                              lease_seconds=self.job_lease) is None:
+                continue
+
+            self.submit(job_id=job.id)
+            self.logger.info(f"Process job {job.id} recovered from a stopped instance")
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.job_lease / 3)
+            try:
+                await self.job_model.renew_claims(owner=self.owner_id, lease_seconds=self.job_lease)
+                await self.project_model.renew_project_job_claims(owner=self.owner_id,
+                                                                  lease_seconds=self.job_lease)
+                # projects another instance was busy with may be free by now
+                self.requeue_pending_jobs()
+                await self.recover_jobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error while renewing process job claims: {e}")
+
+    def get_lease_until(self):
+        # the claim a job gets when it is created for this queue
+        return datetime.now(timezone.utc) + timedelta(seconds=self.job_lease)
+
+    async def stop(self):
+        tasks = self.worker_tasks + list(self.gc_tasks)
+        if self.heartbeat_task is not None:
+            tasks.append(self.heartbeat_task)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.worker_tasks = []
+        self.heartbeat_task = None
+
+        # unfinished jobs can be taken over right away instead of after their lease
+        try:
+            await self.job_model.release_claims(owner=self.owner_id)
+            await self.project_model.release_project_job_claims(owner=self.owner_id)
+        except Exception as e:
+            self.logger.error(f"Error while releasing process job claims: {e}")
+
+    def is_full(self):
+        return self.queue.full()
+
+    def submit(self, job_id) -> bool:
+        # never wait for a free slot, the caller turns a full queue into a 429
+        try:
+            self.queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def cancel(self, job_id: str):
+        job = await self.job_model.request_cancel(job_id=job_id)
+        if job is None:
+            return None
+
+        self.cancelled_jobs.add(job.id)
+        return job
+
+    async def _worker(self, worker_no: int):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                # the provider calls of a job are background work, interactive
+                # ones sharing the scheduler are started first
+                with request_priority(RequestPriorityEnum.BULK):
+                    await self.run_queued_job(worker_no=worker_no, job_id=job_id)
+            except Exception as e:
+                self.logger.error(f"Process worker {worker_no} failed on job {job_id}: {e}")
+                await self.job_model.set_job_status(
+                    job_id=job_id,
+                    job_status=ProcessJobEnum.FAILED.value,
+                    job_error=str(e)
+                )
+            finally:
+                self.queue.task_done()
+
+    async def run_queued_job(self, worker_no: int, job_id):
+        job = await self.claim_job(job_id=job_id)
+        if job is None:
+            self.cancelled_jobs.discard(job_id)
+            return
+
+        # jobs of one project run one after the other: a job that runs next to
+        # a reset writes its chunks into the generation the reset replaces
+        project_id = job.job_project_id
+        if not await self.acquire_project(project_id=project_id):
+            self.pending_jobs.setdefault(project_id, deque()).append(job.id)
+            return
+
+        try:
+            # the project's waiting jobs run on this worker while it holds the project
+            while job is not None:
+                await self.run_job_safely(worker_no=worker_no, job=job)
+                job = await self.next_pending_job(project_id=project_id)
+        finally:
+            await self.release_project(project_id=project_id)
+
+    async def claim_job(self, job_id):
+        job = await self.job_model.claim_job(job_id=job_id, owner=self.owner_id,
+                                             lease_seconds=self.job_lease)
+        if job is None:
+            # finished, or taken over by another instance after our lease ran out
+            self.logger.info(f"Process job {job_id} is no longer claimable, skipped")
+        return job
+
+    async def acquire_project(self, project_id) -> bool:
+        # taken locally before the claim is awaited, two workers never race for it
+        if project_id in self.running_projects:
+            return False
+        self.running_projects.add(project_id)
+
+        try:
+            is_claimed = await self.project_model.claim_project_jobs(
+                project_id=project_id,
+                owner=self.owner_id,
+                lease_seconds=self.job_lease
+            )
+        except Exception:
+            self.running_projects.discard(project_id)
+            raise
+
+        if not is_claimed:
+            # another instance runs a job of the project, the heartbeat retries
+            self.running_projects.discard(project_id)
+        return is_claimed
+
+    async def release_project(self, project_id):
+        try:
+            await self.project_model.release_project_job_claims(owner=self.owner_id, project_id=project_id)
+        finally:
+            self.running_projects.discard(project_id)
+            # a job that arrived while the claim was being released
+            self.requeue_pending_jobs()
+
+    async def next_pending_job(self, project_id):
+        pending_jobs = self.pending_jobs.get(project_id)
+        while pending_jobs:
+            job = await self.claim_job(job_id=pending_jobs.popleft())
+            if job is not None:
+                return job
+
+        self.pending_jobs.pop(project_id, None)
+        return None
+
+    def requeue_pending_jobs(self):
+        # one job per free project goes back on the queue, the worker that
+        # takes it runs the project's other pending jobs after it
+        for project_id in list(self.pending_jobs.keys()):
+            if project_id in self.running_projects:
+                continue
+
+            pending_jobs = self.pending_jobs[project_id]
+            if not self.submit(job_id=pending_jobs[0]):
+                break
+            pending_jobs.popleft()
+            if len(pending_jobs) == 0:
+                del self.pending_jobs[project_id]
+
+    async def run_job_safely(self, worker_no: int, job):
+        try:
+            await self.run_job(job=job)
+        except Exception as e:
+            self.logger.error(f"Process worker {worker_no} failed on job {job.id}: {e}")
+            await self.job_model.set_job_status(
+                job_id=job.id,
+                job_status=ProcessJobEnum.FAILED.value,
+                job_error=str(e)
+            )
+        finally:
+            self.cancelled_jobs.discard(job.id)
+
+    async def is_cancelled(self, job_id) -> bool:
+        # the flag is persisted by request_cancel, it is read from the job so a
+        # cancel handled by another app instance is seen as well
+        if job_id in self.cancelled_jobs:
+            return True
+
+        if await self.job_model.is_cancel_requested(job_id=job_id):
+            self.cancelled_jobs.add(job_id)
+            return True
+
+        return False
+
+    async def _cancel_job(self, job, pending_assets: list):
+        for asset in pending_assets:
+            await self.job_model.set_asset_progress(
+                job_id=job.id,
+                asset_id=asset["asset_id"],
+                status=ProcessJobEnum.CANCELLED.value
+            )
+        await self.job_model.set_job_status(
+            job_id=job.id,
+            job_status=ProcessJobEnum.CANCELLED.value
+        )
+
+    async def run_job(self, job):
+        if job.job_cancel_requested or await self.is_cancelled(job.id):
+            await self._cancel_job(job=job, pending_assets=job.job_assets)
+            return
+
+        await self.job_model.set_job_status(
+            job_id=job.id,
+            job_status=ProcessJobEnum.RUNNING.value
+        )
+
+        job_config = job.job_config
+        is_reset = job_config.get("do_reset") == 1
+
+        # a reset builds a new generation next to the live one and only flips
+        # the project over to it once every asset made it in
+        if is_reset:
+            generation = await self.project_model.allocate_generation(project_id=job.job_project_id)
+            # instances sweeping stale generations skip the ones a claimed job builds
+            await self.job_model.set_job_generation(job_id=job.id, job_generation=generation)
+        else:
+            project = await self.project_model.get_project_by_id(project_id=job.job_project_id)
+            generation = project.project_active_generation
+
+        process_controller = ProcessController(
+            project_id=job_config["project_id"],
+            parsing_engine=self.parsing_engine,
+            pages_per_task=self.pages_per_task,
+            text_segment_size=self.text_segment_size,
+            page_cache=self.page_cache,
+            parallel_min_pages=self.parallel_min_pages,
+            pages_per_range=self.pages_per_range
+        )
+
+        # process states of a reset are only valid once its generation is live
+        pending_process_states = {}
+        try:
+            job_status = await self.process_assets(
+                job=job,
+                process_controller=process_controller,
+                generation=generation,
+                pending_process_states=pending_process_states if is_reset else None
+            )
+        except Exception:
+            if is_reset:
+                self.collect_generation(project_id=job.job_project_id, generation=generation)
+            raise
+
+        if is_reset:
+            await self.finish_generation(
+                job=job,
+                generation=generation,
+                is_complete=job_status in [
+                    ProcessJobEnum.COMPLETED.value,
+                    ProcessJobEnum.PARTIALLY_COMPLETED.value
+                ],
+                pending_process_states=pending_process_states
+            )
+
+        if job_status == ProcessJobEnum.COMPLETED.value:
+            await self.job_model.set_job_status(
+                job_id=job.id,
+                job_status=ProcessJobEnum.COMPLETED.value
+            )
+
+    async def process_assets(self, job, process_controller: ProcessController, generation: int,
+                             pending_process_states: dict = None):
+        """
+        Runs up to asset_concurrency assets at a time, while one asset waits on
+        Mongo another one is being parsed. A failing asset is recorded on the job
+        and the others carry on.
+        """
+        semaphore = asyncio.Semaphore(self.asset_concurrency)
+
+        async def run_bounded(asset: dict):
+            async with semaphore:
+                return await self.run_asset(
+                    job=job,
+                    process_controller=process_controller,
+                    asset=asset,
+                    generation=generation,
+                    pending_process_states=pending_process_states
+                )
+
+        asset_statuses = await asyncio.gather(*[
+            run_bounded(asset) for asset in job.job_assets
+        ])
+
+        if ProcessJobEnum.CANCELLED.value in asset_statuses:
+            await self.job_model.set_job_status(
+                job_id=job.id,
+                job_status=ProcessJobEnum.CANCELLED.value
+            )
+            return ProcessJobEnum.CANCELLED.value
+
+        failed_assets = [
+            asset["asset_name"]
+            for asset, asset_status in zip(job.job_assets, asset_statuses)
+            if asset_status == ProcessJobEnum.FAILED.value
+        ]
+        if len(failed_assets) == 0:
+            return ProcessJobEnum.COMPLETED.value
+
+        job_status = ProcessJobEnum.FAILED.value if len(failed_assets) == len(job.job_assets) \
+            else ProcessJobEnum.PARTIALLY_COMPLETED.value
+
+        await self.job_model.set_job_status(
+            job_id=job.id,
+            job_status=job_status,
+            job_error=f"Error while processing files: {', '.join(failed_assets)}"
+        )
+        return job_status
+
+    async def run_asset(self, job, process_controller: ProcessController, asset: dict,
+                        generation: int, pending_process_states: dict = None):
+        job_config = job.job_config
+
+        if await self.is_cancelled(job.id):
+            await self.job_model.set_asset_progress(
+                job_id=job.id,
+                asset_id=asset["asset_id"],
+                status=ProcessJobEnum.CANCELLED.value
+            )
+            return ProcessJobEnum.CANCELLED.value
+
+        asset_process_state, is_up_to_date = await self.get_asset_process_state(
+            job=job,
+            process_controller=process_controller,
+            asset=asset
+        )
+
+        if is_up_to_date:
+            await self.job_model.set_asset_progress(
+                job_id=job.id,
+                asset_id=asset["asset_id"],
+                status=ProcessJobEnum.SKIPPED.value
+            )
+            return ProcessJobEnum.SKIPPED.value
+
+        await self.job_model.set_asset_progress(
+            job_id=job.id,
+            asset_id=asset["asset_id"],
+            status=ProcessJobEnum.RUNNING.value
+        )
+
+        # replace this asset's chunks instead of piling new ones on top
+        if job_config.get("do_reset") != 1:
+            _ = await self.chunk_model.delete_chunks_by_asset_id(
+                asset_id=asset["asset_id"],
+                generation=generation
+            )
+
+        try:
+            is_processed, error = await self.process_asset(
+                job=job,
+                process_controller=process_controller,
+                asset=asset,
+                generation=generation,
+                content_hash=asset_process_state["content_hash"]
+            )
+        except Exception as e:
+            self.logger.error(f"Error while processing file: {asset['asset_name']}: {e}")
+            is_processed, error = False, str(e)
+
+        if pending_process_states is not None:
+            if is_processed:
+                pending_process_states[asset["asset_id"]] = asset_process_state
+        else:
+            await self.asset_model.set_asset_process_state(
+                asset_id=asset["asset_id"],
+                asset_process_state=asset_process_state if is_processed else None
+            )
+
+        if error == ProcessJobEnum.CANCELLED.value:
+            await self.job_model.set_asset_progress(
+                job_id=job.id,
+                asset_id=asset["asset_id"],
+                status=ProcessJobEnum.CANCELLED.value
+            )
+            return ProcessJobEnum.CANCELLED.value
+
+        if not is_processed:
+            await self.job_model.set_asset_progress(
+                job_id=job.id,
+                asset_id=asset["asset_id"],
+                status=ProcessJobEnum.FAILED.value,
+                error=error
+            )
+            return ProcessJobEnum.FAILED.value
+
+        return ProcessJobEnum.COMPLETED.value
+
+    async def finish_generation(self, job, generation: int, is_complete: bool,
+                                pending_process_states: dict):
+        is_activated = is_complete and await self.project_model.activate_generation(
+            project_id=job.job_project_id,
+            generation=generation
+        )
+
+        if not is_activated:
+            # failed, cancelled or overtaken by a newer reset: drop what was built
+            self.collect_generation(project_id=job.job_project_id, generation=generation)
+            return
+
+        # assets that didn't make it into the generation, or weren't part of
+        # the reset at all, have no chunks in it: they must not look up to date
+        await self.asset_model.clear_process_states(
+            asset_project_id=job.job_project_id,
+            except_asset_ids=list(pending_process_states.keys())
+        )
+        for asset_id, asset_process_state in pending_process_states.items():
+            await self.asset_model.set_asset_process_state(
+                asset_id=asset_id,
+                asset_process_state=asset_process_state
+            )
+
+        self.collect_generation(project_id=job.job_project_id, older_than=generation)
+
+    def collect_generation(self, project_id, generation: int = None, older_than: int = None):
+        # deleting a whole generation can take a while, do it in the background
+        self.track_gc_task(asyncio.create_task(
+            self.chunk_model.delete_generation_chunks(
+                project_id=project_id,
+                generation=generation,
+                older_than=older_than,
+                batch_size=self.gc_batch_size,
+                pause=self.gc_pause
+            )
+        ))
+
+    def track_gc_task(self, task: asyncio.Task):
+        # stop() cancels the collections still running
+        self.gc_tasks.add(task)
+        task.add_done_callback(self.gc_tasks.discard)
+
+    async def add_embedded_documents(self, chunk_writer, documents: list):
+        if len(documents) == 0:
+            return
+
+        # one embed_texts() per insert batch, the provider packs it into as few calls as it allows
+        vectors = await self.embedding_client.embed_texts(
+            texts=[document["chunk_text"] for document in documents],
+            document_type=DocumentTypeEnum.DOCUMENT.value
+        )
+        if vectors is None:
+            raise RuntimeError("Embedding provider is not configured")
+
+        for document, vector in zip(documents, vectors):
+            # a text the provider rejected is stored without a vector
+            if vector is not None:
+                document["chunk_embedding"] = vector
+            await chunk_writer.add(document)
+
+    async def get_asset_process_state(self, job, process_controller: ProcessController, asset: dict):
+        """
+        Returns the process state the asset's chunks will have after this job
+        (content hash + chunking params) and whether the stored chunks already match it.
+        """
+        job_config = job.job_config
+        asset_record = await self.asset_model.get_asset_by_id(asset_id=asset["asset_id"])
+
+        content_hash = asset_record.asset_content_hash if asset_record else None
+        if content_hash is None and process_controller.is_supported_file(file_id=asset["asset_name"]):
+            # assets uploaded before hashing was added, never blob-backed
+            content_hash = await asyncio.to_thread(
+                process_controller.get_file_hash,
+                file_id=asset["asset_name"]
+            )
+            await self.asset_model.set_asset_content_hash(
+                asset_id=asset["asset_id"],
+                asset_content_hash=content_hash
+            )
+
+        asset_process_state = {
+            "content_hash": content_hash,
+            "chunk_size": job_config["chunk_size"],
+            "overlap_size": job_config["overlap_size"],
+            "splitter": job_config.get("splitter", SplitterEnum.LANGCHAIN.value)
+        }
+        if self.embedding_client is not None:
+            # chunks written without vectors, or by another model, are redone
+            asset_process_state["embedding_model"] = self.embedding_client.embedding_model_id
+
+        is_up_to_date = (
+            job_config.get("incremental") == 1 and
+            job_config.get("do_reset") != 1 and
+            content_hash is not None and
+            asset_record is not None and
+            asset_record.asset_process_state == asset_process_state
+        )
+
+        return asset_process_state, is_up_to_date
+
+    async def process_asset(self, job, process_controller: ProcessController, asset: dict,
+                            generation: int = 0, content_hash: str = None):
+        """
+        Streams chunks out of the parser into the bulk writer, which writes them
+        insert_batch_size at a time with a few batches in flight, so memory is
+        bounded by the batches and parser window, not by the document.
+        """
+        file_id = asset["asset_name"]
+        # jobs queued before blob storage carry no asset_blob
+        asset_blob = asset.get("asset_blob")
+        job_config = job.job_config
+
+        if not process_controller.is_supported_file(file_id=file_id, asset_blob=asset_blob):
+            self.logger.error(f"Error while processing file: {file_id}")
+            return False, "file_content_not_loaded"
+
+        file_chunks = process_controller.iter_file_chunks(
+            file_id=file_id,
+            chunk_size=job_config["chunk_size"],
+            overlap_size=job_config["overlap_size"],
+            splitter=job_config.get("splitter", SplitterEnum.LANGCHAIN.value),
+            asset_blob=asset_blob,
+            content_hash=content_hash
+        )
+
+        chunk_writer = self.chunk_model.get_bulk_writer(
+            batch_size=self.insert_batch_size,
+            max_in_flight=self.insert_max_in_flight,
+            project_id=job.job_project_id
+        )
+
+        no_chunks = 0
+        asset_metadata = None
+        # chunks waiting for their embeddings, one insert batch at a time
+        pending_documents = []
+        try:
+            async with aclosing(file_chunks):
+                async for chunk_text, chunk_metadata, chunk_start in file_chunks:
+                    if asset_metadata is None:
+                        # the document metadata goes on the asset once,
+                        # before any chunk that relies on it is readable
+                        asset_metadata = DataChunk.get_document_metadata(chunk_metadata)
+                        await self.asset_model.set_asset_metadata(
+                            asset_id=asset["asset_id"],
+                            asset_metadata=asset_metadata
+                        )
+
+                    no_chunks += 1
+                    document = DataChunk.build_document(
+                        chunk_text=chunk_text,
+                        chunk_metadata=chunk_metadata,
+                        chunk_order=no_chunks,
+                        chunk_project_id=job.job_project_id,
+                        chunk_asset_id=asset["asset_id"],
+                        chunk_generation=generation,
+                        asset_metadata=asset_metadata,
+                        chunk_start=chunk_start
+                    )
+                    if self.embedding_client is None:
+                        await chunk_writer.add(document)
+                    else:
+                        pending_documents.append(document)
+
+                    if no_chunks % self.insert_batch_size != 0:
+                        continue
+
+                    await self.add_embedded_documents(chunk_writer=chunk_writer, documents=pending_documents)
+                    pending_documents = []
+
+                    if await self.is_cancelled(job.id):
+                        await chunk_writer.abort()
+                        return False, ProcessJobEnum.CANCELLED.value
+
+                    await self.job_model.set_asset_progress(
+                        job_id=job.id,
+                        asset_id=asset["asset_id"],
+                        inserted_chunks=chunk_writer.inserted_count
+                    )
+
+            await self.add_embedded_documents(chunk_writer=chunk_writer, documents=pending_documents)
+            no_records = await chunk_writer.flush()
+
+        except asyncio.TimeoutError:
+            await chunk_writer.abort()
+            self.logger.error(f"Parsing timed out for file: {file_id}")
+            return False, "parsing_timed_out"
+        except BrokenProcessPool:
+            await chunk_writer.abort()
+            self.logger.error(f"Parsing worker crashed on file: {file_id}")
+            return False, "parsing_worker_crashed"
+        except Exception:
+            await chunk_writer.abort()
+            raise
+
+        if no_records == 0:
+            return False, "no_chunks_produced"
+
+        await self.job_model.set_asset_progress(
+            job_id=job.id,
+            asset_id=asset["asset_id"],
+            status=ProcessJobEnum.COMPLETED.value,
+            inserted_chunks=no_records,
+            total_chunks=no_chunks
+        )
+
+        return True, None
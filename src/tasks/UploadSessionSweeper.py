@@ -0,0 +1,91 @@
+from controllers import BlobController
+from models.UploadSessionModel import UploadSessionModel
+from datetime import datetime, timezone, timedelta
+import asyncio
+import logging
+import time
+
+class UploadSessionSweeper:
+    """
+    Deletes resumable upload sessions nobody touched for session_ttl seconds,
+    with their temp files, and temp files no session or upload owns anymore
+    (uploads cut short by a crash). Runs once at startup, then every
+    sweep_interval seconds.
+    """
+
+    def __init__(self, upload_session_model: UploadSessionModel, blob_controller: BlobController,
+                       session_ttl: int = 86400, sweep_interval: int = 3600):
+        self.upload_session_model = upload_session_model
+        self.blob_controller = blob_controller
+        self.session_ttl = session_ttl
+        self.sweep_interval = sweep_interval
+
+        self.sweep_task = None
+        self.logger = logging.getLogger('uvicorn.error')
+
+    def start(self):
+        if self.session_ttl > 0:
+            self.sweep_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.sweep_task is None:
+            return
+
+        self.sweep_task.cancel()
+        await asyncio.gather(self.sweep_task, return_exceptions=True)
+        self.sweep_task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error while sweeping upload sessions: {e}")
+
+            await asyncio.sleep(self.sweep_interval)
+
+    async def sweep(self):
+        expired_before = datetime.now(timezone.utc) - timedelta(seconds=self.session_ttl)
+
+        deleted_sessions = 0
+        for upload_session in await self.upload_session_model.get_expired_sessions(expired_before=expired_before):
+            # a PATCH or finalize that claimed the session since keeps it
+            if not await self.upload_session_model.delete_expired_session(
+                session_id=upload_session.id,
+                expired_before=expired_before
+            ):
+                continue
+
+            await asyncio.to_thread(
+                self.blob_controller.discard_temp,
+                self.blob_controller.get_temp_path(temp_name=upload_session.session_temp_name)
+            )
+            deleted_sessions += 1
+
+        # temp files are written to continuously while an upload is alive,
+        # an old one belongs to an upload that will never finish
+        stale_temp_names = await asyncio.to_thread(
+            self.blob_controller.get_stale_temp_names,
+            older_than=time.time() - self.session_ttl
+        )
+        session_temp_names = await self.upload_session_model.get_session_temp_names(
+            session_temp_names=stale_temp_names
+        )
+        deleted_temps = 0
+        for temp_name in stale_temp_names:
+            if temp_name in session_temp_names:
+                continue
+            await asyncio.to_thread(
+                self.blob_controller.discard_temp,
+                self.blob_controller.get_temp_path(temp_name=temp_name)
+            )
+            deleted_temps += 1
+
+        if deleted_sessions or deleted_temps:
+            self.logger.info(
+                f"Deleted {deleted_sessions} expired upload sessions and {deleted_temps} stale temp files"
+            )
+
+        return deleted_sessions, deleted_temps
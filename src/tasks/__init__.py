@@ -0,0 +1,2 @@
+from .ProcessJobQueue import ProcessJobQueue
+from .UploadSessionSweeper import UploadSessionSweeper
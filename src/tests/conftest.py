@@ -0,0 +1,18 @@
+import os
+import sys
+
+# the app reads its settings from the environment, tests only need placeholders
+for key, value in {
+    "APP_NAME": "tests",
+    "APP_VERSION": "0.1",
+    "OPENAI_API_KEY": "",
+    "FILE_ALLOWED_TYPES": '["text/plain", "application/pdf"]',
+    "FILE_MAX_SIZE": "10",
+    "FILE_DEFAULT_CHUNK_SIZE": "512000",
+    "MONGODB_URL": "mongodb://localhost:27017",
+    "MONGODB_DATABASE": "tests",
+}.items():
+    os.environ.setdefault(key, value)
+
+# modules are imported the way main.py does, relative to src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import openai
+import pytest
+from helpers.config import Settings
+from stores.llm.LLMProviderFactory import LLMProviderFactory
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """
+    Answers the OpenAI and CoHere endpoints the async providers call, after
+    server.delay seconds. Every request records the client address it came
+    from, so tests can count the connections the providers opened.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, body: dict, status: int = 200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["content-length"])))
+        self.server.peers.add(self.client_address)
+        self.server.requests.append((self.path, request))
+        time.sleep(self.server.delay)
+
+        if self.server.rate_limited > 0:
+            self.server.rate_limited -= 1
+            return self.reply({"error": {"message": "slow down"}}, status=429)
+
+        if self.path == "/v1/embeddings":
+            texts = request["input"] if isinstance(request["input"], list) else [request["input"]]
+            return self.reply({
+                "object": "list",
+                "data": [
+                    {"object": "embedding", "index": index, "embedding": [float(len(text))]}
+                    for index, text in enumerate(texts)
+                ],
+                "model": request["model"],
+                "usage": {"prompt_tokens": 1, "total_tokens": 1}
+            })
+
+        if self.path == "/v1/chat/completions":
+            return self.reply({
+                "id": "fake", "object": "chat.completion", "created": 0, "model": request["model"],
+                "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "echo:" + request["messages"][-1]["content"]}
+                }]
+            })
+
+        if self.path == "/v1/embed":
+            return self.reply({
+                "id": "fake", "texts": request["texts"], "response_type": "embeddings_by_type",
+                "embeddings": {"float": [[float(len(text))] for text in request["texts"]]},
+                "meta": {"billed_units": {"input_tokens": 1}}
+            })
+
+        if self.path == "/v1/chat":
+            return self.reply({
+                "text": "echo:" + request["message"], "generation_id": "fake",
+                "chat_history": [], "finish_reason": "COMPLETE"
+            })
+
+        self.send_error(404)
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLMHandler)
+    server.daemon_threads = True
+    server.peers = set()
+    server.requests = []
+    server.rate_limited = 0 # requests answered with a 429 before the others go through
+    server.delay = 0.05
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_factory(server, **settings):
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return LLMProviderFactory(config=Settings(
+        OPENAI_API_KEY="key", OPENAI_API_URL=base_url + "/v1",
+        COHERE_API_KEY="key", COHERE_API_URL=base_url,
+        **settings
+    ))
+
+
+def make_providers(factory):
+    openai_provider = factory.create_async("OPENAI")
+    openai_provider.set_generation_model(model_id="gpt")
+    openai_provider.set_embedding_model(model_id="embedding", embedding_size=1)
+
+    cohere_provider = factory.create_async("COHERE")
+    cohere_provider.set_generation_model(model_id="command")
+    cohere_provider.set_embedding_model(model_id="embed", embedding_size=1)
+
+    return openai_provider, cohere_provider
+
+
+def test_async_providers_share_one_connection_pool(fake_server):
+    async def run():
+        factory = make_factory(fake_server, LLM_HTTP_MAX_KEEPALIVE=20)
+        openai_provider, cohere_provider = make_providers(factory)
+
+        # both SDKs send through the factory's client
+        assert openai_provider.client._client is factory.http_client
+        assert cohere_provider.client._client_wrapper.httpx_client.httpx_client is factory.http_client
+
+        calls = [openai_provider.embed_text(f"text {i}") for i in range(10)] + \
+                [cohere_provider.embed_text("abc") for _ in range(5)] + \
+                [openai_provider.generate_text("hi"), cohere_provider.generate_text("yo")]
+        results = await asyncio.gather(*calls)
+        assert results[0] == [6.0]
+        assert results[10] == [3.0]
+        assert results[-2:] == ["echo:hi", "echo:yo"]
+
+        # a second wave reuses the kept-alive connections instead of opening new ones
+        connections = len(fake_server.peers)
+        await asyncio.gather(*[openai_provider.embed_text("x") for _ in range(10)])
+        assert len(fake_server.peers) == connections
+
+        await factory.aclose()
+
+    asyncio.run(run())
+
+
+def test_async_providers_time_out_on_the_shared_client(fake_server):
+    async def run():
+        factory = make_factory(fake_server, LLM_HTTP_TIMEOUT=0.2)
+        openai_provider, _ = make_providers(factory)
+        # the timeout under test is the pool's, not the SDK's retries
+        openai_provider.client = openai_provider.client.with_options(max_retries=0)
+
+        fake_server.delay = 1.0
+        started = time.monotonic()
+        with pytest.raises(openai.APITimeoutError):
+            await openai_provider.generate_text("slow")
+        assert time.monotonic() - started < 0.9
+
+        await factory.aclose()
+
+    asyncio.run(run())
+
+
+def test_factory_aclose_closes_the_shared_client(fake_server):
+    async def run():
+        factory = make_factory(fake_server)
+        openai_provider, _ = make_providers(factory)
+        assert await openai_provider.generate_text("hi") == "echo:hi"
+
+        http_client = factory.http_client
+        await factory.aclose()
+        assert http_client.is_closed
+        assert factory.http_client is None
+
+        # providers created afterwards get a new pool
+        openai_provider, _ = make_providers(factory)
+        assert openai_provider.client._client is factory.http_client
+        assert not factory.http_client.is_closed
+        assert await openai_provider.generate_text("again") == "echo:again"
+
+        await factory.aclose()
+
+    asyncio.run(run())
+
+
+def test_scheduled_provider_schedules_every_embedding_batch(fake_server):
+    from stores.llm.ProviderScheduler import ProviderScheduler
+
+    async def run():
+        factory = make_factory(fake_server, EMBEDDING_BATCH_SIZE=4)
+        factory.scheduler = ProviderScheduler(max_concurrency=2)
+        openai_provider, _ = make_providers(factory)
+
+        # the scheduler retries, the SDK and the batcher don't
+        assert openai_provider.provider.client.max_retries == 0
+        assert openai_provider.provider.embedding_batcher.max_retries == 0
+
+        texts = [f"text {i}" for i in range(10)]
+        vectors = await openai_provider.embed_texts(texts)
+        assert vectors == [[float(len(text))] for text in texts]
+        assert factory.scheduler.stats()["completed"] == 3
+
+        await factory.aclose()
+
+    asyncio.run(run())
+
+
+def test_scheduled_generate_retries_send_the_same_messages(fake_server):
+    from stores.llm.ProviderScheduler import ProviderScheduler
+
+    async def run():
+        factory = make_factory(fake_server)
+        factory.scheduler = ProviderScheduler(max_concurrency=2, max_retries=2, retry_backoff=0.01)
+        openai_provider, _ = make_providers(factory)
+
+        chat_history = [{"role": "system", "content": "be brief"}]
+        fake_server.rate_limited = 1
+        assert await openai_provider.generate_text("hi", chat_history=chat_history) == "echo:hi"
+
+        expected = [{"role": "system", "content": "be brief"}, {"role": "user", "content": "hi"}]
+        sent = [request["messages"] for path, request in fake_server.requests if path == "/v1/chat/completions"]
+        assert sent == [expected, expected]
+        assert chat_history == [{"role": "system", "content": "be brief"}]
+        assert factory.scheduler.stats()["retries"] == 1
+
+        await factory.aclose()
+
+    asyncio.run(run())
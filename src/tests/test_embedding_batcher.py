@@ -0,0 +1,89 @@
+import asyncio
+from stores.llm.EmbeddingBatcher import EmbeddingBatcher
+
+
+class TransientError(Exception):
+    pass
+
+
+class InputError(Exception):
+    pass
+
+
+class AuthError(Exception):
+    pass
+
+
+def make_embed_batch(fail, calls):
+    # fail(batch_texts) returns the exception the fake provider raises, or None
+    def embed_batch(batch_texts):
+        calls.append(list(batch_texts))
+        error = fail(batch_texts)
+        if error is not None:
+            raise error
+        return [[float(len(text))] for text in batch_texts], None
+
+    return embed_batch
+
+
+def embed(texts, fail, max_batch_size=100):
+    calls = []
+    batcher = EmbeddingBatcher(max_batch_size=max_batch_size, max_retries=2, retry_backoff=0)
+    embeddings = batcher.embed(
+        texts=texts,
+        embed_batch=make_embed_batch(fail, calls),
+        is_retryable=lambda error: isinstance(error, TransientError),
+        is_input_error=lambda error: isinstance(error, InputError)
+    )
+    return embeddings, calls
+
+
+def test_auth_error_stops_after_one_call():
+    texts = [f"text {i}" for i in range(5000)]
+    embeddings, calls = embed(texts, fail=lambda batch_texts: AuthError("401"))
+
+    assert len(calls) == 1
+    assert embeddings == [None] * len(texts)
+
+
+def test_input_error_is_bisected_down_to_the_bad_text():
+    texts = [f"text {i}" for i in range(64)]
+    texts[37] = "too long"
+    embeddings, calls = embed(
+        texts,
+        fail=lambda batch_texts: InputError("400") if "too long" in batch_texts else None
+    )
+
+    assert embeddings[37] is None
+    assert all(embeddings[i] == [float(len(texts[i]))] for i in range(len(texts)) if i != 37)
+    assert len(calls) < 20
+
+
+def test_transient_error_is_retried_without_splitting():
+    failures = [TransientError("429")]
+    embeddings, calls = embed(
+        [f"text {i}" for i in range(10)],
+        fail=lambda batch_texts: failures.pop() if failures else None
+    )
+
+    assert [len(batch_texts) for batch_texts in calls] == [10, 10]
+    assert None not in embeddings
+
+
+def test_embed_async_stops_on_auth_error():
+    calls = []
+
+    async def embed_batch(batch_texts):
+        calls.append(batch_texts)
+        raise AuthError("403")
+
+    batcher = EmbeddingBatcher(max_batch_size=10)
+    embeddings = asyncio.run(batcher.embed_async(
+        texts=["a"] * 100,
+        embed_batch=embed_batch,
+        is_retryable=lambda error: False,
+        is_input_error=lambda error: isinstance(error, InputError)
+    ))
+
+    assert len(calls) == 1
+    assert embeddings == [None] * 100
@@ -0,0 +1,63 @@
+import random
+import pytest
+from models import SplitterEnum
+from helpers.parsing_engine import parse_file_window, get_text_splitter, get_chunk_offsets
+
+
+def make_text(words: int, seed: int = 7):
+    rng = random.Random(seed)
+    vocabulary = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", "ünïcode"]
+    paragraphs = []
+    while words > 0:
+        paragraph_words = rng.randint(20, 400)
+        paragraphs.append(" ".join(rng.choice(vocabulary) for _ in range(paragraph_words)))
+        words -= paragraph_words
+    return "\n\n".join(paragraphs)
+
+
+def stream_chunks(file_path: str, chunk_size: int, overlap_size: int, splitter: str,
+                  segment_size: int, max_pages: int):
+    chunks = []
+    cursor, carry = None, None
+    while True:
+        window_chunks, cursor, carry = parse_file_window(
+            file_path=file_path,
+            cursor=cursor,
+            carry=carry,
+            chunk_size=chunk_size,
+            overlap_size=overlap_size,
+            max_pages=max_pages,
+            segment_size=segment_size,
+            splitter=splitter
+        )
+        chunks.extend((chunk_text, chunk_start) for chunk_text, _, chunk_start in window_chunks)
+        if cursor is None:
+            return chunks
+
+
+@pytest.mark.parametrize("splitter", [SplitterEnum.NATIVE.value, SplitterEnum.LANGCHAIN.value])
+@pytest.mark.parametrize("segment_size", [1000, 4096, 65536])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_streamed_text_file_chunks_match_whole_file(tmp_path, splitter, segment_size, newline):
+    # text files are read segment_size bytes at a time, their chunks must not
+    # depend on where the segments end
+    text = make_text(words=60000)
+    file_path = tmp_path / "document.txt"
+    file_path.write_text(text, encoding="utf-8", newline=newline)
+
+    text_splitter = get_text_splitter(chunk_size=500, overlap_size=50, splitter=splitter)
+    expected = [
+        (text[start:end], start)
+        for start, end in get_chunk_offsets(text_splitter=text_splitter, text=text, overlap_size=50)
+    ]
+
+    chunks = stream_chunks(
+        file_path=str(file_path),
+        chunk_size=500,
+        overlap_size=50,
+        splitter=splitter,
+        segment_size=segment_size,
+        max_pages=3
+    )
+
+    assert chunks == expected
@@ -0,0 +1,52 @@
+import asyncio
+import pytest
+from stores.llm.ProviderScheduler import ProviderScheduler
+
+
+class TransientError(Exception):
+    pass
+
+
+def run_submit(scheduler, failures, is_retryable):
+    calls = []
+
+    async def call():
+        calls.append(len(calls))
+        if failures:
+            raise failures.pop(0)
+        return "done"
+
+    async def run():
+        return await scheduler.submit(key=("fake", "model"), call=call, is_retryable=is_retryable)
+
+    return asyncio.run(run()), calls
+
+
+def test_retryable_errors_are_retried_until_the_call_succeeds():
+    scheduler = ProviderScheduler(max_concurrency=1, max_retries=3, retry_backoff=0.001)
+    result, calls = run_submit(
+        scheduler,
+        failures=[TransientError("429"), TransientError("503")],
+        is_retryable=lambda error: isinstance(error, TransientError)
+    )
+
+    assert result == "done"
+    assert len(calls) == 3
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["running"] == 0
+
+
+def test_other_errors_and_exhausted_retries_are_raised():
+    scheduler = ProviderScheduler(max_concurrency=1, max_retries=1, retry_backoff=0.001)
+    with pytest.raises(ValueError):
+        run_submit(scheduler, failures=[ValueError("400")],
+                   is_retryable=lambda error: isinstance(error, TransientError))
+
+    with pytest.raises(TransientError):
+        run_submit(scheduler, failures=[TransientError("429")] * 2,
+                   is_retryable=lambda error: isinstance(error, TransientError))
+
+    stats = scheduler.stats()
+    assert stats["failed"] == 2
+    assert stats["retries"] == 1
+    assert stats["running"] == 0
@@ -0,0 +1,53 @@
+import random
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from helpers.text_splitter import OffsetTextSplitter
+
+
+def make_text(seed: int, pieces: int = 300):
+    rng = random.Random(seed)
+    words = ["a", "to", "the", "split", "chunks", "ünïcode", "x" * 40, "y" * 700]
+    separators = [" ", " ", " ", "\n", "\n\n", "\n\n\n", "  ", " \n ", "\t"]
+    return "".join(
+        rng.choice(words) + rng.choice(separators)
+        for _ in range(pieces)
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(50, 0), (100, 20), (300, 50), (1000, 100)])
+def test_same_chunks_as_langchain(seed, chunk_size, chunk_overlap):
+    text = make_text(seed=seed)
+    langchain_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        is_separator_regex=False,
+    )
+
+    splitter = OffsetTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    assert splitter.split_text(text) == langchain_splitter.split_text(text)
+
+
+@pytest.mark.parametrize("text", ["", "   \n\n ", "one", "one two\n\nthree", "\n\nleading and trailing\n\n"])
+def test_same_chunks_as_langchain_on_edge_cases(text):
+    langchain_splitter = RecursiveCharacterTextSplitter(chunk_size=5, chunk_overlap=2)
+    splitter = OffsetTextSplitter(chunk_size=5, chunk_overlap=2)
+
+    assert splitter.split_text(text) == langchain_splitter.split_text(text)
+
+
+def test_offsets_point_at_the_chunks():
+    text = make_text(seed=1)
+    splitter = OffsetTextSplitter(chunk_size=200, chunk_overlap=40)
+
+    offsets = splitter.split_offsets(text)
+
+    assert [text[start:end] for start, end in offsets] == splitter.split_text(text)
+    assert [start for start, _ in offsets] == sorted(start for start, _ in offsets)
+
+
+def test_overlap_larger_than_chunk_size():
+    with pytest.raises(ValueError):
+        OffsetTextSplitter(chunk_size=10, chunk_overlap=20)